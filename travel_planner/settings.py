@@ -38,6 +38,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # 'trip.middleware.RequestMetricsMiddleware',  # Métricas por requisição em /trip/metrics/ (opcional)
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -68,6 +69,9 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'travel_planner.wsgi.application'
+# Views assíncronas (home, destination_list, destination_detail, city_detail)
+# rendem mais servidas por ASGI: uvicorn travel_planner.asgi:application
+ASGI_APPLICATION = 'travel_planner.asgi.application'
 
 
 # Database
@@ -88,6 +92,19 @@ DATABASES = {
     }
 }
 
+# Cache
+# As versões dos ETags, do menu e dos índices em memória (trip/versions.py)
+# precisam ser vistas por todos os processos: em produção, com vários
+# workers, usar um cache compartilhado (Redis ou memcached). O padrão,
+# LocMemCache, só vale para um processo.
+#
+# CACHES = {
+#     'default': {
+#         'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+#         'LOCATION': 'redis://127.0.0.1:6379',
+#     }
+# }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
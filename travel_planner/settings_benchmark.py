@@ -0,0 +1,22 @@
+# Configuração dos benchmarks: SQLite local, sem depender do MySQL
+#   python manage.py benchmark_views --settings=travel_planner.settings_benchmark
+# Baseline da escala small (todas as páginas com status 200):
+#   ... --compare trip/benchmarks/baseline-small.json
+import os
+
+from .settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('TRIP_BENCHMARK_DB', str(BASE_DIR / 'benchmark.sqlite3')),
+    }
+}
+
+DEBUG = False
+ALLOWED_HOSTS = ['testserver', 'localhost', '127.0.0.1']
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+# Tarefas em segundo plano rodam na hora, para não medir filas
+TRIP_IMAGE_PIPELINE_ASYNC = False
+TRIP_MEDIA_DELETE_ASYNC = False
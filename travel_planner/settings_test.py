@@ -0,0 +1,20 @@
+# Configuração dos testes: SQLite em memória, sem depender do MySQL
+#   python manage.py test trip --settings=travel_planner.settings_test
+import tempfile
+
+from .settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+}
+
+ALLOWED_HOSTS = ['testserver', 'localhost', '127.0.0.1']
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+MEDIA_ROOT = tempfile.mkdtemp(prefix='travel_planner_tests_')
+
+# Tarefas em segundo plano rodam na hora, dentro do teste
+TRIP_IMAGE_PIPELINE_ASYNC = False
+TRIP_MEDIA_DELETE_ASYNC = False
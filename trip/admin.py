@@ -1,7 +1,12 @@
 # Configuração do admin Django
 from django.contrib import admin
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.utils.html import format_html
 
+from .cloning import clone_destinations
+from .pagination import ApproximateCountPaginator
+from .search import destination_filter
 
 from .models import(
     # Accommodation,
@@ -10,7 +15,7 @@ from .models import(
     # Checklist,
     # ChecklistItem,
     # City,
-    # Country,
+    Country,
     Destination,
     # LearningEntry,
     # LocalTransport,
@@ -26,17 +31,25 @@ from .models import(
 # admin.site.register(ChecklistItem)
 # admin.site.register(City)
 # admin.site.register(Country)
-admin.site.register(Destination)
 # admin.site.register(LearningEntry)
 # admin.site.register(LocalTransport)
 # admin.site.register(TransportOption)
-admin.site.register(Trip)
 # admin.site.register(TripCity)
 # admin.site.register(TripNote)
 
 
-# @admin.register(Trip)
-class TripAdmin(admin.ModelAdmin):
+class LargeTableAdmin(admin.ModelAdmin):
+    """
+    Changelist que continua rápido em tabelas grandes: total aproximado e
+    sem o COUNT(*) da tabela inteira ao filtrar
+    """
+    paginator = ApproximateCountPaginator
+    show_full_result_count = False
+    list_per_page = 50
+
+
+@admin.register(Trip)
+class TripAdmin(LargeTableAdmin):
     """
     Configuração do admin para Trip
     """
@@ -44,18 +57,43 @@ class TripAdmin(admin.ModelAdmin):
     list_filter = ['start_date', 'end_date', 'created_at']
     search_fields = ['name', 'description']
     prepopulated_fields = {}
-    date_hierarchy = 'start_date'
+    autocomplete_fields = ['user']
     
     def destinations_count(self, obj):
-        return obj.destinations.count()
+        return obj.destinations_total
     destinations_count.short_description = 'Destinos'
+    destinations_count.admin_order_field = 'destinations_total'
     
     def get_queryset(self, request):
-        return super().get_queryset(request).prefetch_related('destinations')
+        # Subconsulta por linha: só conta os destinos das viagens da página
+        totals = (
+            Destination.objects.filter(trip=OuterRef('pk')).order_by()
+            .values('trip').annotate(total=Count('id')).values('total')
+        )
+        return super().get_queryset(request).annotate(
+            destinations_total=Coalesce(Subquery(totals, output_field=IntegerField()), 0)
+        )
 
 
-# @admin.register(Destination)
-class DestinationAdmin(admin.ModelAdmin):
+class CountryListFilter(admin.SimpleListFilter):
+    """
+    Países da tabela Country, em vez de um DISTINCT sobre todos os destinos
+    """
+    title = 'País'
+    parameter_name = 'country'
+
+    def lookups(self, request, model_admin):
+        names = Country.objects.order_by('name').values_list('name', flat=True).distinct()
+        return [(name, name) for name in names]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(country=self.value())
+        return queryset
+
+
+@admin.register(Destination)
+class DestinationAdmin(LargeTableAdmin):
     """
     Configuração do admin para Destination
     """
@@ -64,12 +102,12 @@ class DestinationAdmin(admin.ModelAdmin):
         'departure_date', 'has_image', 'has_coordinates', 'created_at'
     ]
     list_filter = [
-        'trip', 'country', 'arrival_date', 'departure_date', 
+        CountryListFilter, 'arrival_date', 'departure_date',
         'created_at', 'updated_at'
     ]
     search_fields = ['name', 'city', 'country', 'description']
     prepopulated_fields = {'slug': ('name',)}
-    date_hierarchy = 'arrival_date'
+    autocomplete_fields = ['trip']
     
     fieldsets = (
         ('Informações Básicas', {
@@ -90,11 +128,15 @@ class DestinationAdmin(admin.ModelAdmin):
     )
     
     def has_image(self, obj):
-        if obj.image:
+        # Só a miniatura gerada pelo pipeline; nunca a imagem original
+        thumbnail = (obj.renditions or {}).get('thumbnail')
+        if thumbnail:
             return format_html(
-                '<img src="{}" width="50" height="50" style="object-fit: cover; border-radius: 5px;">',
-                obj.image.url
+                '<img src="{}" width="50" height="50" loading="lazy" style="object-fit: cover; border-radius: 5px;">',
+                obj.image.storage.url(thumbnail)
             )
+        if obj.image:
+            return "Processando"
         return "Sem imagem"
     has_image.short_description = 'Imagem'
     
@@ -110,19 +152,21 @@ class DestinationAdmin(admin.ModelAdmin):
     
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('trip')
+
+    def get_search_results(self, request, queryset, search_term):
+        # Busca pelo índice em memória (sem acentos) em vez de LIKE em 4 colunas;
+        # com resultados demais, destination_filter volta ao LIKE
+        if not search_term:
+            return queryset, False
+        return queryset.filter(destination_filter(search_term)[0]), False
     
     actions = ['duplicate_destinations']
     
     def duplicate_destinations(self, request, queryset):
         """
-        Ação para duplicar destinos selecionados
+        Ação para duplicar destinos selecionados (em lote, ver trip/cloning.py)
         """
-        for destination in queryset:
-            destination.pk = None
-            destination.name = f"Cópia de {destination.name}"
-            destination.slug = None  # Será auto-gerado
-            destination.save()
-        
-        self.message_user(request, f"{queryset.count()} destino(s) duplicado(s) com sucesso.")
+        copies = clone_destinations(queryset.order_by('pk'))
+        self.message_user(request, f"{len(copies)} destino(s) duplicado(s) com sucesso.")
     
     duplicate_destinations.short_description = "Duplicar destinos selecionados"
\ No newline at end of file
@@ -0,0 +1,282 @@
+# API JSON somente leitura (destinos, viagens, cidades e transportes)
+import math
+from datetime import date
+
+from django.core.exceptions import ValidationError
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+
+from .conditional import conditional, row_stamp, versioned
+from .models import City, Destination, Transportation, Trip
+from .pagination import InvalidCursor
+from .search import city_index, destination_index
+from .spatial import SPATIAL_INDEXES
+from .stays import stay_index
+from .serializers import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, CitySerializer, DestinationSerializer,
+    InvalidFields, StaySerializer, TransportationSerializer, TripSerializer, cursor_paginate, dumps,
+)
+
+
+def json_response(data, status=200):
+    return HttpResponse(dumps(data), content_type='application/json', status=status)
+
+
+def json_error(message, status=400):
+    return json_response({'error': message}, status=status)
+
+
+def _page_size(request):
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_PAGE_SIZE))
+    except ValueError:
+        limit = DEFAULT_PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def _list(request, serializer_class, queryset, orderings, filters=None):
+    """
+    Listagem com ?fields= (campos esparsos), ?sort= (um dos `orderings`),
+    ?cursor= e ?limit=. `filters` mapeia parâmetros da URL para lookups.
+    """
+    try:
+        serializer = serializer_class(serializer_class.parse_fields(request.GET.get('fields')))
+    except InvalidFields as e:
+        return json_error(str(e))
+
+    sort = request.GET.get('sort', orderings[0])
+    if sort not in orderings:
+        return json_error(f"Ordenação inválida. Use uma de: {', '.join(orderings)}.")
+
+    for param, lookup in (filters or {}).items():
+        value = request.GET.get(param)
+        if value:
+            try:
+                queryset = queryset.filter(**{lookup: value})
+            except (ValueError, ValidationError):
+                return json_error(f"Valor inválido para '{param}'.")
+
+    rows = serializer.values(queryset, extra=(sort.lstrip('-'), 'id'))
+    try:
+        page, next_cursor = cursor_paginate(rows, sort, request.GET.get('cursor'), _page_size(request))
+    except (InvalidCursor, ValueError):
+        return json_error('Cursor inválido.')
+
+    next_url = None
+    if next_cursor:
+        params = request.GET.copy()
+        params['cursor'] = next_cursor
+        next_url = f'{request.path}?{params.urlencode()}'
+    return json_response({
+        'results': serializer.serialize(page),
+        'next': next_url,
+    })
+
+
+def _detail(request, serializer_class, queryset, pk):
+    try:
+        serializer = serializer_class(serializer_class.parse_fields(request.GET.get('fields')))
+    except InvalidFields as e:
+        return json_error(str(e))
+    row = serializer.values(queryset.filter(pk=pk)).first()
+    if row is None:
+        return json_error('Não encontrado.', status=404)
+    return json_response(serializer.to_representation(row))
+
+
+def _user_trips(request):
+    return Trip.objects.filter(user_id=request.user.pk)
+
+
+# Carimbos para o GET condicional (ver conditional.py): detalhes pelo
+# updated_at da linha, listagens pela versão compartilhada; None deixa a
+# view responder (404, 401)
+
+def _destination_list_stamp(request):
+    return (versioned('destination'),), None
+
+
+def _destination_stamp(request, pk):
+    row = row_stamp(Destination.objects.filter(pk=pk))
+    return row and (row, row[0])
+
+
+def _trip_list_stamp(request):
+    if not request.user.is_authenticated:
+        return None
+    return (request.user.pk, versioned('trip')), None
+
+
+def _trip_stamp(request, pk):
+    if not request.user.is_authenticated:
+        return None
+    row = row_stamp(_user_trips(request).filter(pk=pk))
+    return row and ((request.user.pk, row), row[0])
+
+
+def _city_list_stamp(request):
+    return (versioned('city'),), None
+
+
+def _city_stamp(request, pk):
+    # Cidades trazem o nome e o código do país
+    row = row_stamp(City.objects.filter(pk=pk), 'country__updated_at')
+    return row and (row, max(row))
+
+
+@require_GET
+@conditional(_destination_list_stamp, last_modified=False)
+def destination_list(request):
+    return _list(
+        request, DestinationSerializer, Destination.objects.all(),
+        orderings=('id', '-id', 'name', '-name', 'created_at', '-created_at'),
+        filters={'trip': 'trip_id', 'country': 'country__iexact', 'city': 'city__iexact'},
+    )
+
+
+@require_GET
+def destination_search(request):
+    """
+    Destinos por relevância (nome, cidade, país e descrição, sem acentos)
+    """
+    results = destination_index.search(request.GET.get('q', ''), _page_size(request))
+    return json_response({'results': results})
+
+
+@require_GET
+@conditional(_destination_stamp)
+def destination_detail(request, pk):
+    return _detail(request, DestinationSerializer, Destination.objects.all(), pk)
+
+
+@require_GET
+@conditional(_trip_list_stamp, last_modified=False)
+def trip_list(request):
+    if not request.user.is_authenticated:
+        return json_error('Autenticação necessária.', status=401)
+    return _list(
+        request, TripSerializer, _user_trips(request),
+        orderings=('-created_at', 'created_at', 'id', '-id', 'name', '-name'),
+    )
+
+
+@require_GET
+@conditional(_trip_stamp)
+def trip_detail(request, pk):
+    if not request.user.is_authenticated:
+        return json_error('Autenticação necessária.', status=401)
+    return _detail(request, TripSerializer, _user_trips(request), pk)
+
+
+@require_GET
+@conditional(_city_list_stamp, last_modified=False)
+def city_list(request):
+    return _list(
+        request, CitySerializer, City.objects.all(),
+        orderings=('id', '-id', 'name', '-name'),
+        filters={'country': 'country__code__iexact', 'popular': 'is_popular'},
+    )
+
+
+@require_GET
+def city_autocomplete(request):
+    """
+    Sugestões de cidades enquanto o usuário digita; responde da memória
+    """
+    limit = min(_page_size(request), 20) if 'limit' in request.GET else 10
+    results = city_index.search(request.GET.get('q', ''), limit)
+    return json_response({'results': results})
+
+
+@require_GET
+@conditional(_city_stamp)
+def city_detail(request, pk):
+    return _detail(request, CitySerializer, City.objects.all(), pk)
+
+
+@require_GET
+def transportation_list(request):
+    return _list(
+        request, TransportationSerializer, Transportation.objects.all(),
+        orderings=('id', '-id', 'price_min', '-price_min', 'duration_hours', '-duration_hours'),
+        filters={'origin': 'origin_id', 'destination': 'destination_id', 'type': 'transport_type'},
+    )
+
+
+@require_GET
+def transportation_detail(request, pk):
+    return _detail(request, TransportationSerializer, Transportation.objects.all(), pk)
+
+
+@require_GET
+def nearby(request):
+    """
+    Destinos ou cidades perto de um ponto: os `limit` mais próximos ou,
+    com radius_km, todos dentro do raio (até `limit`)
+    """
+    try:
+        lat = float(request.GET['lat'])
+        lon = float(request.GET['lon'])
+        radius = float(request.GET['radius_km']) if request.GET.get('radius_km') else None
+    except (KeyError, ValueError):
+        return json_error('Informe lat e lon (graus decimais) e, opcionalmente, radius_km.')
+    if not (math.isfinite(lat) and math.isfinite(lon) and -90 <= lat <= 90 and -180 <= lon <= 180):
+        return json_error('Coordenadas fora do intervalo.')
+    if radius is not None and not (math.isfinite(radius) and radius > 0):
+        return json_error('radius_km deve ser positivo.')
+
+    kind = request.GET.get('type', 'destination')
+    index = SPATIAL_INDEXES.get(kind)
+    if index is None:
+        return json_error(f"Tipo inválido. Use um de: {', '.join(SPATIAL_INDEXES)}.")
+
+    limit = _page_size(request) if 'limit' in request.GET else 10
+    if radius is None:
+        matches = index.nearest(lat, lon, limit)
+    else:
+        matches = index.within(lat, lon, radius, limit)
+    return json_response({'type': kind, 'results': index.describe(matches)})
+
+
+@require_GET
+def stay_calendar(request):
+    """
+    Estadias que tocam um período (?start=&end=, datas ISO) ou um dia
+    (?date=), filtradas por ?city= e/ou ?trip=. Cada usuário vê as das
+    suas viagens; staff vê as de todos. Com ?trip=, lista também os pares
+    de destinos da viagem que se sobrepõem.
+    """
+    if not request.user.is_authenticated:
+        return json_error('Autenticação necessária.', status=401)
+    try:
+        if request.GET.get('date'):
+            start = end = date.fromisoformat(request.GET['date'])
+        else:
+            start = date.fromisoformat(request.GET['start'])
+            end = date.fromisoformat(request.GET['end'])
+        trip = int(request.GET['trip']) if request.GET.get('trip') else None
+    except (KeyError, ValueError):
+        return json_error('Informe date ou start e end (AAAA-MM-DD) e, opcionalmente, trip.')
+    if end < start:
+        return json_error('end não pode ser anterior a start.')
+    try:
+        serializer = StaySerializer(StaySerializer.parse_fields(request.GET.get('fields')))
+    except InvalidFields as e:
+        return json_error(str(e))
+
+    user = None if request.user.is_staff else request.user.pk
+    if trip is not None and user is not None and not _user_trips(request).filter(pk=trip).exists():
+        return json_error('Não encontrado.', status=404)
+
+    stays = stay_index.overlapping(start, end, trip=trip, user=user, city=request.GET.get('city'))
+    ids = [stay.id for stay in stays[:_page_size(request)]]
+    rows = {row['id']: row for row in serializer.values(Destination.objects.filter(pk__in=ids), extra=('id',))}
+    data = {
+        'start': start,
+        'end': end,
+        'count': len(stays),
+        'results': [serializer.to_representation(rows[pk]) for pk in ids if pk in rows],
+    }
+    if trip is not None:
+        data['overlaps'] = stay_index.trip_overlaps(trip)
+    return json_response(data)
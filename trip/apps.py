@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class TripConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'trip'
+
+    def ready(self):
+        # Registrar os sinais dos índices em memória
+        from . import conditional, context_processors, routing, search, spatial, stats, stays, totals  # noqa: F401
@@ -0,0 +1 @@
+# Benchmarks das views com dados sintéticos (ver o comando benchmark_views)
@@ -0,0 +1,154 @@
+# Dados sintéticos reproduzíveis para os benchmarks
+import random
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from ..models import City, Country, Destination, Transportation, Trip
+from ..signals import bulk_changed
+
+DEFAULT_SEED = 42
+BATCH_SIZE = 5000
+BENCHMARK_USER = 'benchmark'
+BENCHMARK_PASSWORD = 'benchmark'
+
+# Quantidade de linhas de cada tabela por escala
+SCALES = {
+    'small': {'destinations': 1000, 'trips': 1000, 'transportation': 1000, 'cities': 100, 'users': 50},
+    'medium': {'destinations': 100000, 'trips': 100000, 'transportation': 100000, 'cities': 2000, 'users': 2000},
+    'large': {'destinations': 1000000, 'trips': 1000000, 'transportation': 1000000, 'cities': 10000, 'users': 20000},
+}
+
+COUNTRIES = [
+    ('Brasil', 'BR', 'BRL', 'Português'), ('Portugal', 'PT', 'EUR', 'Português'),
+    ('Argentina', 'AR', 'ARS', 'Espanhol'), ('Chile', 'CL', 'CLP', 'Espanhol'),
+    ('França', 'FR', 'EUR', 'Francês'), ('Itália', 'IT', 'EUR', 'Italiano'),
+    ('Espanha', 'ES', 'EUR', 'Espanhol'), ('Japão', 'JP', 'JPY', 'Japonês'),
+    ('Estados Unidos', 'US', 'USD', 'Inglês'), ('México', 'MX', 'MXN', 'Espanhol'),
+]
+COMPANIES = ['Azul', 'Gol', 'Latam', 'Cometa', 'Itapemirim', 'CP', 'Renfe', 'Buquebus']
+
+# Datas fixas: o mesmo seed gera exatamente os mesmos dados
+EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+FIRST_DAY = date(2024, 1, 1)
+
+
+@dataclass
+class Dataset:
+    scale: str
+    seed: int
+    counts: dict
+    # Amostras usadas nas URLs dos benchmarks
+    destination_ids: list = field(default_factory=list)
+    destination_slugs: list = field(default_factory=list)
+
+    def as_dict(self):
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+
+def _batches(make, total, batch_size):
+    for start in range(0, total, batch_size):
+        yield [make(index) for index in range(start, min(start + batch_size, total))]
+
+
+def _insert(model, make, total, batch_size, progress):
+    for batch in _batches(make, total, batch_size):
+        with transaction.atomic():
+            model.objects.bulk_create(batch, batch_size=batch_size)
+        if progress:
+            progress(model._meta.verbose_name_plural, len(batch))
+
+
+def seed_dataset(scale, seed=DEFAULT_SEED, batch_size=BATCH_SIZE, progress=None, samples=50):
+    """
+    Grava o conjunto `scale` num banco vazio com bulk_create. Ids são
+    sequenciais a partir de 1, então o mesmo seed dá o mesmo banco.
+    """
+    counts = SCALES[scale]
+    rng = random.Random(seed)
+
+    for name, code, currency, language in COUNTRIES:
+        Country.objects.create(name=name, code=code, currency=currency, language=language)
+    countries = list(Country.objects.order_by('pk').values_list('pk', 'name'))
+
+    city_rows = []
+    for index in range(counts['cities']):
+        country_id, country_name = rng.choice(countries)
+        city_rows.append((f'Cidade {index}', country_id, country_name, rng.uniform(-60, 70), rng.uniform(-180, 180)))
+    _insert(City, lambda i: City(
+        name=city_rows[i][0], country_id=city_rows[i][1], is_popular=i % 10 == 0,
+        latitude=city_rows[i][3], longitude=city_rows[i][4],
+    ), counts['cities'], batch_size, progress)
+
+    password = make_password(BENCHMARK_PASSWORD)
+    _insert(User, lambda i: User(
+        username=BENCHMARK_USER if i == 0 else f'user{i}', password=password, date_joined=EPOCH,
+    ), counts['users'], batch_size, progress)
+    first_user = User.objects.get(username=BENCHMARK_USER).pk
+
+    def make_trip(index):
+        start = FIRST_DAY + timedelta(days=rng.randrange(730))
+        return Trip(
+            user_id=first_user + rng.randrange(counts['users']),
+            name=f'Viagem {index} para {rng.choice(city_rows)[0]}',
+            start_date=start,
+            end_date=start + timedelta(days=rng.randrange(1, 21)),
+            created_at=EPOCH + timedelta(minutes=index),
+        )
+    _insert(Trip, make_trip, counts['trips'], batch_size, progress)
+    first_trip = Trip.objects.order_by('pk').values_list('pk', flat=True).first()
+
+    def make_destination(index):
+        city, _country_id, country, lat, lon = rng.choice(city_rows)
+        arrival = FIRST_DAY + timedelta(days=rng.randrange(730))
+        return Destination(
+            name=f'{city} {index}',
+            slug=f'destino-{index}',
+            city=city,
+            country=country,
+            trip_id=first_trip + rng.randrange(counts['trips']) if rng.random() < 0.7 else None,
+            arrival_date=arrival,
+            departure_date=arrival + timedelta(days=rng.randrange(1, 10)),
+            latitude=Decimal(f'{lat + rng.uniform(-0.5, 0.5):.6f}'),
+            longitude=Decimal(f'{lon + rng.uniform(-0.5, 0.5):.6f}'),
+            description=f'Destino sintético número {index}.',
+            created_at=EPOCH + timedelta(seconds=index),
+        )
+    _insert(Destination, make_destination, counts['destinations'], batch_size, progress)
+
+    first_city = City.objects.order_by('pk').values_list('pk', flat=True).first()
+    types = [code for code, _label in Transportation.TRANSPORT_TYPES]
+
+    def make_leg(index):
+        origin = rng.randrange(counts['cities'])
+        destination = (origin + rng.randrange(1, counts['cities'])) % counts['cities']
+        return Transportation(
+            origin_id=first_city + origin,
+            destination_id=first_city + destination,
+            transport_type=rng.choice(types),
+            company=rng.choice(COMPANIES),
+            duration_hours=Decimal(rng.randrange(50, 4000)) / 100,
+            price_min=Decimal(rng.randrange(2000, 500000)) / 100,
+        )
+    _insert(Transportation, make_leg, counts['transportation'], batch_size, progress)
+
+    for model in (City, Destination, Transportation, Trip):
+        bulk_changed.send(sender=model)
+
+    picked = sorted(rng.sample(range(counts['destinations']), min(samples, counts['destinations'])))
+    first_destination = Destination.objects.order_by('pk').values_list('pk', flat=True).first()
+    return Dataset(
+        scale=scale,
+        seed=seed,
+        counts=dict(counts),
+        destination_ids=[first_destination + index for index in picked],
+        destination_slugs=[f'destino-{index}' for index in picked],
+    )
@@ -0,0 +1,151 @@
+# Medição das views pelo test client (latência e número de consultas)
+import math
+import platform
+import sqlite3
+import time
+from dataclasses import dataclass
+
+import django
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .datasets import BENCHMARK_USER
+
+DEFAULT_ITERATIONS = 30
+DEFAULT_WARMUP = 3
+# Regressão: p90 acima de baseline * THRESHOLD ou mais consultas que antes
+DEFAULT_THRESHOLD = 1.25
+
+
+@dataclass
+class ViewCase:
+    name: str
+    # dataset, iteração -> URL
+    url: callable
+    login: bool = False
+
+
+def _pick(values, iteration):
+    return values[iteration % len(values)]
+
+
+VIEW_CASES = [
+    ViewCase('home', lambda dataset, i: reverse('trip:home')),
+    ViewCase('dashboard', lambda dataset, i: reverse('trip:dashboard'), login=True),
+    ViewCase('destination_list', lambda dataset, i: reverse('trip:destination_list')),
+    ViewCase('destination_detail', lambda dataset, i: reverse(
+        'trip:destination_detail', kwargs={'destination_id': _pick(dataset.destination_ids, i)}
+    )),
+    ViewCase('transportation', lambda dataset, i: reverse('trip:transportation'), login=True),
+    ViewCase('city_detail', lambda dataset, i: reverse(
+        'trip:city_detail', kwargs={'city_slug': _pick(dataset.destination_slugs, i)}
+    )),
+]
+VIEW_NAMES = [case.name for case in VIEW_CASES]
+
+
+def percentile(sorted_values, fraction):
+    """
+    Percentil pelo método do posto mais próximo (valores já ordenados)
+    """
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def run_case(case, dataset, client, iterations=DEFAULT_ITERATIONS, warmup=DEFAULT_WARMUP):
+    """
+    Aquece e mede `iterations` requisições; devolve as estatísticas da view
+    """
+    statuses = set()
+    for iteration in range(warmup):
+        client.get(case.url(dataset, iteration))
+
+    timings, queries = [], []
+    for iteration in range(iterations):
+        url = case.url(dataset, iteration)
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = client.get(url)
+            elapsed = time.perf_counter() - started
+        # Conteúdo em streaming também entra no tempo
+        if response.streaming:
+            started = time.perf_counter()
+            b''.join(response.streaming_content)
+            elapsed += time.perf_counter() - started
+        timings.append(elapsed * 1000)
+        queries.append(len(captured.captured_queries))
+        statuses.add(response.status_code)
+
+    timings.sort()
+    return {
+        'p50_ms': round(percentile(timings, 0.50), 3),
+        'p90_ms': round(percentile(timings, 0.90), 3),
+        'p99_ms': round(percentile(timings, 0.99), 3),
+        'mean_ms': round(sum(timings) / len(timings), 3),
+        'max_ms': round(timings[-1], 3),
+        'queries': max(queries),
+        'status': sorted(statuses),
+    }
+
+
+def run_suite(dataset, names=None, iterations=DEFAULT_ITERATIONS, warmup=DEFAULT_WARMUP, progress=None):
+    """
+    Roda as views escolhidas (todas por padrão) e monta o documento do baseline
+    """
+    from django.contrib.auth.models import User
+
+    anonymous = Client(raise_request_exception=False)
+    logged_in = Client(raise_request_exception=False)
+    logged_in.force_login(User.objects.get(username=BENCHMARK_USER))
+
+    results = {}
+    for case in VIEW_CASES:
+        if names and case.name not in names:
+            continue
+        client = logged_in if case.login else anonymous
+        results[case.name] = run_case(case, dataset, client, iterations, warmup)
+        if progress:
+            progress(case.name, results[case.name])
+
+    return {
+        'meta': {
+            'scale': dataset.scale,
+            'seed': dataset.seed,
+            'counts': dataset.counts,
+            'iterations': iterations,
+            'warmup': warmup,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'created_at': timezone.now().isoformat(),
+        },
+        'views': results,
+    }
+
+
+def compare(current, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Regressões de `current` em relação a `baseline`: lista de mensagens
+    """
+    problems = []
+    if current['meta']['scale'] != baseline['meta']['scale']:
+        problems.append(
+            f"escala diferente do baseline ({current['meta']['scale']} x {baseline['meta']['scale']})"
+        )
+        return problems
+    for name, result in current['views'].items():
+        before = baseline['views'].get(name)
+        if before is None:
+            continue
+        if result['status'] != [200] and before['status'] == [200]:
+            problems.append(f'{name}: status {result["status"]} (antes {before["status"]})')
+        if result['queries'] > before['queries']:
+            problems.append(f'{name}: {result["queries"]} consultas (antes {before["queries"]})')
+        if result['p90_ms'] > before['p90_ms'] * threshold:
+            problems.append(f'{name}: p90 {result["p90_ms"]:.1f} ms (antes {before["p90_ms"]:.1f} ms)')
+    return problems
@@ -0,0 +1,198 @@
+# Vazão das views sob WSGI (pool de threads) e ASGI (event loop), com clientes lentos
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.test import RequestFactory
+
+from .runner import VIEW_CASES, percentile
+
+# Views com versão assíncrona (as demais passariam pelo adaptador síncrono)
+ASYNC_VIEWS = ['home', 'destination_list', 'destination_detail', 'city_detail']
+
+DEFAULT_CLIENTS = 50
+DEFAULT_REQUESTS = 10
+# Threads de um worker WSGI típico (gunicorn --threads)
+DEFAULT_THREADS = 8
+# Tempo que o cliente leva para receber a resposta (rede lenta, celular)
+DEFAULT_CLIENT_DELAY_MS = 200
+
+
+def _urls(dataset, names, total):
+    cases = [case for case in VIEW_CASES if case.name in names]
+    return [cases[i % len(cases)].url(dataset, i // len(cases)) for i in range(total)]
+
+
+def _summary(latencies, statuses, seconds, peak_threads):
+    latencies.sort()
+    return {
+        'requests': len(latencies),
+        'seconds': round(seconds, 3),
+        'throughput_rps': round(len(latencies) / seconds, 1),
+        'p50_ms': round(percentile(latencies, 0.50), 1),
+        'p90_ms': round(percentile(latencies, 0.90), 1),
+        'p99_ms': round(percentile(latencies, 0.99), 1),
+        'peak_threads': peak_threads,
+        'status': sorted(statuses),
+    }
+
+
+class _ThreadPeak:
+    def __init__(self):
+        self.peak = threading.active_count()
+
+    def sample(self):
+        self.peak = max(self.peak, threading.active_count())
+
+
+def run_wsgi(urls, clients=DEFAULT_CLIENTS, threads=DEFAULT_THREADS, client_delay=DEFAULT_CLIENT_DELAY_MS / 1000):
+    """
+    Como um servidor WSGI com `threads` threads: cada requisição ocupa uma
+    thread até o cliente terminar de receber a resposta
+    """
+    handler = WSGIHandler()
+    factory = RequestFactory()
+    latencies, statuses, peak = [], set(), _ThreadPeak()
+    lock = threading.Lock()
+
+    def serve(url):
+        environ = factory.get(url).environ
+        response_status = []
+        body = handler(environ, lambda status, headers, exc_info=None: response_status.append(status))
+        try:
+            for _chunk in body:
+                pass
+            # Enviando para o cliente lento: a thread fica presa
+            time.sleep(client_delay)
+        finally:
+            body.close()
+        return int(response_status[0].split()[0])
+
+    def client(pool, queue):
+        while True:
+            with lock:
+                if not queue:
+                    return
+                url = queue.pop()
+            started = time.perf_counter()
+            status = pool.submit(serve, url).result()
+            elapsed = (time.perf_counter() - started) * 1000
+            with lock:
+                latencies.append(elapsed)
+                statuses.add(status)
+                peak.sample()
+
+    queue = list(reversed(urls))
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        # Os clientes só esperam a resposta; quem trabalha é o pool
+        client_threads = [threading.Thread(target=client, args=(pool, queue)) for _ in range(clients)]
+        for thread in client_threads:
+            thread.start()
+        for thread in client_threads:
+            thread.join()
+    return _summary(latencies, statuses, time.perf_counter() - started, peak.peak - clients)
+
+
+def _scope(url):
+    parts = urlsplit(url)
+    return {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': parts.path,
+        'raw_path': parts.path.encode(),
+        'query_string': parts.query.encode(),
+        'root_path': '',
+        'headers': [(b'host', b'testserver')],
+        'client': ('127.0.0.1', 0),
+        'server': ('testserver', 80),
+    }
+
+
+async def _arun_asgi(urls, clients, threads, client_delay):
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=threads))
+    handler = ASGIHandler()
+    latencies, statuses, peak = [], set(), _ThreadPeak()
+    queue = list(reversed(urls))
+
+    async def serve(url):
+        requested = False
+        finished = asyncio.Event()
+        status = None
+
+        async def receive():
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await finished.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            elif message['type'] == 'http.response.body' and not message.get('more_body'):
+                # Cliente lento: só esta corrotina espera, nenhuma thread
+                await asyncio.sleep(client_delay)
+
+        try:
+            await handler(_scope(url), receive, send)
+        finally:
+            finished.set()
+        return status
+
+    async def client():
+        while queue:
+            url = queue.pop()
+            started = time.perf_counter()
+            status = await serve(url)
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses.add(status)
+            peak.sample()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(clients)))
+    return _summary(latencies, statuses, time.perf_counter() - started, peak.peak)
+
+
+def run_asgi(urls, clients=DEFAULT_CLIENTS, threads=DEFAULT_THREADS, client_delay=DEFAULT_CLIENT_DELAY_MS / 1000):
+    """
+    Como um servidor ASGI (uvicorn, daphne): um event loop atende todos os
+    clientes; threads só para o que ainda é síncrono (consultas do ORM,
+    middlewares síncronos)
+    """
+    return asyncio.run(_arun_asgi(urls, clients, threads, client_delay))
+
+
+def compare_servers(dataset, names=None, clients=DEFAULT_CLIENTS, requests=DEFAULT_REQUESTS,
+                    threads=DEFAULT_THREADS, client_delay_ms=DEFAULT_CLIENT_DELAY_MS, progress=None):
+    """
+    Mesmas URLs, mesma concorrência, nos dois caminhos
+    """
+    urls = _urls(dataset, names or ASYNC_VIEWS, clients * requests)
+    results = {}
+    for server, run in (('wsgi', run_wsgi), ('asgi', run_asgi)):
+        # Aquecimento: índices em memória, cache do menu, templates
+        run(urls[:len(ASYNC_VIEWS) * 2], clients=1, threads=threads, client_delay=0)
+        results[server] = run(urls, clients=clients, threads=threads, client_delay=client_delay_ms / 1000)
+        if progress:
+            progress(server, results[server])
+    return {
+        'meta': {
+            'scale': dataset.scale,
+            'views': names or ASYNC_VIEWS,
+            'clients': clients,
+            'requests': len(urls),
+            'threads': threads,
+            'client_delay_ms': client_delay_ms,
+        },
+        'servers': results,
+    }
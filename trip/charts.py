@@ -0,0 +1,93 @@
+# Renderização dos gráficos do dashboard fora do ciclo da requisição
+import base64
+import io
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.db.models import Count, Max
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from .models import Trip
+
+logger = logging.getLogger(__name__)
+
+CHART_TIMEOUT = getattr(settings, 'TRIP_CHART_CACHE_TIMEOUT', 60 * 60 * 24)
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'TRIP_CHART_WORKERS', 1),
+    thread_name_prefix='trip-charts',
+)
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def duration_chart_key(user_id, latest, total):
+    """
+    Chave do gráfico: muda sempre que uma viagem do usuário é criada,
+    alterada ou removida
+    """
+    stamp = latest.timestamp() if latest else 0
+    return f"trip:dashboard:duration_chart:{user_id}:{stamp}:{total}"
+
+
+def get_duration_chart(user):
+    """
+    Retorna (gráfico, pendente). Em caso de falta no cache agenda a
+    renderização em segundo plano e devolve (None, True) sem bloquear.
+    """
+    stamp = Trip.objects.filter(user=user).aggregate(latest=Max('updated_at'), total=Count('id'))
+    if stamp['total'] < 2:
+        return None, False
+
+    key = duration_chart_key(user.pk, stamp['latest'], stamp['total'])
+    chart = cache.get(key)
+    if chart is not None:
+        return chart, False
+
+    with _pending_lock:
+        if key not in _pending:
+            _pending.add(key)
+            _executor.submit(_render_job, key, user.pk)
+    return None, True
+
+
+def _render_job(key, user_id):
+    close_old_connections()
+    try:
+        cache.set(key, render_duration_chart(user_id), CHART_TIMEOUT)
+    except Exception:
+        logger.exception("Falha ao gerar o gráfico de duração do usuário %s", user_id)
+    finally:
+        with _pending_lock:
+            _pending.discard(key)
+        close_old_connections()
+
+
+def render_duration_chart(user_id):
+    """
+    Gera o gráfico de duração das viagens como data URI PNG.
+
+    Usa Figure + FigureCanvasAgg diretamente, sem o estado global do pyplot.
+    """
+    rows = Trip.objects.filter(user_id=user_id).order_by('-start_date').values_list('start_date', 'end_date')
+    durations = [
+        (end - start).days if start and end else float('nan')
+        for start, end in rows
+    ]
+
+    figure = Figure(figsize=(8, 4))
+    FigureCanvasAgg(figure)
+    axes = figure.add_subplot()
+    axes.bar(range(len(durations)), durations)
+    axes.set_title('Duração de Viagens')
+    figure.tight_layout()
+
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format='png')
+    img_str = base64.b64encode(buffer.getvalue()).decode('utf-8')
+    return f"data:image/png;base64,{img_str}"
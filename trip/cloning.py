@@ -0,0 +1,231 @@
+# Cópia em lote de destinos e itinerários
+import os
+import shutil
+import uuid
+from collections import Counter
+
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .media import delete_files
+from .models import Destination, Itinerary, ItineraryActivity, ItineraryDay
+from .signals import bulk_changed
+from .slugs import allocate_slugs
+from .stats import ITINERARY_FIELDS, apply_delta, itinerary_contribution
+
+COPY_PREFIX = 'Cópia de '
+BATCH_SIZE = 500
+
+# Campos que não passam para a cópia de um destino
+DESTINATION_SKIP = {'id', 'slug', 'image', 'renditions', 'created_at', 'updated_at'}
+
+
+def link_file(name, new_name, storage=default_storage):
+    """
+    Novo nome para o mesmo arquivo, sem copiar nem reprocessar: hardlink no
+    sistema de arquivos ou, se não der (outro disco, storage remoto), cópia
+    dos bytes. Retorna o nome gravado.
+    """
+    new_name = storage.get_available_name(new_name)
+    try:
+        source, target = storage.path(name), storage.path(new_name)
+    except NotImplementedError:
+        with storage.open(name) as content:
+            return storage.save(new_name, content)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+    return new_name
+
+
+def _fetch_pks(model, copies, field, batch_size=BATCH_SIZE, **filters):
+    """
+    Preenche o pk das cópias recém-inseridas relendo-as pelo valor único de
+    `field`. No MySQL o bulk_create não devolve os ids gerados
+    (can_return_rows_from_bulk_insert=False) e as cópias ficam com pk=None.
+    """
+    by_value = {getattr(copy, field): copy for copy in copies}
+    values = list(by_value)
+    for start in range(0, len(values), batch_size):
+        chunk = values[start:start + batch_size]
+        rows = model.objects.filter(**filters, **{f'{field}__in': chunk}).values_list(field, 'pk')
+        for value, pk in rows:
+            by_value[value].pk = pk
+
+
+def _copy_name(name):
+    folder, filename = os.path.split(name)
+    return os.path.join(folder, f'copy_{filename}')
+
+
+def _link_images(pairs, created_files):
+    """
+    Liga a imagem e as versões de cada original à sua cópia. As versões
+    ficam na pasta do id novo e da imagem nova, como se tivessem sido
+    geradas para ela.
+    """
+    from .images import RENDITIONS_DIR, upload_token
+
+    changed = []
+    for original, copy in pairs:
+        if not original.image:
+            continue
+        try:
+            copy.image = link_file(original.image.name, _copy_name(original.image.name))
+        except FileNotFoundError:
+            copy.image = None
+            copy.renditions = {}
+            changed.append(copy)
+            continue
+        created_files.append(copy.image.name)
+        renditions = {}
+        for key, path in (original.renditions or {}).items():
+            new_path = f'{RENDITIONS_DIR}/{copy.pk}/{upload_token(copy.image.name)}/{os.path.basename(path)}'
+            try:
+                renditions[key] = link_file(path, new_path)
+            except FileNotFoundError:
+                continue
+            created_files.append(renditions[key])
+        copy.renditions = renditions
+        changed.append(copy)
+    return changed
+
+
+def clone_destinations(destinations, prefix=COPY_PREFIX, trip=None, batch_size=BATCH_SIZE):
+    """
+    Copia destinos com um bulk_create numa única transação, sem passar por
+    save() (geração de slug um a um, sinais, redimensionamento da imagem).
+    As imagens das cópias apontam para os mesmos arquivos via hardlink.
+    Retorna as cópias, na ordem dos originais.
+    """
+    originals = list(destinations)
+    if not originals:
+        return []
+
+    fields = [
+        field.attname for field in Destination._meta.concrete_fields
+        if field.attname not in DESTINATION_SKIP
+    ]
+    names = [f'{prefix}{original.name}' for original in originals]
+    copies = []
+    for original, name, slug in zip(originals, names, allocate_slugs(Destination, names)):
+        copy = Destination(**{attname: getattr(original, attname) for attname in fields})
+        copy.name = name
+        copy.slug = slug
+        if trip is not None:
+            copy.trip = trip
+        copies.append(copy)
+
+    created_files = []
+    try:
+        with transaction.atomic():
+            Destination.objects.bulk_create(copies, batch_size=batch_size)
+            if not connection.features.can_return_rows_from_bulk_insert:
+                # Os slugs acabaram de ser alocados: são únicos
+                _fetch_pks(Destination, copies, 'slug', batch_size)
+            with_images = _link_images(zip(originals, copies), created_files)
+            if with_images:
+                now = timezone.now()
+                for copy in with_images:
+                    copy.updated_at = now
+                Destination.objects.bulk_update(
+                    with_images, ['image', 'renditions', 'updated_at'], batch_size=batch_size,
+                )
+    except BaseException:
+        delete_files(created_files)
+        raise
+
+    bulk_changed.send(sender=Destination)
+    return copies
+
+
+def clone_itineraries(itineraries, user=None, prefix=COPY_PREFIX, batch_size=BATCH_SIZE):
+    """
+    Copia itinerários com as cidades, as atividades programadas e os totais,
+    com um bulk_create por tabela numa única transação. As cópias começam
+    como rascunho e privadas; com `user` passam a pertencer a ele.
+    Retorna as cópias, na ordem dos originais.
+    """
+    originals = list(itineraries)
+    if not originals:
+        return []
+
+    skip = {'id', 'created_at', 'updated_at'}
+    fields = [field.attname for field in Itinerary._meta.concrete_fields if field.attname not in skip]
+    copies = []
+    for original in originals:
+        copy = Itinerary(**{attname: getattr(original, attname) for attname in fields})
+        copy.title = f'{prefix}{original.title}'[:Itinerary._meta.get_field('title').max_length]
+        copy.status = 'draft'
+        copy.is_public = False
+        if user is not None:
+            copy.user = user
+        copies.append(copy)
+
+    # Sem os ids devolvidos pelo banco, cada cópia entra com um título
+    # marcador único, é relida por ele e recebe o título certo em seguida
+    titles = None
+    if not connection.features.can_return_rows_from_bulk_insert:
+        marker = uuid.uuid4().hex
+        titles = [copy.title for copy in copies]
+        for position, copy in enumerate(copies):
+            copy.title = f'{marker}:{position}'
+
+    # Original -> cópias (o mesmo itinerário pode vir mais de uma vez)
+    copy_ids = {}
+    with transaction.atomic():
+        Itinerary.objects.bulk_create(copies, batch_size=batch_size)
+        if titles is not None:
+            # O filtro pelo dono usa o índice de user_id (title não tem índice)
+            owners = {copy.user_id for copy in copies}
+            _fetch_pks(Itinerary, copies, 'title', batch_size, user_id__in=owners)
+            for copy, title in zip(copies, titles):
+                copy.title = title
+            Itinerary.objects.bulk_update(copies, ['title'], batch_size=batch_size)
+        for original, copy in zip(originals, copies):
+            copy_ids.setdefault(original.pk, []).append(copy.pk)
+        source_ids = list(copy_ids)
+
+        CityLink = Itinerary.cities.through
+        CityLink.objects.bulk_create([
+            CityLink(itinerary_id=copy_id, city_id=city_id)
+            for itinerary_id, city_id in (
+                CityLink.objects.filter(itinerary_id__in=source_ids)
+                .values_list('itinerary_id', 'city_id').iterator(chunk_size=2000)
+            )
+            for copy_id in copy_ids[itinerary_id]
+        ], batch_size=batch_size)
+
+        # Os totais foram copiados junto com o itinerário: basta copiar os dias
+        entry_fields = ('itinerary_id', 'activity_id', 'day_number', 'start_time', 'end_time', 'notes', 'order')
+        ItineraryActivity.objects.bulk_create([
+            ItineraryActivity(**dict(row, itinerary_id=copy_id))
+            for row in (
+                ItineraryActivity.objects.filter(itinerary_id__in=source_ids).order_by()
+                .values(*entry_fields).iterator(chunk_size=2000)
+            )
+            for copy_id in copy_ids[row['itinerary_id']]
+        ], batch_size=batch_size)
+        day_fields = ('itinerary_id', 'day_number', 'activity_count', 'cost', 'hours')
+        ItineraryDay.objects.bulk_create([
+            ItineraryDay(**dict(row, itinerary_id=copy_id))
+            for row in (
+                ItineraryDay.objects.filter(itinerary_id__in=source_ids).order_by()
+                .values(*day_fields).iterator(chunk_size=2000)
+            )
+            for copy_id in copy_ids[row['itinerary_id']]
+        ], batch_size=batch_size)
+
+        # bulk_create não dispara os sinais das estatísticas por usuário
+        deltas = {}
+        for copy in copies:
+            values = {name: getattr(copy, name) for name in ITINERARY_FIELDS}
+            deltas.setdefault(copy.user_id, Counter()).update(itinerary_contribution(values))
+        for user_id, delta in deltas.items():
+            apply_delta(user_id, dict(delta))
+
+    bulk_changed.send(sender=Itinerary)
+    return copies
@@ -0,0 +1,132 @@
+# GET condicional (ETag / Last-Modified) a partir de updated_at e de versões
+import datetime
+import hashlib
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from .models import City, Country, Destination, Transportation, Trip
+from .signals import bulk_changed
+from .versions import aget_version, bump_version, get_version
+
+
+def make_etag(*parts):
+    """
+    ETag forte com o hash das partes (datas, contagens, versões, parâmetros)
+    """
+    return '"%s"' % hashlib.md5(repr(parts).encode(), usedforsecurity=False).hexdigest()
+
+
+def _timestamp(value):
+    if value is None:
+        return None
+    if not timezone.is_aware(value):
+        value = timezone.make_aware(value, datetime.timezone.utc)
+    return int(value.timestamp())
+
+
+def conditional(stamp_func, last_modified=True):
+    """
+    Responde 304 antes de chamar a view quando o cliente já tem a versão atual.
+
+    stamp_func(request, *args, **kwargs) devolve (partes do ETag, data da
+    última alteração), ou None para deixar a view responder (404, 401...).
+    Detalhes leem o updated_at da linha pela chave primária; listagens usam
+    versioned(), sem consulta. Em views assíncronas ela também é assíncrona.
+    O caminho com a query string entra no ETag (?fields= muda a resposta).
+    last_modified=False quando a página depende de mais do que essas linhas
+    (menu, usuário, remoções): aí só o ETag é confiável.
+    """
+    def _check(request, stamp):
+        if stamp is None:
+            return None, None, None
+        parts, modified = stamp
+        etag = make_etag(request.get_full_path(), *parts)
+        modified = _timestamp(modified) if last_modified else None
+        return get_conditional_response(request, etag=etag, last_modified=modified), etag, modified
+
+    def _finish(request, response, etag, modified):
+        if response.status_code == 200:
+            if etag:
+                response.headers.setdefault('ETag', etag)
+            if modified:
+                response.headers.setdefault('Last-Modified', http_date(modified))
+        return response
+
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def inner(request, *args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return await view(request, *args, **kwargs)
+                stamp = await stamp_func(request, *args, **kwargs)
+                response, etag, modified = _check(request, stamp)
+                if response is None:
+                    response = await view(request, *args, **kwargs)
+                return _finish(request, response, etag, modified)
+        else:
+            @wraps(view)
+            def inner(request, *args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return view(request, *args, **kwargs)
+                response, etag, modified = _check(request, stamp_func(request, *args, **kwargs))
+                if response is None:
+                    response = view(request, *args, **kwargs)
+                return _finish(request, response, etag, modified)
+        return inner
+    return decorator
+
+
+def row_stamp(queryset, *fields):
+    """
+    (updated_at, campos extras) da única linha do queryset, ou None
+    """
+    return queryset.values_list('updated_at', *fields).first()
+
+
+async def arow_stamp(queryset, *fields):
+    return await queryset.values_list('updated_at', *fields).afirst()
+
+
+def versioned(name):
+    """
+    Parte do ETag de uma listagem: a versão compartilhada dos dados, que
+    muda a cada gravação (ver LIST_VERSIONS). Não consulta o banco; um
+    COUNT/MAX por requisição varreria a tabela inteira no InnoDB.
+    """
+    return name, get_version(name)
+
+
+async def aversioned(name):
+    return name, await aget_version(name)
+
+
+# Modelo -> versão das listagens que dependem dele
+LIST_VERSIONS = {
+    Destination: 'destination',
+    Trip: 'trip',
+    City: 'city',
+    # Cidades trazem o nome e o código do país
+    Country: 'city',
+    Transportation: 'transportation',
+}
+
+
+@receiver([post_save, post_delete, bulk_changed], sender=Destination)
+@receiver([post_save, post_delete, bulk_changed], sender=Trip)
+@receiver([post_save, post_delete, bulk_changed], sender=City)
+@receiver([post_save, post_delete, bulk_changed], sender=Country)
+@receiver([post_save, post_delete, bulk_changed], sender=Transportation)
+def bump_list_version(sender, **kwargs):
+    """
+    Invalida os ETags das listagens quando um registro muda
+    """
+    # Depois do commit: um rollback não muda a versão, e quem ler a versão
+    # nova já encontra os dados gravados
+    transaction.on_commit(lambda: bump_version(LIST_VERSIONS[sender]))
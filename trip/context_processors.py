@@ -1,11 +1,103 @@
 # trip/context_processors.py
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils.functional import SimpleLazyObject
+
 from .models import Destination
+from .signals import bulk_changed
+from .versions import aget_version, bump_version, get_version
+
+# Versão compartilhada do menu (trip/versions.py); muda a cada alteração em Destination
+MENU_VERSION = 'destinations_menu'
+MENU_TIMEOUT = 60 * 60 * 24
+MENU_FIELDS = ('name', 'slug', 'city', 'country')
+
+
+def _menu_rows():
+    return Destination.objects.order_by('country', 'name').values(*MENU_FIELDS)
+
+
+def _add_to_menu(menu, row):
+    if not menu or menu[-1]['grouper'] != row['country']:
+        menu.append({'grouper': row['country'], 'list': []})
+    menu[-1]['list'].append(row)
+
+
+def load_destinations_menu():
+    """
+    Destinos agrupados por país, só com os campos usados no menu
+    """
+    key = f'trip:destinations_menu:{get_version(MENU_VERSION)}'
+    menu = cache.get(key)
+    if menu is None:
+        menu = []
+        for row in _menu_rows().iterator(chunk_size=2000):
+            _add_to_menu(menu, row)
+        cache.set(key, menu, MENU_TIMEOUT)
+    return menu
+
+
+async def aload_destinations_menu():
+    """
+    Versão assíncrona de load_destinations_menu (cache e ORM assíncronos)
+    """
+    key = f'trip:destinations_menu:{await aget_version(MENU_VERSION)}'
+    menu = await cache.aget(key)
+    if menu is None:
+        menu = []
+        async for row in _menu_rows().aiterator(chunk_size=2000):
+            _add_to_menu(menu, row)
+        await cache.aset(key, menu, MENU_TIMEOUT)
+    return menu
+
+
+def _menu_for_request(request):
+    # No máximo uma carga por requisição, mesmo com vários render()
+    menu = getattr(request, '_destinations_menu', None)
+    if menu is None:
+        menu = load_destinations_menu()
+        request._destinations_menu = menu
+    return menu
+
 
 def destinations_menu(request):
     """
-    Context processor para disponibilizar destinos no menu
+    Context processor para disponibilizar destinos no menu.
+
+    Os valores são preguiçosos: páginas que não usam o menu não consultam
+    nem o cache nem o banco.
     """
-    destinations = Destination.objects.all().order_by('country', 'name')
     return {
-        'destinations': destinations
+        'destinations': SimpleLazyObject(
+            lambda: [row for group in _menu_for_request(request) for row in group['list']]
+        ),
+        'destinations_by_country': SimpleLazyObject(lambda: _menu_for_request(request)),
     }
+
+
+async def aprepare_context(request):
+    """
+    Carrega antes do render, pelo caminho assíncrono, o que os context
+    processors buscariam no banco ou no cache durante o template: usuário
+    (e sessão) e o menu de destinos. Views assíncronas chamam isto antes de
+    render(); o template então roda sem nenhuma consulta síncrona.
+    """
+    user = await request.auser()
+    # O auth context processor lê request.user (preguiçoso e síncrono)
+    request.user = user
+    if getattr(request, '_destinations_menu', None) is None:
+        request._destinations_menu = await aload_destinations_menu()
+
+
+@receiver(post_save, sender=Destination)
+@receiver(post_delete, sender=Destination)
+@receiver(bulk_changed, sender=Destination)
+def invalidate_destinations_menu(sender, **kwargs):
+    """
+    Invalida o menu de destinos quando um destino muda
+    """
+    # Depois do commit: antes dele uma requisição poderia guardar o menu
+    # antigo sob a versão nova
+    transaction.on_commit(lambda: bump_version(MENU_VERSION))
@@ -1 +1,423 @@
-# Importação de dados CSV com Pandas
\ No newline at end of file
+# Importação de dados CSV em lote (streaming, retomável por offset)
+import csv
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import City, Country, Destination, Transportation, Trip
+from ..signals import bulk_changed
+from ..slugs import allocate_slugs
+
+DEFAULT_BATCH_SIZE = 1000
+MAX_ERRORS_KEPT = 50
+
+
+class RowError(ValueError):
+    """
+    Linha inválida; é contada e pulada, sem interromper a importação
+    """
+
+
+@dataclass
+class ImportResult:
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    skipped: int = 0
+    offset: int = 0
+    total_bytes: int = 0
+    errors: list = field(default_factory=list)
+
+    @property
+    def percent(self):
+        if not self.total_bytes:
+            return 100.0
+        return 100.0 * self.offset / self.total_bytes
+
+
+class _OffsetLines:
+    """
+    Entrega linhas de texto ao csv.reader e guarda o offset (em bytes) do
+    fim da última linha lida, que é o ponto de retomada após cada lote
+    """
+
+    def __init__(self, raw, encoding):
+        self.raw = raw
+        self.encoding = encoding
+        self.offset = raw.tell()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        line = self.raw.readline()
+        if not line:
+            raise StopIteration
+        self.offset += len(line)
+        return line.decode(self.encoding)
+
+
+# Conversões de valores do CSV
+
+def text(value):
+    return (value or '').strip()
+
+
+def required(value, column):
+    value = text(value)
+    if not value:
+        raise RowError(f"coluna '{column}' obrigatória")
+    return value
+
+
+def decimal_or_none(value):
+    value = text(value)
+    if not value:
+        return None
+    if ',' in value and '.' not in value:
+        value = value.replace(',', '.')
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        raise RowError(f"número inválido: {value!r}")
+
+
+def float_or_none(value):
+    number = decimal_or_none(value)
+    return None if number is None else float(number)
+
+
+def date_or_none(value):
+    value = text(value)
+    if not value:
+        return None
+    for fmt in ('%Y-%m-%d', '%d/%m/%Y'):
+        try:
+            return datetime.strptime(value, fmt).date()
+        except ValueError:
+            continue
+    raise RowError(f"data inválida: {value!r}")
+
+
+def boolean(value):
+    return text(value).lower() in ('1', 'true', 'sim', 's', 'yes', 'y', 'x')
+
+
+class BaseImporter:
+    """
+    Lê o CSV em lotes com memória constante e grava cada lote com
+    bulk_create/bulk_update dentro de uma transação.
+
+    Subclasses definem o modelo, as colunas da chave natural usada no
+    upsert (key_fields), os campos atualizados e build() para cada linha.
+    """
+    model = None
+    key_fields = ()
+    update_fields = ()
+
+    def __init__(self, path, batch_size=DEFAULT_BATCH_SIZE, update=True,
+                 progress=None, encoding='utf-8', delimiter=','):
+        self.path = path
+        self.batch_size = batch_size
+        self.update = update
+        self.progress = progress
+        self.encoding = encoding
+        self.delimiter = delimiter
+
+    def prepare(self):
+        """
+        Carrega os mapas de chaves estrangeiras antes da leitura
+        """
+
+    def build(self, row):
+        raise NotImplementedError
+
+    def key(self, obj):
+        return tuple(getattr(obj, name) for name in self.key_fields)
+
+    def existing(self, objs):
+        """
+        pk dos registros já existentes, por chave natural (uma consulta por lote)
+        """
+        if not self.key_fields:
+            return {}
+        lookup = {
+            f'{name}__in': {getattr(obj, name) for obj in objs}
+            for name in self.key_fields
+        }
+        rows = self.model.objects.filter(**lookup).values_list('pk', *self.key_fields)
+        return {tuple(row[1:]): row[0] for row in rows}
+
+    def before_create(self, objs):
+        """
+        Ajustes nos registros novos antes do bulk_create
+        """
+
+    def invalid(self, objs):
+        """
+        {posição no lote: erro} das referências que não existem no banco,
+        verificadas uma vez por lote
+        """
+        return {}
+
+    def run(self, start_offset=0):
+        result = ImportResult(total_bytes=os.path.getsize(self.path))
+        self.prepare()
+        with open(self.path, 'rb') as raw:
+            header_line = raw.readline().decode('utf-8-sig' if self.encoding == 'utf-8' else self.encoding)
+            header = [name.strip() for name in next(csv.reader([header_line], delimiter=self.delimiter))]
+            if start_offset > raw.tell():
+                raw.seek(start_offset)
+            lines = _OffsetLines(raw, self.encoding)
+            reader = csv.DictReader(lines, fieldnames=header, delimiter=self.delimiter)
+
+            batch, offsets = [], []
+            for row in reader:
+                result.rows += 1
+                try:
+                    obj = self.build(row)
+                except RowError as e:
+                    self._skip(result, lines.offset, e)
+                    continue
+                if obj is None:
+                    result.skipped += 1
+                    continue
+                batch.append(obj)
+                offsets.append(lines.offset)
+                if len(batch) >= self.batch_size:
+                    self._flush(batch, offsets, result, lines.offset)
+                    batch, offsets = [], []
+            self._flush(batch, offsets, result, lines.offset)
+
+        bulk_changed.send(sender=self.model)
+        return result
+
+    @staticmethod
+    def _skip(result, offset, error):
+        result.skipped += 1
+        if len(result.errors) < MAX_ERRORS_KEPT:
+            result.errors.append(f"offset {offset}: {error}")
+
+    def _flush(self, batch, offsets, result, offset):
+        errors = self.invalid(batch) if batch else {}
+        if errors:
+            for index in sorted(errors):
+                self._skip(result, offsets[index], errors[index])
+            batch = [obj for index, obj in enumerate(batch) if index not in errors]
+        if batch:
+            # A última ocorrência de uma chave dentro do lote prevalece
+            if self.key_fields:
+                batch = list({self.key(obj): obj for obj in batch}.values())
+            with transaction.atomic():
+                existing = self.existing(batch)
+                to_create, to_update = [], []
+                for obj in batch:
+                    pk = existing.get(self.key(obj))
+                    if pk is None:
+                        to_create.append(obj)
+                    elif self.update:
+                        obj.pk = pk
+                        to_update.append(obj)
+                if to_create:
+                    self.before_create(to_create)
+                    self.model.objects.bulk_create(to_create, batch_size=self.batch_size)
+                if to_update and self.update_fields:
+                    # bulk_update não passa pelo pre_save: carimbar o auto_now
+                    # (updated_at, que alimenta os ETags) aqui
+                    stamped = [
+                        field.attname for field in self.model._meta.concrete_fields
+                        if getattr(field, 'auto_now', False)
+                    ]
+                    now = timezone.now()
+                    for obj in to_update:
+                        for name in stamped:
+                            setattr(obj, name, now)
+                    self.model.objects.bulk_update(
+                        to_update, [*self.update_fields, *stamped], batch_size=self.batch_size,
+                    )
+            result.created += len(to_create)
+            result.updated += len(to_update)
+            result.skipped += len(batch) - len(to_create) - len(to_update)
+        result.offset = offset
+        if self.progress:
+            self.progress(result)
+
+
+class CountryImporter(BaseImporter):
+    """
+    Colunas: name, code, currency, language
+    """
+    model = Country
+    key_fields = ('code',)
+    update_fields = ('name', 'currency', 'language')
+
+    def build(self, row):
+        return Country(
+            name=required(row.get('name'), 'name'),
+            code=required(row.get('code'), 'code').upper()[:2],
+            currency=text(row.get('currency')).upper()[:3],
+            language=text(row.get('language'))[:50],
+        )
+
+
+class CityImporter(BaseImporter):
+    """
+    Colunas: name, country (nome ou código), description, is_popular,
+    latitude, longitude
+    """
+    model = City
+    key_fields = ('name', 'country_id')
+    update_fields = ('description', 'is_popular', 'latitude', 'longitude')
+
+    def prepare(self):
+        self.countries = {}
+        for pk, name, code in Country.objects.values_list('pk', 'name', 'code').iterator():
+            self.countries[name.lower()] = pk
+            if code:
+                self.countries.setdefault(code.lower(), pk)
+
+    def build(self, row):
+        country = required(row.get('country'), 'country')
+        country_id = self.countries.get(country.lower())
+        if country_id is None:
+            raise RowError(f"país desconhecido: {country!r}")
+        return City(
+            name=required(row.get('name'), 'name'),
+            country_id=country_id,
+            description=text(row.get('description')),
+            is_popular=boolean(row.get('is_popular')),
+            latitude=float_or_none(row.get('latitude')),
+            longitude=float_or_none(row.get('longitude')),
+        )
+
+
+class DestinationImporter(BaseImporter):
+    """
+    Colunas: name, city, country, slug, trip (id), arrival_date,
+    departure_date, latitude, longitude, description.
+    Linhas com slug fazem upsert por slug; sem slug, o destino é criado e
+    recebe um slug único alocado em lote.
+    """
+    model = Destination
+    key_fields = ('slug',)
+    update_fields = (
+        'name', 'city', 'country', 'trip_id', 'arrival_date', 'departure_date',
+        'latitude', 'longitude', 'description',
+    )
+
+    def build(self, row):
+        trip_id = text(row.get('trip'))
+        if trip_id and not trip_id.isdigit():
+            raise RowError(f"viagem inválida: {trip_id!r}")
+        return Destination(
+            name=required(row.get('name'), 'name'),
+            slug=text(row.get('slug')),
+            city=text(row.get('city'))[:100],
+            country=text(row.get('country'))[:100],
+            trip_id=int(trip_id) if trip_id.isdigit() else None,
+            arrival_date=date_or_none(row.get('arrival_date')),
+            departure_date=date_or_none(row.get('departure_date')),
+            latitude=decimal_or_none(row.get('latitude')),
+            longitude=decimal_or_none(row.get('longitude')),
+            description=text(row.get('description')),
+        )
+
+    def key(self, obj):
+        # Sem slug cada linha é um destino novo
+        return (obj.slug,) if obj.slug else (id(obj),)
+
+    def existing(self, objs):
+        slugs = [obj.slug for obj in objs if obj.slug]
+        if not slugs:
+            return {}
+        return {(slug,): pk for pk, slug in Destination.objects.filter(slug__in=slugs).values_list('pk', 'slug')}
+
+    def invalid(self, objs):
+        trip_ids = {obj.trip_id for obj in objs if obj.trip_id is not None}
+        if not trip_ids:
+            return {}
+        existing = set(Trip.objects.filter(pk__in=trip_ids).values_list('pk', flat=True))
+        return {
+            index: f"viagem desconhecida: {obj.trip_id}"
+            for index, obj in enumerate(objs)
+            if obj.trip_id is not None and obj.trip_id not in existing
+        }
+
+    def before_create(self, objs):
+        pending = [obj for obj in objs if not obj.slug]
+        reserved = {obj.slug for obj in objs if obj.slug}
+        for obj, slug in zip(pending, allocate_slugs(Destination, [obj.name for obj in pending], reserved=reserved)):
+            obj.slug = slug
+
+
+class TransportationImporter(BaseImporter):
+    """
+    Colunas: origin, destination (nomes de cidade), origin_country e
+    destination_country (opcionais, para nomes repetidos), transport_type
+    (código ou rótulo), company, duration_hours, price_min, notes, booking_url
+    """
+    model = Transportation
+    key_fields = ('origin_id', 'destination_id', 'transport_type', 'company')
+    update_fields = ('duration_hours', 'price_min', 'notes', 'booking_url')
+
+    AMBIGUOUS = object()
+
+    def prepare(self):
+        countries = {}
+        for pk, name, code in Country.objects.values_list('pk', 'name', 'code').iterator():
+            countries[pk] = {name.lower(), (code or '').lower()}
+        self.cities = {}
+        self.cities_by_country = {}
+        for pk, name, country_id in City.objects.values_list('pk', 'name', 'country_id').iterator(chunk_size=10000):
+            name = name.lower()
+            self.cities[name] = self.AMBIGUOUS if name in self.cities else pk
+            for country in countries.get(country_id, ()):
+                self.cities_by_country[(name, country)] = pk
+        self.transport_types = {}
+        for code, label in Transportation.TRANSPORT_TYPES:
+            self.transport_types[code.lower()] = code
+            self.transport_types[label.lower()] = code
+
+    def city_id(self, row, column):
+        name = required(row.get(column), column).lower()
+        country = text(row.get(f'{column}_country')).lower()
+        if country:
+            pk = self.cities_by_country.get((name, country))
+        else:
+            pk = self.cities.get(name)
+        if pk is self.AMBIGUOUS:
+            raise RowError(f"cidade {name!r} existe em mais de um país; informe {column}_country")
+        if pk is None:
+            raise RowError(f"cidade desconhecida: {name!r}")
+        return pk
+
+    def build(self, row):
+        transport_type = self.transport_types.get(text(row.get('transport_type')).lower())
+        if transport_type is None:
+            raise RowError(f"tipo de transporte inválido: {row.get('transport_type')!r}")
+        duration = decimal_or_none(row.get('duration_hours'))
+        price = decimal_or_none(row.get('price_min'))
+        if duration is None or price is None:
+            raise RowError("duration_hours e price_min são obrigatórios")
+        return Transportation(
+            origin_id=self.city_id(row, 'origin'),
+            destination_id=self.city_id(row, 'destination'),
+            transport_type=transport_type,
+            company=text(row.get('company'))[:100],
+            duration_hours=duration,
+            price_min=price,
+            notes=text(row.get('notes')),
+            booking_url=text(row.get('booking_url')),
+        )
+
+
+IMPORTERS = {
+    'countries': CountryImporter,
+    'cities': CityImporter,
+    'destinations': DestinationImporter,
+    'transportation': TransportationImporter,
+}
@@ -1 +1,375 @@
-# Scraper para preços atuais
\ No newline at end of file
+# Atualização concorrente de preços de transporte
+import asyncio
+import json
+import socket
+import ssl
+import time
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from urllib.parse import quote, urlsplit
+
+from django.conf import settings
+
+from ..models import Transportation
+from ..signals import bulk_changed
+
+DEFAULT_BATCH_SIZE = getattr(settings, 'TRIP_PRICE_BATCH_SIZE', 500)
+DEFAULT_CONCURRENCY = getattr(settings, 'TRIP_PRICE_CONCURRENCY', 100)
+DEFAULT_PER_HOST = getattr(settings, 'TRIP_PRICE_PER_HOST', 8)
+DEFAULT_RATE = getattr(settings, 'TRIP_PRICE_RATE', 20.0)
+DEFAULT_TIMEOUT = getattr(settings, 'TRIP_PRICE_TIMEOUT', 10.0)
+MAX_ERRORS_KEPT = 50
+
+# Maior valor aceito por Transportation.price_min (max_digits=8, decimal_places=2)
+MAX_PRICE = Decimal('999999.99')
+CENTS = Decimal('0.01')
+
+ROUTE_FIELDS = (
+    'id', 'price_min', 'booking_url', 'transport_type', 'company',
+    'origin_id', 'origin__name', 'destination_id', 'destination__name',
+)
+
+
+class FetchError(Exception):
+    """
+    Falha ao obter o preço de uma rota; a rota é contada e pulada
+    """
+
+
+@dataclass
+class RefreshResult:
+    checked: int = 0
+    changed: int = 0
+    unchanged: int = 0
+    failed: int = 0
+    requests: int = 0
+    errors: list = field(default_factory=list)
+
+
+class RateLimiter:
+    """
+    Token bucket: no máximo `rate` requisições por segundo, com rajadas
+    de até `burst`
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self):
+        if not self.rate:
+            return
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class Response:
+    def __init__(self, status, headers, body):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class HostPool:
+    """
+    Conexões keep-alive reaproveitadas para um host, limitadas a `size`
+    abertas ao mesmo tempo
+    """
+
+    def __init__(self, scheme, host, port, size, rate):
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.slots = asyncio.Semaphore(size)
+        self.idle = []
+        self.limiter = RateLimiter(rate)
+
+    async def _connect(self):
+        context = ssl.create_default_context() if self.scheme == 'https' else None
+        reader, writer = await asyncio.open_connection(self.host, self.port, ssl=context)
+        sock = writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return reader, writer
+
+    async def request(self, path, headers, timeout):
+        async with self.slots:
+            await self.limiter.acquire()
+            conn = self.idle.pop() if self.idle else None
+            if conn is not None and conn[0].at_eof():
+                self._close(conn)
+                conn = None
+            try:
+                if conn is None:
+                    conn = await asyncio.wait_for(self._connect(), timeout)
+                response, reusable = await asyncio.wait_for(self._exchange(conn, path, headers), timeout)
+            except BaseException:
+                if conn is not None:
+                    self._close(conn)
+                raise
+            if reusable:
+                self.idle.append(conn)
+            else:
+                self._close(conn)
+            return response
+
+    async def _exchange(self, conn, path, headers):
+        reader, writer = conn
+        host = self.host if self.port in (80, 443) else f'{self.host}:{self.port}'
+        lines = [f'GET {path} HTTP/1.1', f'Host: {host}', 'Connection: keep-alive']
+        lines += [f'{name}: {value}' for name, value in headers.items()]
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError('conexão encerrada pelo servidor')
+        parts = status_line.decode('latin-1').split(None, 2)
+        if len(parts) < 2 or not parts[1].isdigit():
+            raise FetchError(f'resposta HTTP inválida: {status_line!r}')
+        status = int(parts[1])
+
+        response_headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            response_headers[name.strip().lower()] = value.strip()
+
+        reusable = response_headers.get('connection', '').lower() != 'close'
+        if response_headers.get('transfer-encoding', '').lower() == 'chunked':
+            body = bytearray()
+            while True:
+                size = _chunk_size(await reader.readline())
+                if size == 0:
+                    # Trailers opcionais até a linha vazia
+                    while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                        pass
+                    break
+                body += await reader.readexactly(size)
+                await reader.readexactly(2)
+            body = bytes(body)
+        elif 'content-length' in response_headers:
+            length = response_headers['content-length']
+            if not length.isdigit():
+                raise FetchError(f'Content-Length inválido: {length!r}')
+            body = await reader.readexactly(int(length))
+        else:
+            body = await reader.read()
+            reusable = False
+        return Response(status, response_headers, body), reusable
+
+    def _close(self, conn):
+        conn[1].close()
+
+    def close(self):
+        while self.idle:
+            self._close(self.idle.pop())
+
+
+def _chunk_size(line):
+    try:
+        return int(line.split(b';', 1)[0], 16)
+    except ValueError:
+        raise FetchError(f'tamanho de chunk inválido: {line!r}')
+
+
+class HttpClient:
+    """
+    Cliente HTTP/1.1 mínimo sobre asyncio, com um pool de conexões e um
+    limite de taxa por host
+    """
+
+    def __init__(self, per_host=DEFAULT_PER_HOST, rate=DEFAULT_RATE, timeout=DEFAULT_TIMEOUT, headers=None):
+        self.per_host = per_host
+        self.rate = rate
+        self.timeout = timeout
+        self.headers = {'Accept': 'application/json', 'User-Agent': 'travel-planner-prices/1.0'}
+        self.headers.update(headers or {})
+        self.pools = {}
+        self.requests = 0
+
+    def _pool(self, scheme, host, port):
+        key = (scheme, host, port)
+        pool = self.pools.get(key)
+        if pool is None:
+            pool = self.pools[key] = HostPool(scheme, host, port, self.per_host, self.rate)
+        return pool
+
+    async def get(self, url):
+        parts = urlsplit(url)
+        if parts.scheme not in ('http', 'https') or not parts.hostname:
+            raise FetchError(f'URL inválida: {url!r}')
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        self.requests += 1
+        return await self._pool(parts.scheme, parts.hostname, port).request(path, self.headers, self.timeout)
+
+    def close(self):
+        for pool in self.pools.values():
+            pool.close()
+        self.pools.clear()
+
+
+class PriceFetcher:
+    """
+    Interface dos fornecedores de preço. fetch() recebe o cliente HTTP e a
+    rota (dicionário com ROUTE_FIELDS) e devolve o novo preço ou None se a
+    fonte não informar preço para a rota.
+    """
+
+    async def fetch(self, client, route):
+        raise NotImplementedError
+
+
+class JsonPriceFetcher(PriceFetcher):
+    """
+    Busca um JSON por rota e lê o preço em `price_field` (aceita caminho
+    com pontos, ex.: "data.price"). Sem `url_template`, usa o booking_url
+    da rota. O template recebe os campos da rota, ex.:
+    "https://api.exemplo.com/prices?from={origin__name}&to={destination__name}"
+    """
+
+    def __init__(self, url_template=None, price_field='price'):
+        self.url_template = url_template
+        self.price_field = price_field
+
+    def url_for(self, route):
+        if self.url_template:
+            # Valores codificados: "São Paulo" -> "S%C3%A3o%20Paulo"
+            return self.url_template.format(**{name: quote(str(value), safe='') for name, value in route.items()})
+        return route['booking_url']
+
+    async def fetch(self, client, route):
+        url = self.url_for(route)
+        if not url:
+            return None
+        response = await client.get(url)
+        if response.status == 404:
+            return None
+        if response.status != 200:
+            raise FetchError(f'HTTP {response.status} em {url}')
+        try:
+            value = response.json()
+            for name in self.price_field.split('.'):
+                value = value[name]
+        except (ValueError, KeyError, TypeError):
+            raise FetchError(f'resposta sem "{self.price_field}" em {url}')
+        return value
+
+
+def parse_price(value):
+    if value is None:
+        return None
+    try:
+        price = Decimal(str(value))
+        # NaN e infinito não se comparam nem se arredondam
+        if not price.is_finite():
+            raise InvalidOperation
+        price = price.quantize(CENTS)
+    except (InvalidOperation, ValueError):
+        raise FetchError(f'preço inválido: {value!r}')
+    if not 0 <= price <= MAX_PRICE:
+        raise FetchError(f'preço fora do intervalo: {price}')
+    return price
+
+
+class PriceRefresher:
+    """
+    Atualiza Transportation.price_min em lotes.
+
+    As rotas são lidas por chave (id) em lotes de `batch_size`; os preços
+    de cada lote são buscados concorrentemente em um único event loop, que
+    mantém os pools de conexão entre lotes. Só as rotas cujo preço mudou
+    são gravadas, com um bulk_update por lote. Todo acesso ao banco fica
+    na thread que chamou run(), usando uma única conexão.
+    """
+
+    def __init__(self, fetcher, batch_size=DEFAULT_BATCH_SIZE, concurrency=DEFAULT_CONCURRENCY,
+                 per_host=DEFAULT_PER_HOST, rate=DEFAULT_RATE, timeout=DEFAULT_TIMEOUT,
+                 dry_run=False, progress=None):
+        self.fetcher = fetcher
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.rate = rate
+        self.timeout = timeout
+        self.dry_run = dry_run
+        self.progress = progress
+
+    def batches(self, queryset):
+        rows = queryset.order_by('pk').values(*ROUTE_FIELDS)
+        last = 0
+        while True:
+            batch = list(rows.filter(pk__gt=last)[:self.batch_size])
+            if not batch:
+                return
+            yield batch
+            last = batch[-1]['id']
+
+    def run(self, queryset=None):
+        if queryset is None:
+            queryset = Transportation.objects.all()
+        result = RefreshResult()
+        loop = asyncio.new_event_loop()
+        client = HttpClient(per_host=self.per_host, rate=self.rate, timeout=self.timeout)
+        try:
+            for batch in self.batches(queryset):
+                prices = loop.run_until_complete(self._fetch_batch(client, batch, result))
+                self._write(batch, prices, result)
+                if self.progress:
+                    self.progress(result)
+        finally:
+            client.close()
+            # Dá ao loop a chance de fechar os transportes antes de encerrar
+            loop.run_until_complete(asyncio.sleep(0))
+            loop.close()
+            result.requests = client.requests
+        if result.changed and not self.dry_run:
+            bulk_changed.send(sender=Transportation)
+        return result
+
+    async def _fetch_batch(self, client, batch, result):
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def fetch(route):
+            async with semaphore:
+                try:
+                    return parse_price(await self.fetcher.fetch(client, route))
+                except (FetchError, OSError, UnicodeError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+                    result.failed += 1
+                    if len(result.errors) < MAX_ERRORS_KEPT:
+                        result.errors.append(f"rota {route['id']}: {e or type(e).__name__}")
+                    return None
+
+        return await asyncio.gather(*(fetch(route) for route in batch))
+
+    def _write(self, batch, prices, result):
+        changed = []
+        for route, price in zip(batch, prices):
+            result.checked += 1
+            if price is None:
+                continue
+            if price == route['price_min']:
+                result.unchanged += 1
+            else:
+                changed.append(Transportation(pk=route['id'], price_min=price))
+        result.changed += len(changed)
+        if changed and not self.dry_run:
+            Transportation.objects.bulk_update(changed, ['price_min'])
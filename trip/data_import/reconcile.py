@@ -0,0 +1,142 @@
+# Reconciliação em lote entre viagens e destinos (populate/fix_destinations)
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from django.db import transaction
+from django.db.models import Count
+
+from ..models import Destination, Trip
+from ..signals import bulk_changed
+from ..slugs import allocate_slugs
+
+DEFAULT_BATCH_SIZE = 1000
+UNSPECIFIED_DESTINATION = 'Destino não especificado'
+
+# Palavras comuns que podem indicar destinos no nome da viagem
+COMMON_DESTINATIONS = [
+    'Rio de Janeiro', 'São Paulo', 'Salvador', 'Recife', 'Fortaleza',
+    'Brasília', 'Belo Horizonte', 'Curitiba', 'Porto Alegre', 'Manaus',
+    'Belém', 'Goiânia', 'Campinas', 'Florianópolis', 'Natal',
+    'Paris', 'Londres', 'Nova York', 'Tokyo', 'Lisboa', 'Madrid'
+]
+_COMMON_LOWER = [(name.lower(), name) for name in COMMON_DESTINATIONS]
+
+
+def extract_destination_from_title(title):
+    """
+    Tentar extrair destino do título (nome) da viagem; None se não encontrar
+    """
+    title_lower = (title or '').lower()
+    for lower, name in _COMMON_LOWER:
+        if lower in title_lower:
+            return name
+    return None
+
+
+def trips_description(count):
+    return f'Destino com {count} {"viagem" if count == 1 else "viagens"}'
+
+
+@dataclass
+class ReconcileResult:
+    created: int = 0
+    existing: int = 0
+    skipped: int = 0
+    # Fase -> segundos
+    timings: dict = field(default_factory=dict)
+    created_names: list = field(default_factory=list)
+
+    @contextmanager
+    def timed(self, phase):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[phase] = self.timings.get(phase, 0.0) + time.perf_counter() - started
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def populate_destinations(batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+    """
+    Cria os destinos citados nos nomes das viagens que ainda não existem:
+    uma contagem agrupada, uma busca dos nomes já cadastrados por lote e um
+    bulk_create por lote, cada um na sua transação
+    """
+    result = ReconcileResult()
+    with result.timed('contagem'):
+        counts = Counter()
+        rows = Trip.objects.order_by().values_list('name').annotate(total=Count('id'))
+        for name, total in rows.iterator(chunk_size=batch_size):
+            destination = extract_destination_from_title(name)
+            if destination:
+                counts[destination] += total
+            else:
+                result.skipped += total
+
+    names = sorted(counts)
+    with result.timed('busca'):
+        existing = set()
+        for chunk in _chunks(names, batch_size):
+            existing.update(Destination.objects.filter(name__in=chunk).values_list('name', flat=True))
+    result.existing = len(existing)
+    missing = [name for name in names if name not in existing]
+    result.created_names = missing
+
+    if dry_run or not missing:
+        result.created = len(missing)
+        return result
+
+    with result.timed('gravação'):
+        for chunk in _chunks(missing, batch_size):
+            with transaction.atomic():
+                Destination.objects.bulk_create([
+                    Destination(name=name, slug=slug, description=trips_description(counts[name]))
+                    for name, slug in zip(chunk, allocate_slugs(Destination, chunk))
+                ])
+            result.created += len(chunk)
+    bulk_changed.send(sender=Destination)
+    return result
+
+
+def fix_destinations(batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+    """
+    Dá um destino a cada viagem que não tem nenhum, extraído do nome dela
+    (ou "Destino não especificado"). Percorre as viagens por id em lotes,
+    com um bulk_create por lote.
+    """
+    result = ReconcileResult()
+    pending = Trip.objects.filter(destinations__isnull=True).order_by('id')
+    last_id = 0
+    while True:
+        with result.timed('busca'):
+            batch = list(pending.filter(id__gt=last_id).values_list('id', 'name')[:batch_size])
+        if not batch:
+            break
+        last_id = batch[-1][0]
+
+        destinations = []
+        for trip_id, name in batch:
+            destination = extract_destination_from_title(name)
+            if destination is None:
+                destination = UNSPECIFIED_DESTINATION
+                result.skipped += 1
+            destinations.append(Destination(name=destination, trip_id=trip_id))
+        result.created += len(destinations)
+        if dry_run:
+            continue
+
+        with result.timed('gravação'), transaction.atomic():
+            slugs = allocate_slugs(Destination, [destination.name for destination in destinations])
+            for destination, slug in zip(destinations, slugs):
+                destination.slug = slug
+            Destination.objects.bulk_create(destinations)
+
+    if result.created and not dry_run:
+        bulk_changed.send(sender=Destination)
+    return result
@@ -0,0 +1,470 @@
+# Geração de dados sintéticos em volume (testes de carga e benchmarks)
+import random
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.color import no_style
+from django.db import connection, connections, transaction
+from django.db.models import Max
+from django.utils.text import slugify
+
+from ..models import (
+    Activity, City, Country, Destination, Itinerary, ItineraryActivity, Transportation, Trip,
+)
+from ..signals import bulk_changed
+
+DEFAULT_SEED = 42
+DEFAULT_BATCH_SIZE = 5000
+DEFAULT_PASSWORD = 'senha-de-teste'
+
+# Linhas por tabela em cada escala; itinerary_activities é a média por itinerário
+SCALES = {
+    'small': {
+        'countries': 10, 'cities': 100, 'users': 50, 'trips': 1000, 'destinations': 1000,
+        'transportation': 1000, 'activities': 2000, 'itineraries': 200, 'itinerary_activities': 8,
+    },
+    'medium': {
+        'countries': 40, 'cities': 2000, 'users': 2000, 'trips': 100000, 'destinations': 100000,
+        'transportation': 100000, 'activities': 200000, 'itineraries': 20000, 'itinerary_activities': 8,
+    },
+    'large': {
+        'countries': 120, 'cities': 10000, 'users': 20000, 'trips': 1000000, 'destinations': 1000000,
+        'transportation': 1000000, 'activities': 2000000, 'itineraries': 100000, 'itinerary_activities': 10,
+    },
+}
+
+# Cada fase só depende das anteriores; as tabelas de uma mesma fase são
+# independentes e podem ser geradas em paralelo
+PHASES = [
+    ['countries', 'users'],
+    ['cities', 'trips', 'itineraries'],
+    ['destinations', 'transportation'],
+    ['activities'],
+    ['itinerary_details'],
+]
+MODELS = {
+    'countries': Country,
+    'users': User,
+    'cities': City,
+    'trips': Trip,
+    'itineraries': Itinerary,
+    'destinations': Destination,
+    'transportation': Transportation,
+    'activities': Activity,
+}
+
+COUNTRY_NAMES = [
+    ('Brasil', 'BR', 'BRL', 'Português'), ('Portugal', 'PT', 'EUR', 'Português'),
+    ('Argentina', 'AR', 'ARS', 'Espanhol'), ('Chile', 'CL', 'CLP', 'Espanhol'),
+    ('França', 'FR', 'EUR', 'Francês'), ('Itália', 'IT', 'EUR', 'Italiano'),
+    ('Espanha', 'ES', 'EUR', 'Espanhol'), ('Japão', 'JP', 'JPY', 'Japonês'),
+    ('Estados Unidos', 'US', 'USD', 'Inglês'), ('México', 'MX', 'MXN', 'Espanhol'),
+]
+CITY_PREFIXES = ['Porto', 'Vila', 'São', 'Santa', 'Nova', 'Monte', 'Campo', 'Rio', 'Serra', 'Lago', 'Baía', 'Ponta']
+CITY_SUFFIXES = ['Alegre', 'Verde', 'Bonito', 'Claro', 'Azul', 'Grande', 'Branco', 'Real', 'do Sul', 'do Norte',
+                 'Formoso', 'Velho', 'das Flores', 'da Luz', 'Dourado', 'Sereno']
+COMPANIES = ['Azul', 'Gol', 'Latam', 'Cometa', 'Itapemirim', 'CP', 'Renfe', 'Buquebus', 'Flixbus', 'Iberia']
+TRIP_WORDS = ['Férias em', 'Fim de semana em', 'Viagem de negócios a', 'Lua de mel em', 'Mochilão por']
+ACTIVITY_WORDS = ['Passeio por', 'Museu de', 'Jantar em', 'Tour histórico de', 'Mercado de', 'Trilha em']
+CATEGORIES = [code for code, _label in Activity.CATEGORY_CHOICES]
+TRANSPORT_TYPES = [code for code, _label in Transportation.TRANSPORT_TYPES]
+STATUSES = [code for code, _label in Itinerary.STATUS_CHOICES]
+
+EPOCH = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+FIRST_DAY = date(2024, 1, 1)
+
+
+@dataclass
+class GenerationResult:
+    # Tabela -> (primeiro id, quantidade)
+    ranges: dict
+    rows: dict = field(default_factory=dict)
+    seconds: float = 0.0
+
+    @property
+    def total_rows(self):
+        return sum(self.rows.values())
+
+
+class Plan:
+    """
+    Ids de cada tabela decididos antes de gerar: os ids são explícitos, então
+    qualquer processo sabe a que linha uma chave estrangeira aponta sem
+    consultar o banco, e o mesmo seed gera os mesmos dados com 1 ou N
+    processos (cada lote tem o seu gerador aleatório).
+    """
+
+    def __init__(self, counts, seed, ranges, password=None):
+        self.counts = counts
+        self.seed = seed
+        self.ranges = ranges
+        # Hash calculado uma vez só (o hasher padrão é lento de propósito)
+        self.password = password or make_password(DEFAULT_PASSWORD)
+        self._coordinates = None
+        self._slugs = {}
+
+    def first(self, table):
+        return self.ranges[table][0]
+
+    def count(self, table):
+        return self.ranges[table][1]
+
+    def rng(self, *key):
+        return random.Random(':'.join(str(part) for part in (self.seed, *key)))
+
+    # Valores derivados só do índice, iguais em qualquer processo
+
+    def city_name(self, index):
+        prefix = CITY_PREFIXES[index % len(CITY_PREFIXES)]
+        suffix = CITY_SUFFIXES[(index // len(CITY_PREFIXES)) % len(CITY_SUFFIXES)]
+        cycle = index // (len(CITY_PREFIXES) * len(CITY_SUFFIXES))
+        return f'{prefix} {suffix}' + (f' {cycle + 1}' if cycle else '')
+
+    def city_slug(self, index):
+        slug = self._slugs.get(index)
+        if slug is None:
+            slug = self._slugs[index] = slugify(self.city_name(index))
+        return slug
+
+    def country_index(self, city_index):
+        return city_index % self.count('countries')
+
+    def country_name(self, index):
+        name = COUNTRY_NAMES[index % len(COUNTRY_NAMES)][0]
+        cycle = index // len(COUNTRY_NAMES)
+        return f'{name} {cycle + 1}' if cycle else name
+
+    def city_coordinates(self, index):
+        if self._coordinates is None:
+            rng = self.rng('cities')
+            self._coordinates = [
+                (rng.uniform(-55, 70), rng.uniform(-180, 180)) for _ in range(self.count('cities'))
+            ]
+        return self._coordinates[index]
+
+    def itinerary_days(self, index):
+        return 2 + (index * 7919) % 13
+
+    def activity_id(self, city_index, position):
+        """
+        A atividade `position` da cidade: as atividades são distribuídas
+        entre as cidades em rodízio (id = primeira + cidade + n * cidades)
+        """
+        return self.first('activities') + city_index + position * self.count('cities')
+
+    def activities_in_city(self, city_index):
+        cities = self.count('cities')
+        total = self.count('activities')
+        return total // cities + (1 if city_index < total % cities else 0)
+
+
+def make_plan(counts, seed):
+    """
+    Reserva faixas de ids logo depois do maior id atual de cada tabela
+    """
+    ranges = {}
+    for table, model in MODELS.items():
+        start = (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+        ranges[table] = (start, counts[table])
+    ranges['itinerary_details'] = ranges['itineraries']
+    return Plan(counts, seed, ranges)
+
+
+# Geradores: (plano, índice do lote, primeiro índice, quantidade) -> linhas
+
+def build_countries(plan, chunk, start, count):
+    rows = []
+    for index in range(start, start + count):
+        _name, code, currency, language = COUNTRY_NAMES[index % len(COUNTRY_NAMES)]
+        cycle = index // len(COUNTRY_NAMES)
+        if cycle:
+            code = chr(65 + cycle % 26) + chr(65 + (index * 7) % 26)
+        rows.append(Country(
+            id=plan.first('countries') + index, name=plan.country_name(index),
+            code=code, currency=currency, language=language,
+        ))
+    return {Country: rows}
+
+
+def build_users(plan, chunk, start, count):
+    first = plan.first('users')
+    return {User: [
+        User(id=first + index, username=f'load{first + index}', password=plan.password,
+             email=f'load{first + index}@example.com', date_joined=EPOCH)
+        for index in range(start, start + count)
+    ]}
+
+
+def build_cities(plan, chunk, start, count):
+    rows = []
+    for index in range(start, start + count):
+        lat, lon = plan.city_coordinates(index)
+        rows.append(City(
+            id=plan.first('cities') + index,
+            name=plan.city_name(index),
+            country_id=plan.first('countries') + plan.country_index(index),
+            description=f'Cidade sintética {index}.',
+            is_popular=index % 10 == 0,
+            latitude=lat,
+            longitude=lon,
+        ))
+    return {City: rows}
+
+
+def build_trips(plan, chunk, start, count):
+    rng = plan.rng('trips', chunk)
+    rows = []
+    for index in range(start, start + count):
+        begin = FIRST_DAY + timedelta(days=rng.randrange(730))
+        rows.append(Trip(
+            id=plan.first('trips') + index,
+            user_id=plan.first('users') + rng.randrange(plan.count('users')),
+            name=f'{rng.choice(TRIP_WORDS)} {plan.city_name(rng.randrange(plan.count("cities")))}',
+            start_date=begin,
+            end_date=begin + timedelta(days=rng.randrange(1, 21)),
+            created_at=EPOCH + timedelta(minutes=index),
+        ))
+    return {Trip: rows}
+
+
+def build_itineraries(plan, chunk, start, count):
+    rng = plan.rng('itineraries', chunk)
+    rows = []
+    for index in range(start, start + count):
+        begin = FIRST_DAY + timedelta(days=rng.randrange(730))
+        rows.append(Itinerary(
+            id=plan.first('itineraries') + index,
+            title=f'Roteiro {index}',
+            user_id=plan.first('users') + rng.randrange(plan.count('users')),
+            start_date=begin,
+            end_date=begin + timedelta(days=plan.itinerary_days(index) - 1),
+            budget=Decimal(rng.randrange(500, 20000)) if rng.random() < 0.8 else None,
+            status=rng.choice(STATUSES),
+            is_public=rng.random() < 0.3,
+        ))
+    return {Itinerary: rows}
+
+
+def build_destinations(plan, chunk, start, count):
+    rng = plan.rng('destinations', chunk)
+    trips = plan.count('trips')
+    rows = []
+    for index in range(start, start + count):
+        pk = plan.first('destinations') + index
+        city_index = rng.randrange(plan.count('cities'))
+        lat, lon = plan.city_coordinates(city_index)
+        arrival = FIRST_DAY + timedelta(days=rng.randrange(730))
+        city = plan.city_name(city_index)
+        rows.append(Destination(
+            id=pk,
+            name=f'{city} {index}',
+            slug=f'{plan.city_slug(city_index)}-s{pk}',
+            city=city,
+            country=plan.country_name(plan.country_index(city_index)),
+            trip_id=plan.first('trips') + rng.randrange(plan.count('trips')) if trips and rng.random() < 0.7 else None,
+            arrival_date=arrival,
+            departure_date=arrival + timedelta(days=rng.randrange(1, 10)),
+            latitude=Decimal(f'{lat + rng.uniform(-0.2, 0.2):.6f}'),
+            longitude=Decimal(f'{max(-180.0, min(180.0, lon + rng.uniform(-0.2, 0.2))):.6f}'),
+            description=f'Destino sintético {index} em {city}.',
+            created_at=EPOCH + timedelta(seconds=index),
+        ))
+    return {Destination: rows}
+
+
+def build_transportation(plan, chunk, start, count):
+    rng = plan.rng('transportation', chunk)
+    cities = plan.count('cities')
+    rows = []
+    for index in range(start, start + count):
+        origin = rng.randrange(cities)
+        destination = (origin + rng.randrange(1, cities)) % cities if cities > 1 else origin
+        rows.append(Transportation(
+            id=plan.first('transportation') + index,
+            origin_id=plan.first('cities') + origin,
+            destination_id=plan.first('cities') + destination,
+            transport_type=rng.choice(TRANSPORT_TYPES),
+            company=rng.choice(COMPANIES),
+            duration_hours=Decimal(rng.randrange(50, 4000)) / 100,
+            price_min=Decimal(rng.randrange(2000, 500000)) / 100,
+        ))
+    return {Transportation: rows}
+
+
+def build_activities(plan, chunk, start, count):
+    rng = plan.rng('activities', chunk)
+    cities = plan.count('cities')
+    rows = []
+    for index in range(start, start + count):
+        city_index = index % cities
+        rows.append(Activity(
+            id=plan.first('activities') + index,
+            name=f'{rng.choice(ACTIVITY_WORDS)} {plan.city_name(city_index)}',
+            description=f'Atividade sintética {index}.',
+            category=rng.choice(CATEGORIES),
+            city_id=plan.first('cities') + city_index,
+            destination_id=plan.first('destinations') + rng.randrange(plan.count('destinations')),
+            price=Decimal(rng.randrange(0, 30000)) / 100 if rng.random() < 0.9 else None,
+            duration_hours=Decimal(rng.choice([50, 100, 150, 200, 300, 400])) / 100,
+            rating=Decimal(rng.randrange(200, 501)) / 100 if rng.random() < 0.85 else None,
+            created_at=EPOCH + timedelta(seconds=index),
+        ))
+    return {Activity: rows}
+
+
+def build_itinerary_details(plan, chunk, start, count):
+    """
+    Cidades e atividades programadas de cada itinerário (atividades das
+    próprias cidades dele, sem repetir no mesmo dia)
+    """
+    rng = plan.rng('itinerary_details', chunk)
+    CityLink = Itinerary.cities.through
+    per_itinerary = plan.counts['itinerary_activities']
+    links, entries = [], []
+    for index in range(start, start + count):
+        itinerary_id = plan.first('itineraries') + index
+        days = plan.itinerary_days(index)
+        city_indexes = rng.sample(range(plan.count('cities')), min(plan.count('cities'), rng.randint(1, 3)))
+        for city_index in city_indexes:
+            links.append(CityLink(itinerary_id=itinerary_id, city_id=plan.first('cities') + city_index))
+
+        used = set()
+        for order in range(rng.randint(max(1, per_itinerary // 2), per_itinerary * 3 // 2)):
+            city_index = rng.choice(city_indexes)
+            available = plan.activities_in_city(city_index)
+            if not available:
+                continue
+            activity_id = plan.activity_id(city_index, rng.randrange(available))
+            day = rng.randint(1, days)
+            if (activity_id, day) in used:
+                continue
+            used.add((activity_id, day))
+            start_hour = 9 + order % 8
+            entries.append(ItineraryActivity(
+                itinerary_id=itinerary_id,
+                activity_id=activity_id,
+                day_number=day,
+                start_time=f'{start_hour:02d}:00',
+                end_time=f'{start_hour + 1:02d}:00',
+                order=order,
+            ))
+    return {CityLink: links, ItineraryActivity: entries}
+
+
+BUILDERS = {
+    'countries': build_countries,
+    'users': build_users,
+    'cities': build_cities,
+    'trips': build_trips,
+    'itineraries': build_itineraries,
+    'destinations': build_destinations,
+    'transportation': build_transportation,
+    'activities': build_activities,
+    'itinerary_details': build_itinerary_details,
+}
+
+
+def run_task(plan, table, chunk, start, count):
+    """
+    Gera e grava um lote numa transação própria; retorna linhas por modelo
+    """
+    written = {}
+    with transaction.atomic():
+        for model, rows in BUILDERS[table](plan, chunk, start, count).items():
+            model.objects.bulk_create(rows, batch_size=DEFAULT_BATCH_SIZE)
+            written[model._meta.label] = len(rows)
+    return table, written
+
+
+def _init_worker():
+    # Cada processo abre as próprias conexões (as herdadas do fork não servem)
+    for alias in connections:
+        connections[alias].close()
+
+
+def _tasks(plan, phase, batch_size):
+    for table in phase:
+        total = plan.count(table)
+        for chunk, start in enumerate(range(0, total, batch_size)):
+            yield table, chunk, start, min(batch_size, total - start)
+
+
+def _bounded(executor, function, tasks, window):
+    """
+    Resultados na ordem das tarefas, com no máximo `window` em andamento
+    (lotes prontos não se acumulam na memória)
+    """
+    pending = deque()
+    for task in tasks:
+        pending.append(executor.submit(function, *task))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def parallel_supported():
+    """
+    Processos gravando ao mesmo tempo só compensam com um banco que aceita
+    escritas concorrentes; no SQLite dariam "database is locked" (e montar
+    os objetos em paralelo para um único escritor gravar é mais lento que
+    fazer tudo aqui, pelo custo de serializar os lotes)
+    """
+    return connection.vendor != 'sqlite'
+
+
+def generate(counts, seed=DEFAULT_SEED, batch_size=DEFAULT_BATCH_SIZE, workers=1, progress=None):
+    """
+    Gera todas as tabelas, fase a fase. Com workers > 1 os lotes de cada
+    fase são gravados por processos em paralelo. No SQLite, que só aceita
+    um escritor por vez, tudo roda neste processo (ver parallel_supported).
+    """
+    started = time.perf_counter()
+    plan = make_plan(counts, seed)
+    result = GenerationResult(ranges=dict(plan.ranges))
+
+    def collect(table, written):
+        for label, rows in written.items():
+            result.rows[label] = result.rows.get(label, 0) + rows
+        if progress:
+            progress(table, sum(written.values()), result)
+
+    executor = None
+    if workers > 1 and parallel_supported():
+        connections.close_all()
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+    try:
+        for phase in PHASES:
+            tasks = [(plan, *task) for task in _tasks(plan, phase, batch_size)]
+            if executor is None:
+                for task in tasks:
+                    collect(*run_task(*task))
+            else:
+                for table, written in _bounded(executor, run_task, tasks, workers * 2):
+                    collect(table, written)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    # Ids explícitos: sequências (PostgreSQL) precisam andar até o fim das faixas
+    models = list(MODELS.values()) + [ItineraryActivity, Itinerary.cities.through]
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
+
+    from ..totals import rebuild_totals_in_bulk
+    first, count = plan.ranges['itineraries']
+    rebuild_totals_in_bulk(Itinerary.objects.filter(pk__gte=first, pk__lt=first + count), batch_size)
+
+    for model in (Country, City, Trip, Destination, Transportation, Activity, Itinerary):
+        bulk_changed.send(sender=model)
+    result.seconds = time.perf_counter() - started
+    return result
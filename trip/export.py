@@ -0,0 +1,208 @@
+# Exportação em streaming (CSV ou NDJSON) de viagens, destinos e itinerários
+import csv
+from dataclasses import dataclass
+
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.views.decorators.http import require_GET
+
+from .api import json_error
+from .models import Destination, Itinerary, ItineraryActivity, Trip
+from .serializers import (
+    DestinationSerializer, InvalidFields, ItineraryActivitySerializer, ItinerarySerializer,
+    TripSerializer, ValuesSerializer, dumps,
+)
+
+CHUNK_SIZE = 2000
+# Linhas juntadas em cada pedaço enviado (menos chamadas ao servidor)
+ROWS_PER_PART = 500
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+class TripExportSerializer(TripSerializer):
+    fields = {**TripSerializer.fields, 'user_id': 'user_id', 'user': 'user__username'}
+    default_fields = ('id', 'name', 'user_id', 'user', 'start_date', 'end_date', 'created_at')
+
+
+class DestinationExportSerializer(DestinationSerializer):
+    fields = {**DestinationSerializer.fields, 'trip': 'trip__name'}
+    default_fields = (
+        'id', 'name', 'slug', 'city', 'country', 'trip_id', 'trip',
+        'arrival_date', 'departure_date', 'latitude', 'longitude', 'image',
+    )
+
+
+@dataclass
+class Export:
+    serializer_class: type
+    model: type
+    # Lookup do dono; None quando os dados são públicos (como na API)
+    owner: str = None
+
+    def queryset(self, user=None):
+        """
+        Linhas visíveis para `user`: staff (ou o comando, user=None) vê tudo
+        """
+        queryset = self.model.objects.all()
+        if self.owner and user is not None and not user.is_staff:
+            queryset = queryset.filter(**{self.owner: user.pk})
+        return queryset
+
+
+EXPORTS = {
+    'trips': Export(TripExportSerializer, Trip, owner='user_id'),
+    'destinations': Export(DestinationExportSerializer, Destination),
+    'itineraries': Export(ItinerarySerializer, Itinerary, owner='user_id'),
+    'itinerary-activities': Export(ItineraryActivitySerializer, ItineraryActivity, owner='itinerary__user_id'),
+}
+
+
+def _batch(rows, last_pk, chunk_size):
+    """
+    Próximo lote em ordem de id, continuando do último enviado. Só o
+    iterator() não basta: no MySQL o driver carrega o resultado inteiro na
+    memória; com lotes por chave a memória fica em um lote em qualquer banco.
+    """
+    if last_pk is not None:
+        rows = rows.filter(pk__gt=last_pk)
+    return rows[:chunk_size]
+
+
+def iter_rows(queryset, serializer, chunk_size=CHUNK_SIZE):
+    """
+    Dicionários prontos para exportar, sem instanciar modelos
+    """
+    rows = serializer.values(queryset.order_by('pk'), extra=('pk',))
+    last_pk = None
+    while True:
+        count = 0
+        for row in _batch(rows, last_pk, chunk_size).iterator(chunk_size=chunk_size):
+            count += 1
+            last_pk = row['pk']
+            yield serializer.to_representation(row)
+        if count < chunk_size:
+            return
+
+
+async def aiter_rows(queryset, serializer, chunk_size=CHUNK_SIZE):
+    """
+    iter_rows com o ORM assíncrono (respostas servidas por ASGI)
+    """
+    rows = serializer.values(queryset.order_by('pk'), extra=('pk',))
+    last_pk = None
+    while True:
+        count = 0
+        async for row in _batch(rows, last_pk, chunk_size).aiterator(chunk_size=chunk_size):
+            count += 1
+            last_pk = row['pk']
+            yield serializer.to_representation(row)
+        if count < chunk_size:
+            return
+
+
+class _Line:
+    """
+    "Arquivo" do csv.writer que só devolve a linha escrita
+    """
+
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if value is None:
+        return ''
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return value
+
+
+class Encoder:
+    """
+    Linhas -> bytes no formato pedido, em pedaços de ROWS_PER_PART linhas
+    """
+
+    def __init__(self, serializer, fmt):
+        self.serializer = serializer
+        self.fmt = fmt
+        self.writer = csv.writer(_Line())
+
+    def header(self):
+        if self.fmt == 'csv':
+            return self.writer.writerow(self.serializer.selected).encode()
+        return b''
+
+    def encode(self, rows):
+        if self.fmt == 'csv':
+            return ''.join(
+                self.writer.writerow([_csv_value(value) for value in row.values()]) for row in rows
+            ).encode()
+        return b''.join(dumps(row) + b'\n' for row in rows)
+
+    def parts(self, rows):
+        yield self.header()
+        pending = []
+        for row in rows:
+            pending.append(row)
+            if len(pending) >= ROWS_PER_PART:
+                yield self.encode(pending)
+                pending = []
+        if pending:
+            yield self.encode(pending)
+
+    async def aparts(self, rows):
+        yield self.header()
+        pending = []
+        async for row in rows:
+            pending.append(row)
+            if len(pending) >= ROWS_PER_PART:
+                yield self.encode(pending)
+                pending = []
+        if pending:
+            yield self.encode(pending)
+
+
+def export_parts(name, fmt, fields=None, user=None, chunk_size=CHUNK_SIZE):
+    """
+    Pedaços (bytes) da exportação `name`; usado pelo comando export_data
+    """
+    export = EXPORTS[name]
+    serializer = export.serializer_class(fields)
+    return Encoder(serializer, fmt).parts(iter_rows(export.queryset(user), serializer, chunk_size))
+
+
+@require_GET
+def export_view(request, name):
+    """
+    Exporta tudo de uma vez em streaming: ?format=csv|ndjson e ?fields=.
+    Viagens e itinerários exigem login (cada usuário vê os seus; staff vê
+    todos); destinos são públicos, como na API.
+    """
+    export = EXPORTS.get(name)
+    if export is None:
+        return json_error(f"Exportação inválida. Use uma de: {', '.join(EXPORTS)}.", status=404)
+    fmt = request.GET.get('format', 'csv')
+    if fmt not in FORMATS:
+        return json_error(f"Formato inválido. Use um de: {', '.join(FORMATS)}.", status=400)
+    if export.owner and not request.user.is_authenticated:
+        return json_error('Autenticação necessária.', status=401)
+    try:
+        serializer = export.serializer_class(ValuesSerializer.parse_fields(request.GET.get('fields')))
+    except InvalidFields as e:
+        return json_error(str(e), status=400)
+
+    queryset = export.queryset(request.user)
+    encoder = Encoder(serializer, fmt)
+    # Sob ASGI o StreamingHttpResponse precisa de um iterador assíncrono
+    # (um síncrono seria lido inteiro para a memória antes de enviar)
+    if isinstance(request, ASGIRequest):
+        content = encoder.aparts(aiter_rows(queryset, serializer))
+    else:
+        content = encoder.parts(iter_rows(queryset, serializer))
+    response = StreamingHttpResponse(content, content_type=FORMATS[fmt])
+    response['Content-Disposition'] = f'attachment; filename="{name}.{fmt}"'
+    return response
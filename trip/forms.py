@@ -122,6 +122,22 @@ class DestinationForm(forms.ModelForm):
 
         if arrival_date and departure_date and departure_date < arrival_date:
             raise forms.ValidationError("A data de partida não pode ser anterior à data de chegada.")
+
+        # Outras estadias da mesma viagem nas mesmas noites. Consulta no banco,
+        # não no índice em memória: a validação precisa do estado gravado.
+        # Partir e chegar no mesmo dia (troca de cidade) não é conflito.
+        trip = cleaned_data.get('trip')
+        if trip and arrival_date and departure_date:
+            conflicts = Destination.objects.filter(
+                trip=trip, arrival_date__lt=departure_date, departure_date__gt=arrival_date,
+            )
+            if self.instance.pk:
+                conflicts = conflicts.exclude(pk=self.instance.pk)
+            names = list(conflicts.order_by('arrival_date').values_list('name', flat=True))
+            if names:
+                raise forms.ValidationError(
+                    "As datas se sobrepõem a outro destino desta viagem: %s." % ', '.join(names)
+                )
         
         return cleaned_data
 
@@ -0,0 +1,122 @@
+# Pipeline de imagens dos destinos (versões redimensionadas em segundo plano)
+import hashlib
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import close_old_connections
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .versions import bump_version
+
+logger = logging.getLogger(__name__)
+
+# Nome -> tamanho máximo; da maior para a menor, cada uma parte da anterior
+RENDITIONS = {
+    'full': (800, 600),
+    'card': (400, 300),
+    'thumbnail': (150, 150),
+}
+FORMATS = {
+    'jpg': {'format': 'JPEG', 'quality': 85, 'optimize': True, 'progressive': True},
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+}
+RENDITIONS_DIR = 'destinations/renditions'
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'TRIP_IMAGE_WORKERS', 2),
+    thread_name_prefix='trip-images',
+)
+
+
+def rendition_key(name, extension):
+    return name if extension == 'jpg' else f'{name}_{extension}'
+
+
+def upload_token(image_name):
+    """
+    Identifica o upload (o storage nunca repete um nome de imagem)
+    """
+    return hashlib.sha1(image_name.encode(), usedforsecurity=False).hexdigest()[:12]
+
+
+def rendition_name(destination_id, image_name, name, extension):
+    # Uma pasta por upload: um job mais lento de uma imagem anterior não
+    # sobrescreve as versões da atual
+    return f'{RENDITIONS_DIR}/{destination_id}/{upload_token(image_name)}/{name}.{extension}'
+
+
+def schedule_renditions(destination_id, image_name):
+    """
+    Agenda a geração das versões da imagem; retorna imediatamente
+    """
+    if getattr(settings, 'TRIP_IMAGE_PIPELINE_ASYNC', True):
+        _executor.submit(_rendition_job, destination_id, image_name)
+    else:
+        build_renditions(destination_id, image_name)
+
+
+def _rendition_job(destination_id, image_name):
+    close_old_connections()
+    try:
+        build_renditions(destination_id, image_name)
+    except Exception:
+        logger.exception("Falha ao gerar as versões da imagem do destino %s", destination_id)
+    finally:
+        close_old_connections()
+
+
+def _save_image(image, name, options):
+    # Gravar em arquivo temporário e renomear: quem lê nunca vê arquivo pela metade
+    path = default_storage.path(name)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'wb') as output:
+            image.save(output, **options)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
+
+
+def build_renditions(destination_id, image_name):
+    """
+    Gera thumbnail, card e full (JPEG e WebP) e grava os caminhos no destino
+    """
+    from .models import Destination
+
+    with Image.open(default_storage.path(image_name)) as source:
+        # Em JPEG o draft decodifica já reduzido (1/2, 1/4, 1/8), bem mais rápido
+        source.draft('RGB', RENDITIONS['full'])
+        image = ImageOps.exif_transpose(source)
+        if image.mode != 'RGB':
+            image = image.convert('RGB')
+        image.load()
+
+    paths = {}
+    for name, size in RENDITIONS.items():
+        image.thumbnail(size, Image.Resampling.LANCZOS)
+        for extension, options in FORMATS.items():
+            path = rendition_name(destination_id, image_name, name, extension)
+            _save_image(image, path, options)
+            paths[rendition_key(name, extension)] = path
+
+    # Só grava se a imagem não foi trocada enquanto processávamos
+    updated = Destination.objects.filter(pk=destination_id, image=image_name).update(
+        renditions=paths, updated_at=timezone.now(),
+    )
+    if updated:
+        # .update() não dispara post_save: as listagens mostram as miniaturas
+        bump_version('destination')
+    else:
+        # Imagem trocada (ou destino apagado) no meio do caminho: ninguém
+        # vai referenciar estas versões
+        for path in paths.values():
+            default_storage.delete(path)
+    return paths
+
@@ -0,0 +1,70 @@
+import json
+
+from django.core.cache import cache
+from django.core.management.base import CommandError
+from django.db import connection
+
+from trip.benchmarks.datasets import DEFAULT_SEED, SCALES
+from trip.benchmarks.servers import (
+    ASYNC_VIEWS, DEFAULT_CLIENT_DELAY_MS, DEFAULT_CLIENTS, DEFAULT_REQUESTS, DEFAULT_THREADS, compare_servers,
+)
+
+from .benchmark_views import Command as BenchmarkViewsCommand
+
+
+class Command(BenchmarkViewsCommand):
+    help = (
+        'Comparar a vazão das views assíncronas sob WSGI e ASGI com clientes lentos (SQLite). '
+        'Use --settings=travel_planner.settings_benchmark'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+        parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+        parser.add_argument('--view', action='append', choices=ASYNC_VIEWS, help='View a medir (pode repetir)')
+        parser.add_argument('--clients', type=int, default=DEFAULT_CLIENTS, help='Clientes simultâneos')
+        parser.add_argument('--requests', type=int, default=DEFAULT_REQUESTS, help='Requisições por cliente')
+        parser.add_argument('--threads', type=int, default=DEFAULT_THREADS,
+                            help='Threads do servidor WSGI (e do executor padrão no ASGI)')
+        parser.add_argument('--client-delay', type=int, default=DEFAULT_CLIENT_DELAY_MS,
+                            help='Milissegundos que cada cliente leva para receber a resposta')
+        parser.add_argument('--reseed', action='store_true', help='Apagar o banco e gerar os dados de novo')
+        parser.add_argument('--output', help='Gravar o resultado neste arquivo JSON')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError(
+                'Os benchmarks apagam e recriam os dados: rode com '
+                '--settings=travel_planner.settings_benchmark (SQLite).'
+            )
+
+        dataset = self.prepare_dataset(options)
+        cache.clear()
+        # Cada thread (e o event loop) abre a própria conexão
+        connection.close()
+
+        def progress(server, result):
+            line = (
+                f'{server.upper():5} {result["throughput_rps"]:8.1f} req/s  p50 {result["p50_ms"]:8.1f} ms  '
+                f'p90 {result["p90_ms"]:8.1f} ms  p99 {result["p99_ms"]:8.1f} ms  '
+                f'{result["peak_threads"]:3} threads  status {result["status"]}'
+            )
+            self.stdout.write(line if result['status'] == [200] else self.style.ERROR(line))
+
+        self.stdout.write(
+            f'{options["clients"]} clientes x {options["requests"]} requisições, {options["threads"]} threads, '
+            f'cliente leva {options["client_delay"]} ms para receber cada resposta'
+        )
+        report = compare_servers(
+            dataset, names=options['view'], clients=options['clients'], requests=options['requests'],
+            threads=options['threads'], client_delay_ms=options['client_delay'], progress=progress,
+        )
+        wsgi, asgi = report['servers']['wsgi'], report['servers']['asgi']
+        self.stdout.write(self.style.SUCCESS(
+            f'ASGI: {asgi["throughput_rps"] / wsgi["throughput_rps"]:.1f}x a vazão do WSGI.'
+        ))
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, indent=2, ensure_ascii=False)
+            self.stdout.write(f'Resultado gravado em {options["output"]}')
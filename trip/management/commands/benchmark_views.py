@@ -0,0 +1,105 @@
+import json
+import os
+import time
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from trip.benchmarks.datasets import BATCH_SIZE, DEFAULT_SEED, SCALES, Dataset, seed_dataset
+from trip.benchmarks.runner import (
+    DEFAULT_ITERATIONS, DEFAULT_THRESHOLD, DEFAULT_WARMUP, VIEW_NAMES, compare, run_suite,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Medir latência e consultas das views com dados sintéticos (SQLite). '
+        'Use --settings=travel_planner.settings_benchmark'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+        parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+        parser.add_argument('--view', action='append', choices=VIEW_NAMES, help='View a medir (pode repetir)')
+        parser.add_argument('--iterations', type=int, default=DEFAULT_ITERATIONS)
+        parser.add_argument('--warmup', type=int, default=DEFAULT_WARMUP)
+        parser.add_argument('--reseed', action='store_true', help='Apagar o banco e gerar os dados de novo')
+        parser.add_argument('--output', help='Gravar o resultado (baseline) neste arquivo JSON')
+        parser.add_argument('--compare', help='Comparar com um baseline JSON e falhar se houver regressão')
+        parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                            help='Tolerância do p90 em relação ao baseline (1.25 = 25%%)')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError(
+                'Os benchmarks apagam e recriam os dados: rode com '
+                '--settings=travel_planner.settings_benchmark (SQLite).'
+            )
+
+        dataset = self.prepare_dataset(options)
+        cache.clear()
+
+        def progress(name, result):
+            line = (
+                f'{name:20} p50 {result["p50_ms"]:8.1f} ms  p90 {result["p90_ms"]:8.1f} ms  '
+                f'p99 {result["p99_ms"]:8.1f} ms  {result["queries"]:3} consultas  status {result["status"]}'
+            )
+            self.stdout.write(line if result['status'] == [200] else self.style.ERROR(line))
+
+        report = run_suite(
+            dataset, names=options['view'], iterations=options['iterations'],
+            warmup=options['warmup'], progress=progress,
+        )
+
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as output:
+                json.dump(report, output, indent=2, ensure_ascii=False)
+            self.stdout.write(f'Baseline gravado em {options["output"]}')
+
+        if options['compare']:
+            try:
+                with open(options['compare'], encoding='utf-8') as source:
+                    baseline = json.load(source)
+            except (OSError, ValueError) as e:
+                raise CommandError(f'Não foi possível ler o baseline {options["compare"]}: {e}')
+            problems = compare(report, baseline, options['threshold'])
+            if problems:
+                for problem in problems:
+                    self.stdout.write(self.style.ERROR(f'  {problem}'))
+                raise CommandError(f'{len(problems)} regressão(ões) em relação ao baseline.')
+            self.stdout.write(self.style.SUCCESS('Sem regressões em relação ao baseline.'))
+
+    def prepare_dataset(self, options):
+        """
+        Reaproveita o banco se já tem o mesmo conjunto (escala e seed);
+        senão apaga tudo e gera de novo
+        """
+        marker = f'{connection.settings_dict["NAME"]}.dataset.json'
+        call_command('migrate', verbosity=0, interactive=False)
+        if not options['reseed'] and os.path.exists(marker):
+            with open(marker, encoding='utf-8') as source:
+                dataset = Dataset.from_dict(json.load(source))
+            if (dataset.scale, dataset.seed) == (options['scale'], options['seed']):
+                return dataset
+
+        self.stdout.write(f'Gerando o conjunto {options["scale"]} (seed {options["seed"]})...')
+        started = time.perf_counter()
+        if os.path.exists(marker):
+            os.remove(marker)
+        call_command('flush', verbosity=0, interactive=False)
+        inserted = {}
+
+        def progress(table, count):
+            inserted[table] = inserted.get(table, 0) + count
+            self.stdout.write(f'  {table}: {inserted[table]}')
+
+        dataset = seed_dataset(
+            options['scale'], options['seed'], batch_size=BATCH_SIZE,
+            progress=progress if options['verbosity'] > 1 else None,
+        )
+        with open(marker, 'w', encoding='utf-8') as output:
+            json.dump(dataset.as_dict(), output)
+        self.stdout.write(f'Dados gerados em {time.perf_counter() - started:.1f}s.')
+        return dataset
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from trip.images import build_renditions
+from trip.models import Destination
+
+
+class Command(BaseCommand):
+    help = 'Gerar as versões (thumbnail, card, full e WebP) das imagens dos destinos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--missing', action='store_true', help='Só destinos ainda sem versões')
+
+    def handle(self, *args, **options):
+        destinations = Destination.objects.exclude(image='').exclude(image__isnull=True).order_by('pk')
+        if options['missing']:
+            destinations = destinations.filter(renditions={})
+
+        done = failed = 0
+        for destination_id, image_name in destinations.values_list('pk', 'image').iterator(chunk_size=500):
+            try:
+                build_renditions(destination_id, image_name)
+                done += 1
+            except (OSError, ValueError) as e:
+                failed += 1
+                self.stdout.write(self.style.WARNING(f'Destino {destination_id}: {e}'))
+
+        self.stdout.write(self.style.SUCCESS(f'{done} imagem(ns) processada(s), {failed} com erro.'))
@@ -0,0 +1,116 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from trip.images import RENDITIONS_DIR
+from trip.models import Destination
+
+
+def scan_files(root, min_age):
+    """
+    Percorre a árvore sob demanda (os.scandir), sem listar tudo na memória.
+    Gera (caminho absoluto, tamanho) dos arquivos mais antigos que min_age.
+    """
+    cutoff = time.time() - min_age
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = os.scandir(directory)
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(entry.path)
+                elif entry.is_file(follow_symlinks=False):
+                    info = entry.stat(follow_symlinks=False)
+                    if info.st_mtime < cutoff:
+                        yield entry.path, info.st_size
+
+
+def batched(iterable, size):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class Command(BaseCommand):
+    help = 'Remover arquivos em MEDIA_ROOT/destinations que nenhum destino referencia'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help='Apenas listar, sem remover')
+        parser.add_argument(
+            '--min-age', type=int, default=3600,
+            help='Ignorar arquivos modificados há menos de N segundos (uploads em andamento)'
+        )
+
+    def handle(self, *args, **options):
+        self.dry_run = options['dry_run']
+        self.verbosity = options['verbosity']
+        self.media_root = os.path.abspath(settings.MEDIA_ROOT)
+        root = os.path.join(self.media_root, 'destinations')
+        renditions_root = os.path.join(self.media_root, RENDITIONS_DIR)
+
+        scanned = orphans = freed = 0
+        for batch in batched(scan_files(root, options['min_age']), options['batch_size']):
+            names = {self._name(path): (path, size) for path, size in batch}
+            referenced = self._referenced(names, renditions_root)
+            for name, (path, size) in names.items():
+                if name not in referenced:
+                    orphans += 1
+                    freed += size
+                    self._remove(path, name)
+            scanned += len(batch)
+
+        action = 'Seriam removidos' if self.dry_run else 'Removidos'
+        self.stdout.write(self.style.SUCCESS(
+            f'{scanned} arquivo(s) verificado(s). {action} {orphans} órfão(s), '
+            f'{freed / (1024 * 1024):.1f} MB.'
+        ))
+
+    def _name(self, path):
+        # Mesmo formato gravado no campo image: caminho relativo com "/"
+        return os.path.relpath(path, self.media_root).replace(os.sep, '/')
+
+    def _referenced(self, names, renditions_root):
+        """
+        Quais nomes do lote ainda são usados, com uma consulta para as
+        imagens originais e outra para as versões
+        """
+        prefix = RENDITIONS_DIR + '/'
+        originals = [name for name in names if not name.startswith(prefix)]
+        referenced = set(
+            Destination.objects.filter(image__in=originals).values_list('image', flat=True)
+        ) if originals else set()
+
+        # Versões ficam em destinations/renditions/<id>/<upload>/...
+        rendition_ids = set()
+        for name in names:
+            if name.startswith(prefix):
+                destination_id = name[len(prefix):].split('/', 1)[0]
+                if destination_id.isdigit():
+                    rendition_ids.add(int(destination_id))
+        if rendition_ids:
+            rows = Destination.objects.filter(pk__in=rendition_ids).values_list('renditions', flat=True)
+            for renditions in rows:
+                referenced.update((renditions or {}).values())
+        return referenced
+
+    def _remove(self, path, name):
+        if self.verbosity > 1:
+            self.stdout.write(f'  órfão: {name}')
+        if self.dry_run:
+            return
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
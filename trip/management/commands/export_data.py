@@ -0,0 +1,46 @@
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from trip.export import CHUNK_SIZE, EXPORTS, FORMATS, export_parts
+from trip.serializers import InvalidFields, ValuesSerializer
+
+
+class Command(BaseCommand):
+    help = 'Exportar viagens, destinos, itinerários ou atividades programadas em CSV ou NDJSON (streaming)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', choices=sorted(EXPORTS))
+        parser.add_argument('--format', choices=sorted(FORMATS), default='csv')
+        parser.add_argument('--fields', help='Campos separados por vírgula (padrão: os da API)')
+        parser.add_argument('--output', help='Arquivo de saída (padrão: saída padrão)')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            parts = export_parts(
+                options['name'], options['format'], ValuesSerializer.parse_fields(options['fields']),
+                chunk_size=options['chunk_size'],
+            )
+        except InvalidFields as e:
+            raise CommandError(str(e))
+
+        output = open(options['output'], 'wb') if options['output'] else sys.stdout.buffer
+        written = 0
+        try:
+            for part in parts:
+                output.write(part)
+                written += len(part)
+        finally:
+            if options['output']:
+                output.close()
+            else:
+                output.flush()
+
+        if options['output']:
+            self.stdout.write(self.style.SUCCESS(
+                f'{written / 1024 / 1024:.1f} MB gravados em {options["output"]} '
+                f'em {time.perf_counter() - started:.1f}s.'
+            ))
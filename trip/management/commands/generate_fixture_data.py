@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from trip.data_import.synthetic import DEFAULT_BATCH_SIZE, DEFAULT_SEED, SCALES, generate, parallel_supported
+
+
+class Command(BaseCommand):
+    help = 'Gerar dados sintéticos em volume (usuários, viagens, destinos, cidades, atividades, roteiros)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+        parser.add_argument('--seed', type=int, default=DEFAULT_SEED)
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--workers', type=int, default=1,
+                            help='Processos em paralelo para as tabelas independentes')
+        parser.add_argument('--count', action='append', default=[], metavar='TABELA=N',
+                            help=f'Sobrescreve a quantidade de uma tabela ({", ".join(SCALES["small"])})')
+
+    def handle(self, *args, **options):
+        counts = dict(SCALES[options['scale']])
+        for item in options['count']:
+            table, _, value = item.partition('=')
+            if table not in counts or not value.isdigit():
+                raise CommandError(f'--count inválido: {item}')
+            counts[table] = int(value)
+        if counts['countries'] < 1 or counts['cities'] < 1 or counts['users'] < 1:
+            raise CommandError('countries, cities e users precisam de pelo menos 1 linha')
+        if counts['activities'] and not counts['destinations']:
+            raise CommandError('atividades precisam de destinos')
+
+        workers = options['workers']
+        if workers > 1 and not parallel_supported():
+            self.stdout.write(self.style.WARNING('Banco sem escritas concorrentes (SQLite): usando 1 processo.'))
+            workers = 1
+
+        def progress(table, rows, result):
+            if options['verbosity'] > 1:
+                self.stdout.write(f'  {table}: +{rows}')
+
+        self.stdout.write(f'Gerando escala {options["scale"]} (seed {options["seed"]}, '
+                          f'{workers} processo(s))...')
+        result = generate(
+            counts, seed=options['seed'], batch_size=options['batch_size'],
+            workers=workers, progress=progress,
+        )
+
+        self.stdout.write('=' * 60)
+        for label, rows in sorted(result.rows.items()):
+            self.stdout.write(f'• {label}: {rows}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{result.total_rows} linhas em {result.seconds:.2f}s '
+            f'({result.total_rows / max(result.seconds, 0.001):.0f} linhas/s).'
+        ))
@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from trip.data_import.csv_import import DEFAULT_BATCH_SIZE, IMPORTERS
+
+
+class Command(BaseCommand):
+    help = 'Importar países, cidades, destinos ou transportes de um arquivo CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(IMPORTERS))
+        parser.add_argument('path')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--resume-from', type=int, default=0, help='Offset em bytes informado no progresso')
+        parser.add_argument('--no-update', action='store_true', help='Não atualizar registros existentes')
+        parser.add_argument('--delimiter', default=',')
+        parser.add_argument('--encoding', default='utf-8')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+
+        def progress(result):
+            elapsed = time.monotonic() - started
+            rate = result.rows / elapsed if elapsed else 0
+            self.stdout.write(
+                f'{result.percent:5.1f}% | {result.rows} linhas ({rate:.0f}/s) | '
+                f'{result.created} criadas, {result.updated} atualizadas, {result.skipped} puladas | '
+                f'offset={result.offset}'
+            )
+
+        importer = IMPORTERS[options['kind']](
+            options['path'],
+            batch_size=options['batch_size'],
+            update=not options['no_update'],
+            progress=progress if options['verbosity'] > 0 else None,
+            encoding=options['encoding'],
+            delimiter=options['delimiter'],
+        )
+        try:
+            result = importer.run(start_offset=options['resume_from'])
+        except (OSError, UnicodeDecodeError) as e:
+            raise CommandError(f'Erro ao ler {options["path"]}: {e}')
+
+        for error in result.errors:
+            self.stdout.write(self.style.WARNING(f'  {error}'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Importação concluída em {time.monotonic() - started:.1f}s: '
+            f'{result.created} criadas, {result.updated} atualizadas, {result.skipped} puladas.'
+        ))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from trip.models import Itinerary
+from trip.totals import rebuild_itinerary_totals
+
+
+class Command(BaseCommand):
+    help = 'Recalcular do zero os totais de custo e horas dos itinerários'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--itinerary', type=int, action='append', help='ID do itinerário (pode repetir)')
+
+    def handle(self, *args, **options):
+        itinerary_ids = options['itinerary'] or Itinerary.objects.order_by('pk').values_list('pk', flat=True).iterator()
+
+        total = drifted = 0
+        for itinerary_id in itinerary_ids:
+            with transaction.atomic():
+                if rebuild_itinerary_totals(itinerary_id):
+                    drifted += 1
+            total += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Totais recalculados para {total} itinerário(s); {drifted} estavam desatualizados.'
+        ))
@@ -0,0 +1,23 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from trip.stats import rebuild_user_stats
+
+
+class Command(BaseCommand):
+    help = 'Recalcular do zero as estatísticas de viagens por usuário'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, action='append', help='ID do usuário (pode repetir)')
+
+    def handle(self, *args, **options):
+        user_ids = options['user'] or User.objects.order_by('pk').values_list('pk', flat=True).iterator()
+
+        total = 0
+        for user_id in user_ids:
+            with transaction.atomic():
+                rebuild_user_stats(user_id)
+            total += 1
+
+        self.stdout.write(self.style.SUCCESS(f'Estatísticas recalculadas para {total} usuário(s).'))
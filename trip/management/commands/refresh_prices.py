@@ -0,0 +1,73 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+from trip.data_import.price_scraper import (
+    DEFAULT_BATCH_SIZE, DEFAULT_CONCURRENCY, DEFAULT_PER_HOST, DEFAULT_RATE, DEFAULT_TIMEOUT,
+    JsonPriceFetcher, PriceRefresher,
+)
+from trip.models import Transportation
+
+
+class Command(BaseCommand):
+    help = 'Atualizar o preço mínimo dos transportes consultando as fontes de preço'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url-template',
+            help='URL por rota com campos da rota, ex.: "https://api/prices?from={origin__name}&to={destination__name}". '
+                 'Sem ela, usa o booking_url de cada transporte.'
+        )
+        parser.add_argument('--price-field', default='price', help='Campo do JSON com o preço (aceita "a.b")')
+        parser.add_argument('--fetcher', help='Caminho de uma classe PriceFetcher alternativa')
+        parser.add_argument('--type', dest='transport_type', choices=[code for code, _ in Transportation.TRANSPORT_TYPES])
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY)
+        parser.add_argument('--per-host', type=int, default=DEFAULT_PER_HOST, help='Conexões simultâneas por host')
+        parser.add_argument('--rate', type=float, default=DEFAULT_RATE, help='Requisições por segundo por host (0 = sem limite)')
+        parser.add_argument('--timeout', type=float, default=DEFAULT_TIMEOUT)
+        parser.add_argument('--dry-run', action='store_true', help='Consultar preços sem gravar')
+
+    def handle(self, *args, **options):
+        if options['fetcher']:
+            try:
+                fetcher = import_string(options['fetcher'])()
+            except ImportError as e:
+                raise CommandError(str(e))
+        else:
+            fetcher = JsonPriceFetcher(options['url_template'], options['price_field'])
+
+        queryset = Transportation.objects.all()
+        if options['transport_type']:
+            queryset = queryset.filter(transport_type=options['transport_type'])
+
+        started = time.monotonic()
+
+        def progress(result):
+            elapsed = time.monotonic() - started
+            rate = result.checked / elapsed * 60 if elapsed else 0
+            self.stdout.write(
+                f'{result.checked} rotas ({rate:.0f}/min) | {result.changed} alteradas, '
+                f'{result.unchanged} iguais, {result.failed} falhas'
+            )
+
+        refresher = PriceRefresher(
+            fetcher,
+            batch_size=options['batch_size'],
+            concurrency=options['concurrency'],
+            per_host=options['per_host'],
+            rate=options['rate'],
+            timeout=options['timeout'],
+            dry_run=options['dry_run'],
+            progress=progress if options['verbosity'] > 0 else None,
+        )
+        result = refresher.run(queryset)
+
+        for error in result.errors:
+            self.stdout.write(self.style.WARNING(f'  {error}'))
+        action = 'seriam alteradas' if options['dry_run'] else 'alteradas'
+        self.stdout.write(self.style.SUCCESS(
+            f'{result.checked} rotas verificadas em {time.monotonic() - started:.1f}s '
+            f'({result.requests} requisições): {result.changed} {action}, {result.failed} falhas.'
+        ))
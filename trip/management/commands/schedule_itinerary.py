@@ -0,0 +1,54 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from trip.models import Itinerary
+from trip.scheduler import (
+    DEFAULT_DAY_START, DEFAULT_GAP_MINUTES, DEFAULT_HOURS_PER_DAY, plan_itinerary, schedule_itinerary,
+)
+
+
+class Command(BaseCommand):
+    help = 'Distribuir as atividades das cidades de um itinerário em dias e horários'
+
+    def add_arguments(self, parser):
+        parser.add_argument('itinerary_id', type=int)
+        parser.add_argument('--days', type=int, help='Número de dias (padrão: datas do itinerário)')
+        parser.add_argument('--hours-per-day', type=int, default=DEFAULT_HOURS_PER_DAY)
+        parser.add_argument('--start', default=DEFAULT_DAY_START.strftime('%H:%M'), help='Início do dia (HH:MM)')
+        parser.add_argument('--gap', type=int, default=DEFAULT_GAP_MINUTES, help='Minutos entre atividades')
+        parser.add_argument('--dry-run', action='store_true', help='Mostrar o roteiro sem gravar')
+
+    def handle(self, *args, **options):
+        try:
+            itinerary = Itinerary.objects.get(pk=options['itinerary_id'])
+        except Itinerary.DoesNotExist:
+            raise CommandError(f"Itinerário {options['itinerary_id']} não encontrado")
+        try:
+            day_start = datetime.strptime(options['start'], '%H:%M').time()
+        except ValueError:
+            raise CommandError('Use HH:MM em --start')
+
+        build = plan_itinerary if options['dry_run'] else schedule_itinerary
+        try:
+            plan = build(
+                itinerary,
+                days=options['days'],
+                hours_per_day=options['hours_per_day'],
+                day_start=day_start,
+                gap_minutes=options['gap'],
+            )
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        for day in plan.days:
+            self.stdout.write(f'Dia {day.number}:')
+            for entry in day.entries:
+                self.stdout.write(
+                    f'  {entry.start_time:%H:%M}-{entry.end_time:%H:%M}  {entry.activity.name}'
+                )
+        action = 'seriam programadas' if options['dry_run'] else 'programadas'
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(plan.entries)} atividades {action} em {len(plan.days)} dias '
+            f'(custo {plan.total_cost}); {len(plan.unscheduled)} ficaram de fora.'
+        ))
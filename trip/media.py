@@ -0,0 +1,37 @@
+# Remoção de arquivos de mídia fora do ciclo da requisição
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='trip-media')
+
+
+def queue_file_deletion(names):
+    """
+    Agenda a remoção dos arquivos para depois do commit; se a transação
+    for desfeita, nada é apagado
+    """
+    names = [name for name in names if name]
+    if not names:
+        return
+    if getattr(settings, 'TRIP_MEDIA_DELETE_ASYNC', True):
+        transaction.on_commit(lambda: _executor.submit(delete_files, names))
+    else:
+        transaction.on_commit(lambda: delete_files(names))
+
+
+def delete_files(names):
+    removed = 0
+    for name in names:
+        try:
+            if default_storage.exists(name):
+                default_storage.delete(name)
+                removed += 1
+        except OSError:
+            logger.exception("Falha ao remover o arquivo de mídia %s", name)
+    return removed
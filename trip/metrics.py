@@ -0,0 +1,288 @@
+# Métricas por requisição (SQL, templates, N+1) agregadas por nome de URL
+import hashlib
+import re
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.http import HttpResponse
+
+# Janela das histogramas: SLOTS fatias de SLOT_SECONDS; a mais antiga é descartada
+WINDOW_SECONDS = getattr(settings, 'TRIP_METRICS_WINDOW_SECONDS', 600)
+SLOT_SECONDS = getattr(settings, 'TRIP_METRICS_SLOT_SECONDS', 60)
+SLOW_REQUEST_MS = getattr(settings, 'TRIP_METRICS_SLOW_MS', 500)
+# Mesma consulta (sem os parâmetros) repetida tantas vezes na requisição = N+1
+DUPLICATE_THRESHOLD = getattr(settings, 'TRIP_METRICS_DUPLICATE_THRESHOLD', 5)
+# Assinaturas N+1 guardadas por view
+MAX_SIGNATURES = 20
+
+TIME_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+_current = ContextVar('trip_request_metrics', default=None)
+
+_IN_LIST = re.compile(r'\((?:\s*%s\s*,)+\s*%s\s*\)')
+_LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SPACES = re.compile(r'\s+')
+_SELECT_COLUMNS = re.compile(r'^SELECT .+? FROM ', re.DOTALL)
+
+
+def sql_signature(sql):
+    """
+    Consulta sem valores: listas IN de qualquer tamanho e literais viram "?"
+    """
+    sql = _IN_LIST.sub('(?)', sql)
+    sql = _LITERALS.sub('?', sql.replace('%s', '?'))
+    return _SPACES.sub(' ', sql).strip()
+
+
+def short_signature(signature, length=200):
+    """
+    Assinatura para exibir: sem a lista de colunas do SELECT
+    """
+    return _SELECT_COLUMNS.sub('SELECT ... FROM ', signature)[:length]
+
+
+class RequestMetrics:
+    """
+    O que uma requisição acumulou até agora
+    """
+    __slots__ = ('started', 'sql_count', 'sql_seconds', 'template_seconds', 'template_depth', 'signatures')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.template_seconds = 0.0
+        self.template_depth = 0
+        self.signatures = Counter()
+
+    def duplicates(self):
+        return {
+            signature: count for signature, count in self.signatures.items()
+            if count >= DUPLICATE_THRESHOLD
+        }
+
+
+def start_request():
+    metrics = RequestMetrics()
+    return metrics, _current.set(metrics)
+
+
+def finish_request(token):
+    _current.reset(token)
+
+
+def sql_wrapper(execute, sql, params, many, context):
+    """
+    execute_wrapper instalado em todas as conexões; fora de uma requisição
+    medida só repassa a chamada
+    """
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.sql_seconds += time.perf_counter() - started
+        metrics.sql_count += 1
+        metrics.signatures[sql] += 1
+
+
+def install_sql_wrapper(connection, **kwargs):
+    if sql_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(sql_wrapper)
+
+
+def instrument_templates():
+    """
+    Mede o tempo de render dos templates (só o de fora: extends/include
+    rodam dentro dele). Feito uma vez, quando o middleware é carregado.
+    """
+    from django.template.base import Template
+
+    if getattr(Template, '_trip_metrics', False):
+        return
+    original = Template._render
+
+    def _render(self, context):
+        metrics = _current.get()
+        if metrics is None:
+            return original(self, context)
+        metrics.template_depth += 1
+        started = time.perf_counter()
+        try:
+            return original(self, context)
+        finally:
+            metrics.template_depth -= 1
+            if metrics.template_depth == 0:
+                metrics.template_seconds += time.perf_counter() - started
+
+    Template._render = _render
+    Template._trip_metrics = True
+
+
+class RollingHistogram:
+    """
+    Histograma de uma janela deslizante: uma fatia de contadores por
+    intervalo de SLOT_SECONDS, somadas na hora de exportar
+    """
+
+    def __init__(self, buckets, window=WINDOW_SECONDS, slot=SLOT_SECONDS):
+        self.buckets = buckets
+        self.slot = slot
+        self.size = max(1, int(window // slot))
+        # Fatia: [época, contagens por bucket (+ infinito), soma]
+        self.slots = [[None, [0] * (len(buckets) + 1), 0.0] for _ in range(self.size)]
+
+    def _slot(self, now):
+        epoch = int(now // self.slot)
+        slot = self.slots[epoch % self.size]
+        if slot[0] != epoch:
+            slot[0] = epoch
+            slot[1] = [0] * (len(self.buckets) + 1)
+            slot[2] = 0.0
+        return slot
+
+    def observe(self, value, now=None):
+        slot = self._slot(time.time() if now is None else now)
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            index = len(self.buckets)
+        slot[1][index] += 1
+        slot[2] += value
+
+    def snapshot(self, now=None):
+        """
+        (contagens acumuladas por limite, total, soma) da janela atual
+        """
+        oldest = int((time.time() if now is None else now) // self.slot) - self.size + 1
+        counts = [0] * (len(self.buckets) + 1)
+        total_sum = 0.0
+        for epoch, slot_counts, slot_sum in self.slots:
+            if epoch is None or epoch < oldest:
+                continue
+            for index, count in enumerate(slot_counts):
+                counts[index] += count
+            total_sum += slot_sum
+        cumulative, running = [], 0
+        for count in counts:
+            running += count
+            cumulative.append(running)
+        return cumulative, running, total_sum
+
+
+class ViewMetrics:
+    def __init__(self):
+        self.duration = RollingHistogram(TIME_BUCKETS)
+        self.sql_seconds = RollingHistogram(TIME_BUCKETS)
+        self.template_seconds = RollingHistogram(TIME_BUCKETS)
+        self.sql_queries = RollingHistogram(COUNT_BUCKETS)
+        self.requests = 0
+        self.slow_requests = 0
+        self.nplusone = Counter()
+
+
+class MetricsRegistry:
+    """
+    Métricas agregadas do processo, por nome de URL
+    """
+    HISTOGRAMS = (
+        ('duration', 'trip_request_duration_seconds', 'Tempo total da requisição'),
+        ('sql_seconds', 'trip_request_sql_seconds', 'Tempo gasto em SQL por requisição'),
+        ('template_seconds', 'trip_request_template_seconds', 'Tempo de render de templates por requisição'),
+        ('sql_queries', 'trip_request_sql_queries', 'Consultas SQL por requisição'),
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.views = {}
+
+    def record(self, view, metrics, total_seconds, slow=False, now=None):
+        duplicates = metrics.duplicates()
+        with self._lock:
+            entry = self.views.get(view)
+            if entry is None:
+                entry = self.views[view] = ViewMetrics()
+            entry.requests += 1
+            entry.slow_requests += slow
+            entry.duration.observe(total_seconds, now)
+            entry.sql_seconds.observe(metrics.sql_seconds, now)
+            entry.template_seconds.observe(metrics.template_seconds, now)
+            entry.sql_queries.observe(metrics.sql_count, now)
+            for signature in duplicates:
+                entry.nplusone[sql_signature(signature)] += 1
+            # Mantém só as assinaturas mais frequentes
+            if len(entry.nplusone) > MAX_SIGNATURES:
+                entry.nplusone = Counter(dict(entry.nplusone.most_common(MAX_SIGNATURES)))
+
+    def reset(self):
+        with self._lock:
+            self.views = {}
+
+    def render_prometheus(self, now=None):
+        """
+        Formato texto do Prometheus (histogramas da janela + contadores)
+        """
+        lines = []
+        with self._lock:
+            views = sorted(self.views.items())
+            for attribute, name, help_text in self.HISTOGRAMS:
+                lines.append(f'# HELP {name} {help_text} (janela de {WINDOW_SECONDS}s).')
+                lines.append(f'# TYPE {name} histogram')
+                for view, entry in views:
+                    histogram = getattr(entry, attribute)
+                    cumulative, count, total_sum = histogram.snapshot(now)
+                    label = _label(view)
+                    for bound, value in zip(histogram.buckets, cumulative):
+                        lines.append(f'{name}_bucket{{view="{label}",le="{bound}"}} {value}')
+                    lines.append(f'{name}_bucket{{view="{label}",le="+Inf"}} {count}')
+                    lines.append(f'{name}_sum{{view="{label}"}} {total_sum:.6f}')
+                    lines.append(f'{name}_count{{view="{label}"}} {count}')
+
+            lines.append('# HELP trip_requests_total Requisições medidas desde o início do processo.')
+            lines.append('# TYPE trip_requests_total counter')
+            for view, entry in views:
+                lines.append(f'trip_requests_total{{view="{_label(view)}"}} {entry.requests}')
+            lines.append(f'# HELP trip_slow_requests_total Requisições acima de {SLOW_REQUEST_MS} ms.')
+            lines.append('# TYPE trip_slow_requests_total counter')
+            for view, entry in views:
+                lines.append(f'trip_slow_requests_total{{view="{_label(view)}"}} {entry.slow_requests}')
+            lines.append('# HELP trip_nplusone_requests_total Requisições que repetiram a mesma consulta '
+                         f'{DUPLICATE_THRESHOLD} vezes ou mais, por assinatura.')
+            lines.append('# TYPE trip_nplusone_requests_total counter')
+            for view, entry in views:
+                for signature, count in entry.nplusone.most_common():
+                    digest = hashlib.md5(signature.encode()).hexdigest()[:12]
+                    lines.append(
+                        f'trip_nplusone_requests_total{{view="{_label(view)}",signature="{digest}",'
+                        f'sql="{_label(short_signature(signature))}"}} {count}'
+                    )
+        return '\n'.join(lines) + '\n'
+
+
+def _label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+
+
+registry = MetricsRegistry()
+
+
+def metrics_view(request):
+    """
+    Métricas no formato do Prometheus. Com TRIP_METRICS_TOKEN exige
+    "Authorization: Bearer <token>"; sem ele, só usuários staff.
+    """
+    token = getattr(settings, 'TRIP_METRICS_TOKEN', None)
+    if token:
+        allowed = request.headers.get('Authorization', '') == f'Bearer {token}'
+    else:
+        allowed = request.user.is_authenticated and request.user.is_staff
+    if not allowed:
+        return HttpResponse('Acesso negado.\n', status=403, content_type='text/plain')
+    return HttpResponse(registry.render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
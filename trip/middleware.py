@@ -0,0 +1,70 @@
+# Middleware opcional de métricas por requisição (ver trip/metrics.py)
+import logging
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from . import metrics
+
+slow_logger = logging.getLogger('trip.metrics.slow')
+
+
+class RequestMetricsMiddleware:
+    """
+    Conta consultas e mede SQL, templates e tempo total de cada requisição,
+    agregando por nome de URL. Para ativar, inclua
+    'trip.middleware.RequestMetricsMiddleware' no início do MIDDLEWARE.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+        metrics.instrument_templates()
+        connection_created.connect(metrics.install_sql_wrapper, dispatch_uid='trip_metrics_sql')
+        for connection in connections.all(initialized_only=True):
+            metrics.install_sql_wrapper(connection)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        request_metrics, token = metrics.start_request()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.finish_request(token)
+        self.record(request, request_metrics)
+        return response
+
+    async def __acall__(self, request):
+        request_metrics, token = metrics.start_request()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.finish_request(token)
+        self.record(request, request_metrics)
+        return response
+
+    def record(self, request, request_metrics):
+        total = time.perf_counter() - request_metrics.started
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name if match else None) or 'unresolved'
+        slow = total * 1000 >= metrics.SLOW_REQUEST_MS
+        metrics.registry.record(view, request_metrics, total, slow=slow)
+        if slow:
+            duplicates = request_metrics.duplicates()
+            slow_logger.warning(
+                '%s %s (%s) levou %.0f ms: %d consultas em %.0f ms, templates %.0f ms%s',
+                request.method, request.path, view, total * 1000,
+                request_metrics.sql_count, request_metrics.sql_seconds * 1000,
+                request_metrics.template_seconds * 1000,
+                ''.join(
+                    f'\n  N+1 ({count}x): {metrics.short_signature(metrics.sql_signature(sql), 300)}'
+                    for sql, count in sorted(duplicates.items(), key=lambda item: -item[1])
+                ),
+            )
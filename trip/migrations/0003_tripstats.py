@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('trip', '0002_activity_itinerary_itineraryactivity'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TripStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='trip_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('trip_count', models.IntegerField(default=0)),
+                ('dated_trip_count', models.IntegerField(default=0)),
+                ('duration_days_sum', models.IntegerField(default=0)),
+                ('itinerary_count', models.IntegerField(default=0)),
+                ('budget_count', models.IntegerField(default=0)),
+                ('budget_sum', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('draft_count', models.IntegerField(default=0)),
+                ('published_count', models.IntegerField(default=0)),
+                ('completed_count', models.IntegerField(default=0)),
+                ('cancelled_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Estatística de Viagens',
+                'verbose_name_plural': 'Estatísticas de Viagens',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trip', '0003_tripstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='destination',
+            name='renditions',
+            field=models.JSONField(blank=True, default=dict, editable=False, verbose_name='Versões da Imagem'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trip', '0004_destination_renditions'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='destination',
+            name='trip_destin_arrival_158b5c_idx',
+        ),
+        migrations.AddIndex(
+            model_name='destination',
+            index=models.Index(fields=['name', 'id'], name='trip_destin_name_840df0_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='destination',
+            index=models.Index(fields=['created_at', 'id'], name='trip_destin_created_112a75_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='destination',
+            index=models.Index(fields=['arrival_date', 'id'], name='trip_destin_arrival_20e16d_idx'),
+        ),
+    ]
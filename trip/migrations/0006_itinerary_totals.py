@@ -0,0 +1,75 @@
+# Generated by Django 5.2.18 on 2026-10-17 06:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def fill_totals(apps, schema_editor):
+    """
+    Calcula os totais dos itinerários que já têm atividades programadas
+    """
+    ItineraryActivity = apps.get_model('trip', 'ItineraryActivity')
+    Itinerary = apps.get_model('trip', 'Itinerary')
+    ItineraryDay = apps.get_model('trip', 'ItineraryDay')
+    rows = (
+        ItineraryActivity.objects.order_by()
+        .values('itinerary_id', 'day_number')
+        .annotate(count=Count('id'), cost=Sum('activity__price'), hours=Sum('activity__duration_hours'))
+    )
+    totals = {}
+    days = []
+    for row in rows.iterator(chunk_size=2000):
+        cost, hours = row['cost'] or 0, row['hours'] or 0
+        days.append(ItineraryDay(
+            itinerary_id=row['itinerary_id'], day_number=row['day_number'],
+            activity_count=row['count'], cost=cost, hours=hours,
+        ))
+        count_sum, cost_sum, hours_sum = totals.get(row['itinerary_id'], (0, 0, 0))
+        totals[row['itinerary_id']] = (count_sum + row['count'], cost_sum + cost, hours_sum + hours)
+    ItineraryDay.objects.bulk_create(days, batch_size=1000)
+    for itinerary_id, (count, cost, hours) in totals.items():
+        Itinerary.objects.filter(pk=itinerary_id).update(
+            activity_count=count, activity_cost=cost, activity_hours=hours,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trip', '0005_destination_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='itinerary',
+            name='activity_cost',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='itinerary',
+            name='activity_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='itinerary',
+            name='activity_hours',
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=8),
+        ),
+        migrations.CreateModel(
+            name='ItineraryDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day_number', models.PositiveIntegerField()),
+                ('activity_count', models.IntegerField(default=0)),
+                ('cost', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('hours', models.DecimalField(decimal_places=2, default=0, max_digits=6)),
+                ('itinerary', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='day_totals', to='trip.itinerary')),
+            ],
+            options={
+                'ordering': ['day_number'],
+                'unique_together': {('itinerary', 'day_number')},
+            },
+        ),
+        migrations.RunPython(fill_totals, migrations.RunPython.noop),
+    ]
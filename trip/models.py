@@ -1,15 +1,58 @@
 # models.py
 from django.utils import timezone 
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import IntegrityError, models, transaction
 from django.urls import reverse
-from django.utils.text import slugify
 from django.core.validators import MinValueValidator, MaxValueValidator
-from PIL import Image
-import os
 
+from .media import queue_file_deletion
 
-class Trip(models.Model):
+SLUG_SAVE_ATTEMPTS = 5
+
+
+class LoadedValuesMixin:
+    """
+    Guarda os valores lidos do banco para que sinais possam comparar o
+    estado anterior no save sem uma nova consulta
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: value for name, value in zip(field_names, values)
+            if value is not models.DEFERRED
+        }
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_values = {
+            field.attname: getattr(self, field.attname)
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+        }
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        # Os valores relidos passam a ser o estado anterior do próximo save
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        loaded = getattr(self, '_loaded_values', {})
+        for field in self._meta.concrete_fields:
+            if field.attname in self.__dict__ and (fields is None or field.attname in fields or field.name in fields):
+                loaded[field.attname] = getattr(self, field.attname)
+        self._loaded_values = loaded
+
+    def loaded_values(self, *attnames):
+        """
+        Valores que estavam no banco antes do save; None se algum não foi carregado
+        """
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None or any(name not in loaded for name in attnames):
+            return None
+        return {name: loaded[name] for name in attnames}
+
+
+class Trip(LoadedValuesMixin, models.Model):
     """
     Modelo para representar uma viagem
     """
@@ -29,7 +72,7 @@ class Trip(models.Model):
         return self.name
 
 
-class Destination(models.Model):
+class Destination(LoadedValuesMixin, models.Model):
     """
     Modelo para representar um destino
     """
@@ -78,6 +121,8 @@ class Destination(models.Model):
         verbose_name="Imagem"
     )
     description = models.TextField(blank=True, verbose_name="Descrição")
+    # Versões geradas pelo pipeline de imagens (nome -> caminho no storage)
+    renditions = models.JSONField(default=dict, blank=True, editable=False, verbose_name="Versões da Imagem")
     
     # Timestamps
     created_at = models.DateTimeField(default=timezone.now)
@@ -90,42 +135,65 @@ class Destination(models.Model):
         indexes = [
             models.Index(fields=['slug']),
             models.Index(fields=['city', 'country']),
-            models.Index(fields=['arrival_date']),
+            # Paginação por chave da lista de destinos: (coluna, id)
+            models.Index(fields=['name', 'id']),
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['arrival_date', 'id']),
         ]
     
     def __str__(self):
         return self.name
     
     def save(self, *args, **kwargs):
+        # Imagem nova (ainda não gravada no storage) ou removida: versões antigas não valem mais
+        new_upload = bool(self.image) and not self.image._committed
+        if new_upload or (not self.image and self.renditions):
+            stale_renditions, self.renditions = self.renditions, {}
+        else:
+            stale_renditions = None
+
         # Auto-gerar slug se não fornecido
-        if not self.slug:
-            self.slug = slugify(self.name)
-            
-            # Garantir que o slug seja único
-            counter = 1
-            original_slug = self.slug
-            while Destination.objects.filter(slug=self.slug).exists():
-                self.slug = f"{original_slug}-{counter}"
-                counter += 1
-        
-        super().save(*args, **kwargs)
+        if self.slug:
+            super().save(*args, **kwargs)
+        else:
+            self._save_with_generated_slug(*args, **kwargs)
         
-        # Redimensionar imagem se necessário
-        if self.image:
-            self.resize_image()
+        # As versões da imagem são geradas em segundo plano depois do commit
+        if new_upload:
+            from .images import schedule_renditions
+            pk, image_name = self.pk, self.image.name
+            transaction.on_commit(lambda: schedule_renditions(pk, image_name))
+        if stale_renditions:
+            queue_file_deletion(stale_renditions.values())
+    
+    def _save_with_generated_slug(self, *args, **kwargs):
+        """
+        Gera o slug com uma consulta e, se outra gravação concorrente pegar o
+        mesmo slug antes do INSERT, tenta de novo com o próximo livre
+        """
+        from .slugs import allocate_slug
+
+        for attempt in range(SLUG_SAVE_ATTEMPTS):
+            self.slug = allocate_slug(Destination, self.name, exclude_pk=self.pk)
+            try:
+                with transaction.atomic():
+                    super().save(*args, **kwargs)
+                return
+            except IntegrityError:
+                taken = Destination.objects.filter(slug=self.slug).exclude(pk=self.pk).exists()
+                self.slug = ''
+                if not taken or attempt == SLUG_SAVE_ATTEMPTS - 1:
+                    raise
     
-    def resize_image(self):
+    def rendition_url(self, name):
         """
-        Redimensiona a imagem para otimizar o armazenamento
+        URL de uma versão da imagem (ex.: 'thumbnail', 'card_webp');
+        enquanto ela não existe, usa a imagem original
         """
-        if self.image:
-            img = Image.open(self.image.path)
-            
-            # Redimensionar se a imagem for muito grande
-            max_size = (800, 600)
-            if img.size[0] > max_size[0] or img.size[1] > max_size[1]:
-                img.thumbnail(max_size, Image.Resampling.LANCZOS)
-                img.save(self.image.path, optimize=True, quality=85)
+        path = (self.renditions or {}).get(name)
+        if path:
+            return self.image.storage.url(path)
+        return self.image.url if self.image else ''
     
     def get_absolute_url(self):
         """
@@ -176,39 +244,33 @@ class Destination(models.Model):
                 'latitude': 'Longitude e latitude devem ser fornecidas juntas.'
             })
     
-    def delete(self, *args, **kwargs):
-        """
-        Remove a imagem do arquivo ao deletar o destino
-        """
-        if self.image:
-            if os.path.isfile(self.image.path):
-                os.remove(self.image.path)
-        super().delete(*args, **kwargs)
-
 
 # Sinal para limpar imagens órfãs
 from django.db.models.signals import pre_save, post_delete
 from django.dispatch import receiver
 
 @receiver(pre_save, sender=Destination)
-def delete_old_image(sender, instance, **kwargs):
+def delete_old_image(sender, instance, raw=False, **kwargs):
     """
     Remove a imagem antiga quando uma nova é carregada
     """
-    if instance.pk:
-        try:
-            old_instance = Destination.objects.get(pk=instance.pk)
-            if old_instance.image and old_instance.image != instance.image:
-                if os.path.isfile(old_instance.image.path):
-                    os.remove(old_instance.image.path)
-        except Destination.DoesNotExist:
-            pass
+    if raw or not instance.pk:
+        return
+    loaded = instance.loaded_values('image')
+    if loaded is not None:
+        old_image = loaded['image']
+    else:
+        # Só consulta quando a instância não veio do banco
+        old_image = Destination.objects.filter(pk=instance.pk).values_list('image', flat=True).first()
+    if old_image and old_image != instance.image.name:
+        queue_file_deletion([old_image])
 
 class Country(models.Model):
     name = models.CharField(max_length=100)
     code = models.CharField(max_length=2)
     currency = models.CharField(max_length=3)
     language = models.CharField(max_length=50)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -218,6 +280,7 @@ class Country(models.Model):
     code = models.CharField(max_length=2)
     currency = models.CharField(max_length=3)
     language = models.CharField(max_length=50)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.name
@@ -231,6 +294,7 @@ class City(models.Model):
     # Coordenadas geográficas para mapa
     latitude = models.FloatField(null=True, blank=True)
     longitude = models.FloatField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         verbose_name_plural = 'Cities'    
@@ -264,13 +328,14 @@ class Transportation(models.Model):
 @receiver(post_delete, sender=Destination)
 def delete_image_on_delete(sender, instance, **kwargs):
     """
-    Remove a imagem quando o destino é deletado
+    Remove a imagem e suas versões quando o destino é deletado
     """
-    if instance.image:
-        if os.path.isfile(instance.image.path):
-            os.remove(instance.image.path)
+    queue_file_deletion([instance.image.name, *(instance.renditions or {}).values()])
+
+TOTAL_FIELDS = ('activity_count', 'activity_cost', 'activity_hours')
 
-class Itinerary(models.Model):
+
+class Itinerary(LoadedValuesMixin, models.Model):
     STATUS_CHOICES = [
         ('draft', 'Rascunho'),
         ('published', 'Publicado'),
@@ -287,6 +352,10 @@ class Itinerary(models.Model):
     budget = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='draft')
     is_public = models.BooleanField(default=False)
+    # Totais das atividades programadas, mantidos por sinais (trip/totals.py)
+    activity_count = models.IntegerField(default=0)
+    activity_cost = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    activity_hours = models.DecimalField(max_digits=8, decimal_places=2, default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -295,12 +364,36 @@ class Itinerary(models.Model):
     
     def __str__(self):
         return f"{self.title} - {self.user.username}"
+
+    def save(self, *args, **kwargs):
+        # Os totais só mudam pelos UPDATEs de trip/totals.py: o save de uma
+        # instância lida antes gravaria os valores antigos por cima
+        if not self._state.adding and not kwargs.get('force_insert') and kwargs.get('update_fields') is None:
+            deferred = self.get_deferred_fields()
+            kwargs['update_fields'] = [
+                field.attname for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in TOTAL_FIELDS and field.attname not in deferred
+            ]
+        super().save(*args, **kwargs)
     
     @property
     def total_days(self):
         return (self.end_date - self.start_date).days + 1      
 
-class Activity(models.Model):
+    @property
+    def remaining_budget(self):
+        if self.budget is None:
+            return None
+        return self.budget - self.activity_cost
+
+    def hours_per_day(self):
+        """
+        {dia: horas}; use prefetch_related('day_totals') em listagens
+        """
+        return {day.day_number: day.hours for day in self.day_totals.all()}
+
+
+class Activity(LoadedValuesMixin, models.Model):
     """Modelo para uma atividade em um destino"""
     CATEGORY_CHOICES = [
         ('museum', 'Museu'),
@@ -334,7 +427,7 @@ class Activity(models.Model):
     def __str__(self):
         return f"{self.name} - {self.city.name}"          
 
-class ItineraryActivity(models.Model):
+class ItineraryActivity(LoadedValuesMixin, models.Model):
     """Tabela intermediária para relacionar itinerário com atividades"""
     itinerary = models.ForeignKey(Itinerary, on_delete=models.CASCADE)
     activity = models.ForeignKey(Activity, on_delete=models.CASCADE)
@@ -350,3 +443,72 @@ class ItineraryActivity(models.Model):
     
     def __str__(self):
         return f"{self.itinerary.title} - Dia {self.day_number} - {self.activity.name}"
+
+
+class ItineraryDay(models.Model):
+    """
+    Totais de um dia do itinerário, mantidos junto com os de Itinerary;
+    use o comando rebuild_itinerary_totals para recalcular do zero.
+    """
+    itinerary = models.ForeignKey(Itinerary, on_delete=models.CASCADE, related_name='day_totals')
+    day_number = models.PositiveIntegerField()
+    activity_count = models.IntegerField(default=0)
+    cost = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    hours = models.DecimalField(max_digits=6, decimal_places=2, default=0)
+
+    class Meta:
+        unique_together = ['itinerary', 'day_number']
+        ordering = ['day_number']
+
+    def __str__(self):
+        return f"Dia {self.day_number} do itinerário {self.itinerary_id}"
+
+
+class TripStats(models.Model):
+    """
+    Estatísticas de viagens e itinerários por usuário.
+
+    Mantida por sinais (trip/stats.py) aplicando apenas a diferença de cada
+    alteração; use o comando rebuild_trip_stats para recalcular do zero.
+    """
+    STATUS_FIELDS = {status: f'{status}_count' for status, _label in Itinerary.STATUS_CHOICES}
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='trip_stats')
+    trip_count = models.IntegerField(default=0)
+    dated_trip_count = models.IntegerField(default=0)
+    duration_days_sum = models.IntegerField(default=0)
+    itinerary_count = models.IntegerField(default=0)
+    budget_count = models.IntegerField(default=0)
+    budget_sum = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    draft_count = models.IntegerField(default=0)
+    published_count = models.IntegerField(default=0)
+    completed_count = models.IntegerField(default=0)
+    cancelled_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Estatística de Viagens"
+        verbose_name_plural = "Estatísticas de Viagens"
+
+    def __str__(self):
+        return f"Estatísticas de {self.user_id}"
+
+    @property
+    def avg_duration(self):
+        if not self.dated_trip_count:
+            return 0
+        return self.duration_days_sum / self.dated_trip_count
+
+    @property
+    def avg_budget(self):
+        if not self.budget_count:
+            return 0
+        return self.budget_sum / self.budget_count
+
+    @property
+    def status_counts(self):
+        return {
+            status: getattr(self, field)
+            for status, field in self.STATUS_FIELDS.items()
+            if getattr(self, field)
+        }
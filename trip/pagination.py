@@ -0,0 +1,251 @@
+# Paginação por chave (keyset/seek) e contagens aproximadas
+import base64
+import hashlib
+import json
+from decimal import Decimal
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import F, Q
+from django.utils.functional import cached_property
+
+COUNT_TIMEOUT = getattr(settings, 'TRIP_COUNT_CACHE_TIMEOUT', 60 * 5)
+# Abaixo disso a estimativa do banco não compensa; conta de verdade
+ESTIMATE_THRESHOLD = 100000
+
+# Bancos que põem os nulos antes dos outros valores na ordem crescente
+NULLS_FIRST_VENDORS = ('mysql', 'sqlite')
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _cursor_value(value):
+    # Datas com precisão total (o DjangoJSONEncoder corta os microssegundos)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(values):
+    data = json.dumps([_cursor_value(value) for value in values], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def decode_cursor(token):
+    try:
+        data = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except ValueError:
+        raise InvalidCursor('Cursor inválido.')
+    if not isinstance(data, list) or len(data) != 2:
+        raise InvalidCursor('Cursor inválido.')
+    return data
+
+
+def _value(row, field):
+    return row[field] if isinstance(row, dict) else getattr(row, field)
+
+
+def _seek(field, value, last_id, descending, nulls=None):
+    """
+    Condição das linhas que vêm depois de (value, last_id) na ordenação
+    (field, id), ambos na mesma direção. `nulls` diz onde ficam os nulos
+    ('first' ou 'last'); None quando o campo não aceita nulos.
+    """
+    op = 'lt' if descending else 'gt'
+    if field == 'id':
+        return Q(**{f'id__{op}': last_id})
+    if value is None:
+        condition = Q(**{f'{field}__isnull': True, f'id__{op}': last_id})
+        if nulls == 'first':
+            condition |= Q(**{f'{field}__isnull': False})
+        return condition
+    condition = Q(**{f'{field}__{op}': value}) | Q(**{field: value, f'id__{op}': last_id})
+    if nulls == 'last':
+        condition |= Q(**{f'{field}__isnull': True})
+    return condition
+
+
+class KeysetPage:
+    """
+    Página de resultados com cursores para a próxima e a anterior
+    """
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None, count=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+        self.count = count
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+def keyset_paginate(queryset, ordering, after=None, before=None, limit=20, nullable=False):
+    """
+    Pagina `queryset` ordenado por `ordering` ('campo' ou '-campo') com o id
+    como desempate. Cada página é uma busca no índice (campo, id), sem
+    OFFSET nem COUNT. `after`/`before` são cursores devolvidos em páginas
+    anteriores.
+
+    Com nullable=True os nulos ficam no fim, em qualquer direção. No MySQL
+    (e no SQLite) esse NULLS LAST vira um "campo IS NULL" no ORDER BY, que
+    não usa o índice (campo, id); lá os nulos ficam onde o banco os põe:
+    no início na ordem crescente, no fim na decrescente.
+    """
+    seek = _KeysetSeek(queryset, ordering, after, before, limit, nullable)
+    return seek.page(list(seek.queryset))
+
+
+async def akeyset_paginate(queryset, ordering, after=None, before=None, limit=20, nullable=False):
+    """
+    keyset_paginate com o ORM assíncrono
+    """
+    seek = _KeysetSeek(queryset, ordering, after, before, limit, nullable)
+    return seek.page([row async for row in seek.queryset])
+
+
+class _KeysetSeek:
+    """
+    Consulta de uma página (limit + 1 linhas) e montagem do KeysetPage,
+    separadas para servir às versões síncrona e assíncrona
+    """
+
+    def __init__(self, queryset, ordering, after, before, limit, nullable):
+        descending = ordering.startswith('-')
+        self.field = field = ordering.lstrip('-')
+        self.limit = limit
+        self.backwards = bool(before) and not after
+        self.cursor = cursor = before if self.backwards else after
+        # Para voltar, percorre a ordenação invertida e desfaz no final
+        direction = descending != self.backwards
+        nulls = None
+        native_nulls = connections[queryset.db].vendor in NULLS_FIRST_VENDORS
+        if nullable and native_nulls:
+            nulls = 'last' if direction else 'first'
+        elif nullable:
+            nulls = 'first' if self.backwards else 'last'
+
+        id_order = F('id').desc() if direction else F('id').asc()
+        if field == 'id':
+            order = [id_order]
+        else:
+            expression = F(field).desc if direction else F(field).asc
+            if nulls and not native_nulls:
+                order = [expression(**{f'nulls_{nulls}': True}), id_order]
+            else:
+                order = [expression(), id_order]
+        queryset = queryset.order_by(*order)
+
+        if cursor:
+            value, last_id = decode_cursor(cursor)
+            queryset = queryset.filter(_seek(field, value, last_id, direction, nulls))
+        self.queryset = queryset[:limit + 1]
+
+    def cursor_for(self, row):
+        return encode_cursor([_value(row, self.field), _value(row, 'id')])
+
+    def page(self, rows):
+        more = len(rows) > self.limit
+        rows = rows[:self.limit]
+        if self.backwards:
+            rows.reverse()
+
+        next_cursor = previous_cursor = None
+        if rows:
+            if self.backwards:
+                next_cursor = self.cursor_for(rows[-1])
+                previous_cursor = self.cursor_for(rows[0]) if more else None
+            else:
+                next_cursor = self.cursor_for(rows[-1]) if more else None
+                previous_cursor = self.cursor_for(rows[0]) if self.cursor else None
+        return KeysetPage(rows, next_cursor, previous_cursor)
+
+
+def _estimated_rows(queryset):
+    """
+    Estimativa de linhas da tabela inteira: do planejador no PostgreSQL,
+    das estatísticas do InnoDB no MySQL; None nos demais bancos
+    """
+    connection = connections[queryset.db]
+    table = queryset.model._meta.db_table
+    if connection.vendor == 'postgresql':
+        sql = 'SELECT reltuples FROM pg_class WHERE oid = %s::regclass'
+    elif connection.vendor == 'mysql':
+        # TABLE_ROWS é a estimativa do InnoDB (pode errar em 40-50%)
+        sql = 'SELECT TABLE_ROWS FROM information_schema.TABLES WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s'
+    else:
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [table])
+        row = cursor.fetchone()
+    return int(row[0]) if row and row[0] and row[0] > 0 else None
+
+
+def _count_key(queryset):
+    return 'trip:count:' + hashlib.md5(str(queryset.query).encode()).hexdigest()
+
+
+def approximate_count(queryset, timeout=COUNT_TIMEOUT):
+    """
+    Total aproximado de `queryset`, guardado no cache por alguns minutos.
+    Sem filtros, tabelas grandes no PostgreSQL e no MySQL usam a estimativa
+    do banco em vez de COUNT(*).
+    """
+    queryset = queryset.order_by()
+    key = _count_key(queryset)
+    count = cache.get(key)
+    if count is None:
+        if not queryset.query.where:
+            estimate = _estimated_rows(queryset)
+            if estimate is not None and estimate >= ESTIMATE_THRESHOLD:
+                count = estimate
+        if count is None:
+            count = queryset.count()
+        cache.set(key, count, timeout)
+    return count
+
+
+async def aapproximate_count(queryset, timeout=COUNT_TIMEOUT):
+    """
+    approximate_count com cache e ORM assíncronos
+    """
+    queryset = queryset.order_by()
+    key = _count_key(queryset)
+    count = await cache.aget(key)
+    if count is None:
+        if not queryset.query.where:
+            estimate = await sync_to_async(_estimated_rows)(queryset)
+            if estimate is not None and estimate >= ESTIMATE_THRESHOLD:
+                count = estimate
+        if count is None:
+            count = await queryset.acount()
+        await cache.aset(key, count, timeout)
+    return count
+
+
+class ApproximateCountPaginator(Paginator):
+    """
+    Paginator que usa approximate_count no total (ex.: changelists do admin)
+    """
+
+    @cached_property
+    def count(self):
+        return approximate_count(self.object_list)
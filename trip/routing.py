@@ -0,0 +1,420 @@
+# Planejador de rotas sobre o grafo de Transportation
+import heapq
+import threading
+from array import array
+from collections import deque
+
+import numpy as np
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Transportation
+from .signals import bulk_changed
+from .versions import SharedVersion, bump_version
+
+
+TRANSPORT_CODES = {code: index for index, (code, _label) in enumerate(Transportation.TRANSPORT_TYPES)}
+TRANSPORT_NAMES = [code for code, _label in Transportation.TRANSPORT_TYPES]
+
+CRITERIA = ('pareto', 'price', 'duration', 'legs')
+DEFAULT_MAX_LEGS = 4
+
+INF = float('inf')
+
+
+def _view(values, dtype):
+    """
+    Visão numpy (sem cópia) de um array da biblioteca padrão
+    """
+    if not values:
+        return np.zeros(0, dtype=dtype)
+    return np.frombuffer(values, dtype=dtype)
+
+
+def _to_array(typecode, values):
+    result = array(typecode)
+    result.frombytes(np.ascontiguousarray(values).tobytes())
+    return result
+
+
+class RouteGraph(SharedVersion):
+    """
+    Grafo compacto das ligações de transporte entre cidades.
+
+    As arestas ficam em arrays (formato CSR) indexados por um índice denso
+    de cidades; alterações feitas depois da carga vão para uma camada de
+    sobreposição até que o grafo seja reconstruído. Os outros processos
+    recarregam pela versão compartilhada (SharedVersion).
+    """
+    version_name = 'index:routes'
+
+    # Reconstruir quando a sobreposição passar desta fração das arestas
+    OVERLAY_REBUILD_RATIO = 0.05
+    OVERLAY_REBUILD_MIN = 1000
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._reset()
+
+    def _reset(self):
+        self.city_index = {}
+        self.city_ids = array('q')
+        self.offsets = array('q', [0])
+        self.sources = array('q')
+        self.targets = array('q')
+        self.prices = array('d')
+        self.durations = array('d')
+        self.modes = array('b')
+        self.leg_ids = array('q')
+        # Sobreposição: pernas novas/alteradas e pernas removidas da base
+        self.overlay = {}
+        self.overlay_by_origin = {}
+        self.removed = set()
+
+    def _node(self, city_id):
+        index = self.city_index.get(city_id)
+        if index is None:
+            index = len(self.city_ids)
+            self.city_index[city_id] = index
+            self.city_ids.append(city_id)
+        return index
+
+    def load(self):
+        """
+        Carrega todas as ligações do banco em uma única consulta
+        """
+        rows = (
+            Transportation.objects
+            .order_by()
+            .values_list('id', 'origin_id', 'destination_id', 'price_min', 'duration_hours', 'transport_type')
+            .iterator(chunk_size=10000)
+        )
+        with self._lock:
+            self._reset()
+            self.start_load()
+            sources = array('q')
+            targets = array('q')
+            prices = array('d')
+            durations = array('d')
+            modes = array('b')
+            leg_ids = array('q')
+            node = self._node
+            other = TRANSPORT_CODES['OTHER']
+            for leg_id, origin_id, destination_id, price, duration, transport_type in rows:
+                sources.append(node(origin_id))
+                targets.append(node(destination_id))
+                prices.append(float(price))
+                durations.append(float(duration))
+                modes.append(TRANSPORT_CODES.get(transport_type, other))
+                leg_ids.append(leg_id)
+
+            # Ordenar as arestas pela cidade de origem (CSR)
+            source_view = _view(sources, np.int64)
+            order = np.argsort(source_view, kind='stable')
+            offsets = np.zeros(len(self.city_ids) + 1, dtype=np.int64)
+            np.cumsum(np.bincount(source_view, minlength=len(self.city_ids)), out=offsets[1:])
+
+            self.offsets = _to_array('q', offsets)
+            self.sources = _to_array('q', source_view[order])
+            self.targets = _to_array('q', _view(targets, np.int64)[order])
+            self.prices = _to_array('d', _view(prices, np.float64)[order])
+            self.durations = _to_array('d', _view(durations, np.float64)[order])
+            self.modes = _to_array('b', _view(modes, np.int8)[order])
+            self.leg_ids = _to_array('q', _view(leg_ids, np.int64)[order])
+            self._loaded = True
+
+    def ensure_loaded(self):
+        if not self.is_current():
+            with self._lock:
+                if not self.is_current():
+                    self.load()
+
+    def invalidate(self):
+        """
+        Descarta o grafo em todos os processos; a próxima consulta recarrega do banco
+        """
+        with self._lock:
+            bump_version(self.version_name)
+            self._loaded = False
+            self._reset()
+
+    @property
+    def edge_count(self):
+        return len(self.targets) - len(self.removed) + len(self.overlay)
+
+    def _maybe_rebuild(self):
+        limit = max(self.OVERLAY_REBUILD_MIN, int(len(self.targets) * self.OVERLAY_REBUILD_RATIO))
+        if len(self.overlay) + len(self.removed) > limit:
+            self._loaded = False
+
+    def upsert_leg(self, leg):
+        """
+        Adiciona ou atualiza uma ligação sem reconstruir o grafo
+        """
+        with self._lock:
+            if not self.advance():
+                return
+            self._discard_overlay(leg.pk)
+            self.removed.add(leg.pk)
+            source = self._node(leg.origin_id)
+            self.overlay[leg.pk] = (
+                source,
+                self._node(leg.destination_id),
+                float(leg.price_min),
+                float(leg.duration_hours),
+                TRANSPORT_CODES.get(leg.transport_type, TRANSPORT_CODES['OTHER']),
+            )
+            self.overlay_by_origin.setdefault(source, []).append(leg.pk)
+            self._maybe_rebuild()
+
+    def remove_leg(self, leg_id):
+        """
+        Remove uma ligação sem reconstruir o grafo
+        """
+        with self._lock:
+            if not self.advance():
+                return
+            self._discard_overlay(leg_id)
+            self.removed.add(leg_id)
+            self._maybe_rebuild()
+
+    def _discard_overlay(self, leg_id):
+        edge = self.overlay.pop(leg_id, None)
+        if edge is not None:
+            self.overlay_by_origin[edge[0]].remove(leg_id)
+
+    def _edges(self, node, allowed_modes):
+        """
+        Itera (destino, preço, duração, modo, id) das ligações que saem de um nó
+        """
+        if node + 1 < len(self.offsets):
+            removed = self.removed
+            targets, prices, durations, modes, leg_ids = (
+                self.targets, self.prices, self.durations, self.modes, self.leg_ids
+            )
+            for slot in range(self.offsets[node], self.offsets[node + 1]):
+                if removed and leg_ids[slot] in removed:
+                    continue
+                if allowed_modes is not None and modes[slot] not in allowed_modes:
+                    continue
+                yield targets[slot], prices[slot], durations[slot], modes[slot], leg_ids[slot]
+        for leg_id in self.overlay_by_origin.get(node, ()):
+            _source, target, price, duration, mode = self.overlay[leg_id]
+            if allowed_modes is not None and mode not in allowed_modes:
+                continue
+            yield target, price, duration, mode, leg_id
+
+    def _lower_bounds(self, target, max_legs, allowed_modes):
+        """
+        Menor preço e menor duração até o destino usando no máximo k trechos,
+        para k = 0..max_legs (Bellman-Ford vetorizado e limitado por saltos).
+        Trechos removidos continuam no cálculo, o que só afrouxa os limites.
+        """
+        sources = _view(self.sources, np.int64)
+        targets = _view(self.targets, np.int64)
+        prices = _view(self.prices, np.float64)
+        durations = _view(self.durations, np.float64)
+        if allowed_modes is not None:
+            mask = np.isin(_view(self.modes, np.int8), list(allowed_modes))
+            sources, targets, prices, durations = sources[mask], targets[mask], prices[mask], durations[mask]
+        extra = [edge for edge in self.overlay.values() if allowed_modes is None or edge[4] in allowed_modes]
+        if extra:
+            columns = list(zip(*extra))
+            sources = np.concatenate([sources, np.array(columns[0], dtype=np.int64)])
+            targets = np.concatenate([targets, np.array(columns[1], dtype=np.int64)])
+            prices = np.concatenate([prices, np.array(columns[2])])
+            durations = np.concatenate([durations, np.array(columns[3])])
+
+        price_bound = np.full(len(self.city_ids), np.inf)
+        duration_bound = np.full(len(self.city_ids), np.inf)
+        price_bound[target] = 0.0
+        duration_bound[target] = 0.0
+        bounds = [(price_bound.tolist(), duration_bound.tolist())]
+        for _hop in range(max_legs):
+            next_price = price_bound.copy()
+            next_duration = duration_bound.copy()
+            np.minimum.at(next_price, sources, price_bound[targets] + prices)
+            np.minimum.at(next_duration, sources, duration_bound[targets] + durations)
+            price_bound, duration_bound = next_price, next_duration
+            bounds.append((price_bound.tolist(), duration_bound.tolist()))
+        return bounds
+
+    def find_routes(self, origin_id, destination_id, criteria='pareto', max_legs=DEFAULT_MAX_LEGS, transport_types=None):
+        """
+        Retorna as rotas de origin_id até destination_id.
+
+        Com criteria='pareto' devolve todas as rotas não dominadas em
+        preço/duração; 'price', 'duration' e 'legs' devolvem só a melhor.
+        """
+        if criteria not in CRITERIA:
+            raise ValueError(f"Critério inválido: {criteria}")
+        self.ensure_loaded()
+        allowed_modes = None
+        if transport_types:
+            allowed_modes = {TRANSPORT_CODES[t] for t in transport_types if t in TRANSPORT_CODES}
+
+        with self._lock:
+            source = self.city_index.get(origin_id)
+            target = self.city_index.get(destination_id)
+            if source is None or target is None or source == target:
+                return []
+            if criteria == 'legs':
+                return self._fewest_legs(source, target, max_legs, allowed_modes)
+            routes = self._pareto(source, target, max_legs, allowed_modes)
+            if routes and criteria == 'price':
+                routes = [min(routes, key=lambda r: (r['price'], r['duration_hours']))]
+            elif routes and criteria == 'duration':
+                routes = [min(routes, key=lambda r: (r['duration_hours'], r['price']))]
+            return routes
+
+    def _pareto(self, source, target, max_legs, allowed_modes):
+        """
+        Busca multicritério por rótulos, ordenada pelas estimativas de
+        _lower_bounds; rótulos cuja estimativa já é dominada por uma rota
+        encontrada são descartados.
+        """
+        bounds = self._lower_bounds(target, max_legs, allowed_modes)
+        start_price, start_duration = bounds[max_legs][0][source], bounds[max_legs][1][source]
+        if start_price == INF:
+            return []
+        # Rótulos: (preço, duração, pernas, nó, rótulo pai, aresta)
+        labels = [(0.0, 0.0, 0, source, -1, None)]
+        heap = [(start_price, start_duration, 0)]
+        # Fronteira não dominada de cada nó: (preço, duração, pernas, rótulo)
+        frontier = {source: [(0.0, 0.0, 0, 0)]}
+        alive = {0}
+        arrived = []
+
+        while heap:
+            _estimate_price, _estimate_duration, label_id = heapq.heappop(heap)
+            if label_id not in alive:
+                continue
+            price, duration, legs, node, _parent, _edge = labels[label_id]
+            if node == target:
+                arrived.append((price, duration, label_id))
+                continue
+            price_bound, duration_bound = bounds[max_legs - legs - 1]
+            for next_node, leg_price, leg_duration, mode, leg_id in self._edges(node, allowed_modes):
+                estimate_price = price + leg_price + price_bound[next_node]
+                if estimate_price == INF:
+                    continue
+                new_duration = duration + leg_duration
+                estimate_duration = new_duration + duration_bound[next_node]
+                # Poda pelas rotas que já chegaram ao destino
+                if any(p <= estimate_price and d <= estimate_duration for p, d, _i in arrived):
+                    continue
+                new_price = price + leg_price
+                new_legs = legs + 1
+                known = frontier.setdefault(next_node, [])
+                if self._dominated(known, new_price, new_duration, new_legs):
+                    continue
+                kept = []
+                for entry in known:
+                    if new_price <= entry[0] and new_duration <= entry[1] and new_legs <= entry[2]:
+                        alive.discard(entry[3])
+                    else:
+                        kept.append(entry)
+                new_id = len(labels)
+                kept.append((new_price, new_duration, new_legs, new_id))
+                frontier[next_node] = kept
+                alive.add(new_id)
+                labels.append((new_price, new_duration, new_legs, next_node, label_id,
+                               (leg_id, node, next_node, leg_price, leg_duration, mode)))
+                heapq.heappush(heap, (estimate_price, estimate_duration, new_id))
+
+        # Fica só o conjunto não dominado em preço/duração
+        routes = []
+        best_duration = INF
+        for price, duration, label_id in sorted(arrived):
+            if duration < best_duration:
+                best_duration = duration
+                routes.append(self._route(labels, label_id))
+        return routes
+
+    @staticmethod
+    def _dominated(frontier, price, duration, legs):
+        for known_price, known_duration, known_legs, _label in frontier:
+            if known_price <= price and known_duration <= duration and known_legs <= legs:
+                return True
+        return False
+
+    def _fewest_legs(self, source, target, max_legs, allowed_modes):
+        # Busca em largura; entre rotas com o mesmo número de pernas fica a primeira encontrada
+        parents = {source: None}
+        queue = deque([(source, 0)])
+        while queue:
+            node, depth = queue.popleft()
+            if node == target:
+                break
+            if depth >= max_legs:
+                continue
+            for next_node, price, duration, mode, leg_id in self._edges(node, allowed_modes):
+                if next_node not in parents:
+                    parents[next_node] = (leg_id, node, next_node, price, duration, mode)
+                    queue.append((next_node, depth + 1))
+        if target not in parents:
+            return []
+        edges = []
+        node = target
+        while parents[node] is not None:
+            edges.append(parents[node])
+            node = parents[node][1]
+        edges.reverse()
+        return [self._format(edges)]
+
+    def _route(self, labels, label_id):
+        edges = []
+        while labels[label_id][5] is not None:
+            edges.append(labels[label_id][5])
+            label_id = labels[label_id][4]
+        edges.reverse()
+        return self._format(edges)
+
+    def _format(self, edges):
+        legs = [
+            {
+                'id': leg_id,
+                'origin_id': self.city_ids[source],
+                'destination_id': self.city_ids[target],
+                'transport_type': TRANSPORT_NAMES[mode],
+                'price': round(price, 2),
+                'duration_hours': round(duration, 2),
+            }
+            for leg_id, source, target, price, duration, mode in edges
+        ]
+        return {
+            'price': round(sum(leg['price'] for leg in legs), 2),
+            'duration_hours': round(sum(leg['duration_hours'] for leg in legs), 2),
+            'legs': legs,
+        }
+
+
+route_graph = RouteGraph()
+
+
+@receiver(post_save, sender=Transportation)
+def update_route_graph(sender, instance, **kwargs):
+    """
+    Mantém o grafo de rotas atualizado quando uma ligação é salva (depois
+    do commit: um rollback não chega ao grafo)
+    """
+    transaction.on_commit(lambda: route_graph.upsert_leg(instance))
+
+
+@receiver(post_delete, sender=Transportation)
+def remove_from_route_graph(sender, instance, **kwargs):
+    """
+    Remove a ligação do grafo de rotas quando ela é deletada
+    """
+    pk = instance.pk
+    transaction.on_commit(lambda: route_graph.remove_leg(pk))
+
+
+@receiver(bulk_changed, sender=Transportation)
+def reload_route_graph(sender, **kwargs):
+    """
+    Gravações em lote não disparam post_save: recarregar o grafo inteiro
+    """
+    transaction.on_commit(route_graph.invalidate)
@@ -0,0 +1,198 @@
+# Montagem automática do roteiro dia a dia a partir das atividades candidatas
+import math
+from dataclasses import dataclass, field
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.db import transaction
+
+from .models import Activity, City, ItineraryActivity
+from .totals import deferred_totals
+
+DEFAULT_HOURS_PER_DAY = 8
+DEFAULT_DAY_START = time(9, 0)
+DEFAULT_GAP_MINUTES = 30
+# Usados quando a atividade não informa duração ou avaliação
+DEFAULT_DURATION_HOURS = 2.0
+DEFAULT_RATING = 3.0
+
+
+@dataclass
+class ScheduledDay:
+    number: int
+    city_id: int = None
+    minutes_used: int = 0
+    entries: list = field(default_factory=list)
+
+
+@dataclass
+class SchedulePlan:
+    days: list
+    total_cost: Decimal = Decimal('0')
+    unscheduled: list = field(default_factory=list)
+
+    @property
+    def entries(self):
+        return [entry for day in self.days for entry in day.entries]
+
+
+def _minutes(hours):
+    return int(round(float(hours) * 60))
+
+
+def _order_cities(city_ids):
+    """
+    Ordem de visita das cidades pelo vizinho mais próximo (menos
+    deslocamento); cidades sem coordenadas ficam no fim
+    """
+    coords = {
+        pk: (math.radians(lat), math.radians(lon))
+        for pk, lat, lon in City.objects.filter(pk__in=city_ids).values_list('id', 'latitude', 'longitude')
+        if lat is not None and lon is not None
+    }
+    pending = [pk for pk in city_ids if pk in coords]
+    ordered = pending[:1]
+    pending = pending[1:]
+    while pending:
+        lat, lon = coords[ordered[-1]]
+        nearest = min(pending, key=lambda pk: (
+            math.sin((coords[pk][0] - lat) / 2) ** 2
+            + math.cos(lat) * math.cos(coords[pk][0]) * math.sin((coords[pk][1] - lon) / 2) ** 2
+        ))
+        pending.remove(nearest)
+        ordered.append(nearest)
+    return ordered + [pk for pk in city_ids if pk not in coords]
+
+
+def _split_days(total_days, demand):
+    """
+    Divide os dias entre as cidades em proporção às horas de atividades de
+    cada uma (maiores restos), com pelo menos um dia por cidade enquanto houver
+    """
+    if not demand:
+        return {}
+    cities = sorted(demand, key=lambda pk: -demand[pk])[:total_days]
+    total = sum(demand[pk] for pk in cities) or 1
+    shares = {pk: max(1, int(total_days * demand[pk] / total)) for pk in cities}
+    while sum(shares.values()) > total_days:
+        largest = max(shares, key=lambda pk: shares[pk])
+        shares[largest] -= 1
+    remainders = sorted(cities, key=lambda pk: -(total_days * demand[pk] / total - shares[pk]))
+    index = 0
+    while sum(shares.values()) < total_days:
+        shares[remainders[index % len(remainders)]] += 1
+        index += 1
+    return shares
+
+
+def plan_itinerary(itinerary, activities=None, days=None, hours_per_day=DEFAULT_HOURS_PER_DAY,
+                   day_start=DEFAULT_DAY_START, gap_minutes=DEFAULT_GAP_MINUTES, budget=None):
+    """
+    Distribui atividades em dias e horários sem gravar nada.
+
+    Cada cidade recebe um bloco de dias consecutivos. As atividades entram
+    da mais bem avaliada para a menos (empate: mais barata, mais curta) no
+    dia da cidade com menos folga em que ainda cabem (best fit), respeitando
+    o limite de horas por dia e o orçamento do itinerário.
+    """
+    if days is None:
+        if not (itinerary.start_date and itinerary.end_date):
+            raise ValueError("Informe o número de dias ou as datas do itinerário.")
+        days = itinerary.total_days
+    if days < 1:
+        raise ValueError("O itinerário precisa ter pelo menos um dia.")
+    day_start_minutes = day_start.hour * 60 + day_start.minute
+    if day_start_minutes + hours_per_day * 60 > 24 * 60:
+        raise ValueError("O dia de atividades não pode passar da meia-noite.")
+    if budget is None:
+        budget = itinerary.budget
+
+    if activities is None:
+        activities = Activity.objects.filter(
+            is_active=True,
+            city__in=itinerary.cities.values('pk'),
+        ).only('id', 'name', 'city_id', 'price', 'duration_hours', 'rating')
+    candidates = []
+    for activity in activities:
+        duration = _minutes(activity.duration_hours or DEFAULT_DURATION_HOURS)
+        if duration <= 0:
+            continue
+        candidates.append((
+            float(activity.rating if activity.rating is not None else DEFAULT_RATING),
+            activity.price or Decimal('0'),
+            duration,
+            activity,
+        ))
+    candidates.sort(key=lambda item: (-item[0], item[1], item[2], item[3].pk))
+
+    capacity = hours_per_day * 60
+    demand = {}
+    for _rating, _price, duration, activity in candidates:
+        if duration <= capacity:
+            demand[activity.city_id] = demand.get(activity.city_id, 0) + duration
+
+    shares = _split_days(days, demand)
+    plan_days = []
+    days_by_city = {}
+    for city_id in _order_cities(list(shares)):
+        for _ in range(shares[city_id]):
+            day = ScheduledDay(number=len(plan_days) + 1, city_id=city_id)
+            plan_days.append(day)
+            days_by_city.setdefault(city_id, []).append(day)
+    while len(plan_days) < days:
+        plan_days.append(ScheduledDay(number=len(plan_days) + 1))
+
+    plan = SchedulePlan(days=plan_days)
+    remaining = budget
+    for _rating, price, duration, activity in candidates:
+        if remaining is not None and price > remaining:
+            plan.unscheduled.append(activity)
+            continue
+        best = None
+        for day in days_by_city.get(activity.city_id, ()):
+            needed = duration + (gap_minutes if day.entries else 0)
+            free = capacity - day.minutes_used
+            if needed <= free and (best is None or free < best[1]):
+                best = (day, free, needed)
+        if best is None:
+            plan.unscheduled.append(activity)
+            continue
+        day, _free, needed = best
+        day.minutes_used += needed
+        day.entries.append((activity, duration))
+        plan.total_cost += price
+        if remaining is not None:
+            remaining -= price
+
+    # Horários: atividades em sequência a partir do início do dia
+    base = datetime.combine(datetime.min.date(), time(0, 0))
+    for day in plan_days:
+        entries = []
+        cursor = day_start_minutes
+        for order, (activity, duration) in enumerate(day.entries):
+            start = base + timedelta(minutes=cursor)
+            end = start + timedelta(minutes=duration)
+            entries.append(ItineraryActivity(
+                itinerary=itinerary,
+                activity=activity,
+                day_number=day.number,
+                start_time=start.time(),
+                end_time=end.time(),
+                order=order,
+            ))
+            cursor += duration + gap_minutes
+        day.entries = entries
+    return plan
+
+
+def schedule_itinerary(itinerary, **options):
+    """
+    Monta o roteiro e grava tudo com um único bulk_create, substituindo as
+    atividades já programadas no itinerário
+    """
+    plan = plan_itinerary(itinerary, **options)
+    with transaction.atomic(), deferred_totals() as changed:
+        ItineraryActivity.objects.filter(itinerary=itinerary).delete()
+        ItineraryActivity.objects.bulk_create(plan.entries)
+        changed.add(itinerary.pk)
+    return plan
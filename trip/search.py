@@ -0,0 +1,442 @@
+# Busca de destinos e cidades sem acentos, por prefixo e trigramas
+import bisect
+import heapq
+import operator
+import re
+import threading
+import unicodedata
+from collections import Counter
+from functools import reduce
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import City, Country, Destination
+from .signals import bulk_changed
+from .versions import SharedVersion, bump_version
+
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+
+# Acima disso a busca filtra no banco: um IN (...) desse tamanho custa mais
+# que o LIKE e passa do limite de parâmetros do SQLite (32766)
+MAX_MATCHED_IDS = 5000
+
+
+def normalize(text):
+    """
+    Minúsculas, sem acentos e sem pontuação: "São Paulo!" -> "sao paulo"
+    """
+    text = text or ''
+    if not text.isascii():
+        text = unicodedata.normalize('NFKD', text)
+        text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    return _NON_WORD.sub(' ', text.lower()).strip()
+
+
+def tokenize(text):
+    return normalize(text).split()
+
+
+def trigrams(term):
+    padded = f'  {term} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex(SharedVersion):
+    """
+    Índice invertido em memória sobre textos normalizados.
+
+    Cada termo aponta para os documentos que o contêm, com o peso do campo
+    em que aparece. O vocabulário ordenado responde buscas por prefixo e o
+    índice de trigramas dos termos cobre erros de digitação. Documentos
+    são incluídos e removidos um a um, sem recarregar o índice; os outros
+    processos recarregam pela versão compartilhada.
+    """
+    # Peso de cada campo indexado
+    fields = {}
+
+    PREFIX_MATCH = 0.8
+    SUBSTRING_MATCH = 0.7
+    FUZZY_MATCH = 0.6
+    MIN_SIMILARITY = 0.3
+    # Limite de termos expandidos por prefixo (prefixos de uma letra)
+    MAX_EXPANSIONS = 200
+    # Bônus quando o texto principal começa com a consulta
+    LEADING_BONUS = 1.0
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._bulk = False
+        self._reset()
+
+    def _reset(self):
+        self.postings = {}
+        self.vocabulary = []
+        # Trigramas dos termos, montados na primeira busca aproximada
+        self.trigram_terms = None
+        self.documents = {}
+
+    def rows(self):
+        """
+        Linhas do banco usadas na carga completa
+        """
+        raise NotImplementedError
+
+    def document(self, row):
+        """
+        (id, {campo: texto}, dados devolvidos na busca) de uma linha
+        """
+        raise NotImplementedError
+
+    def load(self):
+        with self._lock:
+            self._reset()
+            self.start_load()
+            # Na carga completa o vocabulário é ordenado uma vez só, no fim
+            self._bulk = True
+            try:
+                for row in self.rows():
+                    self._add(*self.document(row))
+            finally:
+                self._bulk = False
+            self.vocabulary = sorted(self.postings)
+            self._loaded = True
+
+    def ensure_loaded(self):
+        if not self.is_current():
+            with self._lock:
+                if not self.is_current():
+                    self.load()
+
+    async def aensure_loaded(self):
+        """
+        Para views assíncronas: a carga (síncrona, uma vez por processo)
+        roda numa thread; depois disso a busca é só memória
+        """
+        if not await self.ais_current():
+            await sync_to_async(self.ensure_loaded)()
+
+    def invalidate(self):
+        """
+        Descarta o índice em todos os processos; a próxima busca recarrega do banco
+        """
+        with self._lock:
+            bump_version(self.version_name)
+            self._loaded = False
+            self._reset()
+
+    def update(self, row):
+        """
+        Inclui ou atualiza um documento (ignorado se o índice não foi carregado)
+        """
+        with self._lock:
+            if self.advance():
+                self._add(*self.document(row))
+
+    def remove(self, doc_id):
+        with self._lock:
+            if self.advance():
+                self._remove(doc_id)
+
+    def _add(self, doc_id, texts, data):
+        self._remove(doc_id)
+        weights = {}
+        for field, text in texts.items():
+            weight = self.fields[field]
+            for term in tokenize(text):
+                if weights.get(term, 0) < weight:
+                    weights[term] = weight
+        for term, weight in weights.items():
+            posting = self.postings.get(term)
+            if posting is None:
+                posting = self.postings[term] = {}
+                if not self._bulk:
+                    bisect.insort(self.vocabulary, term)
+                if self.trigram_terms is not None:
+                    for gram in trigrams(term):
+                        self.trigram_terms.setdefault(gram, set()).add(term)
+            posting[doc_id] = weight
+        leading = normalize(next(iter(texts.values()), ''))
+        self.documents[doc_id] = (data, tuple(weights), leading)
+
+    def _remove(self, doc_id):
+        entry = self.documents.pop(doc_id, None)
+        if entry is None:
+            return
+        for term in entry[1]:
+            posting = self.postings[term]
+            posting.pop(doc_id, None)
+            if posting:
+                continue
+            del self.postings[term]
+            del self.vocabulary[bisect.bisect_left(self.vocabulary, term)]
+            if self.trigram_terms is not None:
+                for gram in trigrams(term):
+                    terms = self.trigram_terms[gram]
+                    terms.discard(term)
+                    if not terms:
+                        del self.trigram_terms[gram]
+
+    def _trigram_index(self):
+        if self.trigram_terms is None:
+            index = {}
+            for term in self.vocabulary:
+                for gram in trigrams(term):
+                    index.setdefault(gram, set()).add(term)
+            self.trigram_terms = index
+        return self.trigram_terms
+
+    def _containing(self, term):
+        """
+        Termos do índice que contêm `term` (3+ letras) em qualquer posição:
+        a interseção dos termos de cada trigrama, conferida no texto
+        """
+        index = self._trigram_index()
+        grams = sorted((index.get(term[i:i + 3], ()) for i in range(len(term) - 2)), key=len)
+        if not grams or not grams[0]:
+            return []
+        candidates = set(grams[0]).intersection(*grams[1:])
+        return [candidate for candidate in candidates if term in candidate]
+
+    def _matches(self, term, expansions):
+        """
+        Termos do índice que casam com `term` -> qualidade (1.0 = exato).
+        expansions=None não limita os prefixos (filtros precisam de todos).
+        """
+        matches = {}
+        if term in self.postings:
+            matches[term] = 1.0
+        vocabulary = self.vocabulary
+        index = bisect.bisect_left(vocabulary, term)
+        end = len(vocabulary) if expansions is None else min(len(vocabulary), index + expansions)
+        while index < end and vocabulary[index].startswith(term):
+            candidate = vocabulary[index]
+            if candidate != term:
+                # Prefixos mais completos valem mais
+                matches[candidate] = self.PREFIX_MATCH * (0.5 + 0.5 * len(term) / len(candidate))
+            index += 1
+        if len(term) >= 3:
+            # No meio da palavra, como um LIKE '%termo%' ("boa" -> "lisboa")
+            for candidate in self._containing(term):
+                if candidate not in matches:
+                    matches[candidate] = self.SUBSTRING_MATCH * (0.5 + 0.5 * len(term) / len(candidate))
+        if not matches and len(term) >= 3:
+            grams = trigrams(term)
+            index = self._trigram_index()
+            shared = Counter()
+            for gram in grams:
+                shared.update(index.get(gram, ()))
+            for candidate, count in shared.items():
+                similarity = count / (len(grams) + len(trigrams(candidate)) - count)
+                if similarity >= self.MIN_SIMILARITY:
+                    matches[candidate] = self.FUZZY_MATCH * similarity
+        return matches
+
+    def _ranked(self, query, limit, check=True):
+        """
+        (id, pontuação) dos documentos que casam com todos os termos da
+        consulta, do mais relevante para o menos; limit=None devolve todos.
+        check=False usa o índice já carregado sem conferir a versão.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        if check:
+            self.ensure_loaded()
+        expansions = self.MAX_EXPANSIONS if limit is not None else None
+        with self._lock:
+            scores = None
+            for term in terms:
+                term_scores = {}
+                for candidate, quality in self._matches(term, expansions).items():
+                    for doc_id, weight in self.postings[candidate].items():
+                        score = weight * quality
+                        if score > term_scores.get(doc_id, 0):
+                            term_scores[doc_id] = score
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {doc_id: scores[doc_id] + score for doc_id, score in term_scores.items() if doc_id in scores}
+                if not scores:
+                    return []
+
+            phrase = ' '.join(terms)
+            documents = self.documents
+            for doc_id in scores:
+                if documents[doc_id][2].startswith(phrase):
+                    scores[doc_id] += self.LEADING_BONUS
+
+            key = lambda item: (item[1], -item[0])  # noqa: E731
+            if limit is None:
+                return sorted(scores.items(), key=key, reverse=True)
+            return heapq.nlargest(limit, scores.items(), key=key)
+
+    def search(self, query, limit=10):
+        """
+        Documentos que casam com todos os termos da consulta, do mais
+        relevante para o menos relevante
+        """
+        with self._lock:
+            best = self._ranked(query, limit)
+            documents = self.documents
+            return [dict(documents[doc_id][0], score=round(score, 3)) for doc_id, score in best]
+
+    def search_ids(self, query, limit=None):
+        """
+        Ids de todos os documentos que casam (ou dos `limit` mais relevantes)
+        """
+        return [doc_id for doc_id, _score in self._ranked(query, limit)]
+
+    async def asearch_ids(self, query, limit=None):
+        """
+        search_ids para views assíncronas: a (re)carga roda numa thread e a
+        busca usa o índice carregado sem conferir a versão de novo (uma
+        recarga ali consultaria o banco dentro do event loop)
+        """
+        await self.aensure_loaded()
+        return [doc_id for doc_id, _score in self._ranked(query, limit, check=False)]
+
+
+class DestinationIndex(SearchIndex):
+    version_name = 'index:destination_search'
+    fields = {'name': 3.0, 'city': 2.0, 'country': 1.5, 'description': 0.5}
+
+    def rows(self):
+        return (
+            Destination.objects.order_by()
+            .values('id', 'name', 'slug', 'city', 'country', 'description')
+            .iterator(chunk_size=5000)
+        )
+
+    def document(self, row):
+        if isinstance(row, Destination):
+            row = {name: getattr(row, name) for name in ('id', 'name', 'slug', 'city', 'country', 'description')}
+        texts = {field: row[field] for field in self.fields}
+        data = {name: row[name] for name in ('id', 'name', 'slug', 'city', 'country')}
+        return row['id'], texts, data
+
+
+class CityIndex(SearchIndex):
+    version_name = 'index:city_search'
+    fields = {'name': 3.0, 'country': 1.0}
+
+    def _reset(self):
+        super()._reset()
+        self.country_names = {}
+
+    def rows(self):
+        self.country_names = dict(Country.objects.values_list('id', 'name'))
+        return City.objects.order_by().values('id', 'name', 'country_id', 'is_popular').iterator(chunk_size=5000)
+
+    def country_name(self, country_id):
+        # Países gravados depois da carga entram por rename_country ou update
+        return self.country_names.get(country_id, '')
+
+    def update(self, row, country=None):
+        """
+        country: nome do país da cidade, quando quem chama já o tem
+        """
+        with self._lock:
+            if self.advance():
+                if country is not None:
+                    self.country_names[row.country_id] = country
+                self._add(*self.document(row))
+
+    def document(self, row):
+        if isinstance(row, City):
+            row = {'id': row.pk, 'name': row.name, 'country_id': row.country_id, 'is_popular': row.is_popular}
+        country = self.country_name(row['country_id'])
+        data = dict(row, country=country)
+        return row['id'], {'name': row['name'], 'country': country}, data
+
+    def rename_country(self, country_id, name):
+        """
+        Reindexa as cidades de um país renomeado
+        """
+        with self._lock:
+            if not self.advance() or self.country_names.get(country_id) == name:
+                return
+            self.country_names[country_id] = name
+            cities = [data for data, _terms, _leading in self.documents.values() if data['country_id'] == country_id]
+            for data in cities:
+                self._add(*self.document(data))
+
+
+destination_index = DestinationIndex()
+city_index = CityIndex()
+
+
+def destination_filter(query):
+    """
+    (filtro, total) da busca de destinos para um queryset.
+
+    Até MAX_MATCHED_IDS resultados o filtro usa os ids do índice e o total
+    é exato. Acima disso vira um LIKE por termo nas colunas indexadas (a
+    collation do MySQL também ignora acentos) e o total fica para o banco.
+    """
+    return _destination_condition(query, destination_index.search_ids(query))
+
+
+async def adestination_filter(query):
+    return _destination_condition(query, await destination_index.asearch_ids(query))
+
+
+def _destination_condition(query, ids):
+    if len(ids) <= MAX_MATCHED_IDS:
+        return Q(pk__in=ids), len(ids)
+    condition = Q()
+    for term in query.split():
+        condition &= reduce(operator.or_, (Q(**{f'{field}__icontains': term}) for field in DestinationIndex.fields))
+    return condition, None
+
+
+@receiver(post_save, sender=Destination)
+def index_destination(sender, instance, **kwargs):
+    """
+    Mantém o índice de busca atualizado quando um destino é salvo (depois
+    do commit)
+    """
+    transaction.on_commit(lambda: destination_index.update(instance))
+
+
+@receiver(post_delete, sender=Destination)
+def unindex_destination(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: destination_index.remove(pk))
+
+
+@receiver(post_save, sender=City)
+def index_city(sender, instance, **kwargs):
+    # O nome do país só quando já carregado: o sinal não consulta o banco
+    country = instance.country.name if City.country.is_cached(instance) else None
+    transaction.on_commit(lambda: city_index.update(instance, country))
+
+
+@receiver(post_delete, sender=City)
+def unindex_city(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: city_index.remove(pk))
+
+
+@receiver(post_save, sender=Country)
+def reindex_country_cities(sender, instance, **kwargs):
+    pk, name = instance.pk, instance.name
+    transaction.on_commit(lambda: city_index.rename_country(pk, name))
+
+
+@receiver(bulk_changed, sender=Destination)
+def reload_destination_index(sender, **kwargs):
+    """
+    Gravações em lote não disparam post_save: recarregar o índice inteiro
+    """
+    transaction.on_commit(destination_index.invalidate)
+
+
+@receiver(bulk_changed, sender=City)
+@receiver(bulk_changed, sender=Country)
+def reload_city_index(sender, **kwargs):
+    transaction.on_commit(city_index.invalidate)
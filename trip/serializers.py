@@ -1 +1,257 @@
-# Serializers para API
\ No newline at end of file
+# Serializers para API
+#
+# Trabalham sobre linhas de .values() (dicionários), sem instanciar modelos,
+# e só buscam no banco as colunas pedidas pelo cliente.
+import json
+from decimal import Decimal
+
+from django.core.files.storage import default_storage
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.functional import Promise
+
+from .models import City, Destination, Itinerary, ItineraryActivity, Transportation, Trip
+from .pagination import keyset_paginate
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson é opcional
+    orjson = None
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+class InvalidFields(ValueError):
+    pass
+
+
+def _default(obj):
+    # Tipos que o orjson não serializa sozinho (Decimal e textos traduzíveis)
+    if isinstance(obj, (Decimal, Promise)):
+        return str(obj)
+    raise TypeError(f'{type(obj).__name__} não é serializável em JSON')
+
+
+def dumps(data):
+    """
+    Serializa para JSON (bytes); usa orjson quando instalado
+    """
+    if orjson is not None:
+        return orjson.dumps(data, default=_default)
+    return json.dumps(data, cls=DjangoJSONEncoder, separators=(',', ':')).encode()
+
+
+def media_url(name):
+    return default_storage.url(name) if name else None
+
+
+def to_float(value):
+    return float(value)
+
+
+class ValuesSerializer:
+    """
+    Mapeia nomes públicos para lookups de .values().
+
+    fields: nome público -> lookup (ex.: 'country': 'country__name')
+    converters: nome público -> função aplicada aos valores não nulos
+    default_fields: campos devolvidos quando o cliente não pede nenhum
+    """
+    model = None
+    fields = {}
+    converters = {}
+    default_fields = None
+
+    def __init__(self, fields=None):
+        if fields:
+            unknown = [name for name in fields if name not in self.fields]
+            if unknown:
+                raise InvalidFields(
+                    f"Campos inválidos: {', '.join(unknown)}. Disponíveis: {', '.join(self.fields)}."
+                )
+            selected = list(dict.fromkeys(fields))
+        else:
+            selected = list(self.default_fields or self.fields)
+        self.selected = selected
+        self._plan = [(name, self.fields[name], self.converters.get(name)) for name in selected]
+
+    @staticmethod
+    def parse_fields(value):
+        """
+        Lê o parâmetro ?fields=a,b,c; None quando ausente
+        """
+        if not value:
+            return None
+        return [name.strip() for name in value.split(',') if name.strip()]
+
+    def lookups(self, extra=()):
+        return list(dict.fromkeys([lookup for _, lookup, _ in self._plan] + list(extra)))
+
+    def values(self, queryset, extra=()):
+        return queryset.values(*self.lookups(extra))
+
+    def to_representation(self, row):
+        data = {}
+        for name, lookup, convert in self._plan:
+            value = row[lookup]
+            if convert is not None and value is not None:
+                value = convert(value)
+            data[name] = value
+        return data
+
+    def serialize(self, rows):
+        return [self.to_representation(row) for row in rows]
+
+
+class DestinationSerializer(ValuesSerializer):
+    model = Destination
+    fields = {
+        'id': 'id',
+        'name': 'name',
+        'slug': 'slug',
+        'city': 'city',
+        'country': 'country',
+        'trip_id': 'trip_id',
+        'arrival_date': 'arrival_date',
+        'departure_date': 'departure_date',
+        'latitude': 'latitude',
+        'longitude': 'longitude',
+        'image': 'image',
+        'description': 'description',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+    }
+    converters = {
+        'latitude': to_float,
+        'longitude': to_float,
+        'image': media_url,
+    }
+    default_fields = (
+        'id', 'name', 'slug', 'city', 'country', 'trip_id',
+        'arrival_date', 'departure_date', 'latitude', 'longitude', 'image',
+    )
+
+
+
+class StaySerializer(DestinationSerializer):
+    """
+    Destinos no calendário de estadias, com a viagem e o viajante
+    """
+    fields = {
+        **DestinationSerializer.fields,
+        'trip': 'trip__name',
+        'user_id': 'trip__user_id',
+        'user': 'trip__user__username',
+    }
+    default_fields = (
+        'id', 'name', 'slug', 'city', 'country', 'trip_id', 'trip', 'user_id', 'user',
+        'arrival_date', 'departure_date',
+    )
+
+class TripSerializer(ValuesSerializer):
+    model = Trip
+    fields = {
+        'id': 'id',
+        'name': 'name',
+        'description': 'description',
+        'start_date': 'start_date',
+        'end_date': 'end_date',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+    }
+
+
+class CitySerializer(ValuesSerializer):
+    model = City
+    fields = {
+        'id': 'id',
+        'name': 'name',
+        'country_id': 'country_id',
+        'country': 'country__name',
+        'country_code': 'country__code',
+        'description': 'description',
+        'is_popular': 'is_popular',
+        'latitude': 'latitude',
+        'longitude': 'longitude',
+    }
+    default_fields = ('id', 'name', 'country_id', 'country', 'country_code', 'is_popular', 'latitude', 'longitude')
+
+
+class TransportationSerializer(ValuesSerializer):
+    model = Transportation
+    fields = {
+        'id': 'id',
+        'origin_id': 'origin_id',
+        'origin': 'origin__name',
+        'destination_id': 'destination_id',
+        'destination': 'destination__name',
+        'transport_type': 'transport_type',
+        'company': 'company',
+        'duration_hours': 'duration_hours',
+        'price_min': 'price_min',
+        'notes': 'notes',
+        'booking_url': 'booking_url',
+    }
+    default_fields = (
+        'id', 'origin_id', 'origin', 'destination_id', 'destination',
+        'transport_type', 'company', 'duration_hours', 'price_min',
+    )
+
+
+class ItinerarySerializer(ValuesSerializer):
+    model = Itinerary
+    fields = {
+        'id': 'id',
+        'title': 'title',
+        'description': 'description',
+        'user_id': 'user_id',
+        'user': 'user__username',
+        'start_date': 'start_date',
+        'end_date': 'end_date',
+        'budget': 'budget',
+        'status': 'status',
+        'is_public': 'is_public',
+        'activity_count': 'activity_count',
+        'activity_cost': 'activity_cost',
+        'activity_hours': 'activity_hours',
+        'created_at': 'created_at',
+        'updated_at': 'updated_at',
+    }
+    default_fields = (
+        'id', 'title', 'user_id', 'user', 'start_date', 'end_date', 'budget', 'status',
+        'is_public', 'activity_count', 'activity_cost', 'activity_hours',
+    )
+
+
+class ItineraryActivitySerializer(ValuesSerializer):
+    model = ItineraryActivity
+    fields = {
+        'id': 'id',
+        'itinerary_id': 'itinerary_id',
+        'itinerary': 'itinerary__title',
+        'activity_id': 'activity_id',
+        'activity': 'activity__name',
+        'category': 'activity__category',
+        'city_id': 'activity__city_id',
+        'city': 'activity__city__name',
+        'price': 'activity__price',
+        'duration_hours': 'activity__duration_hours',
+        'day_number': 'day_number',
+        'start_time': 'start_time',
+        'end_time': 'end_time',
+        'order': 'order',
+        'notes': 'notes',
+    }
+    default_fields = (
+        'id', 'itinerary_id', 'itinerary', 'activity_id', 'activity', 'category', 'city',
+        'price', 'duration_hours', 'day_number', 'start_time', 'end_time', 'order',
+    )
+
+
+def cursor_paginate(rows, ordering, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """
+    Paginação por chave sobre um queryset de .values(); ordering é um
+    lookup não nulo, com '-' opcional. Retorna (linhas, próximo cursor ou None).
+    """
+    page = keyset_paginate(rows, ordering, after=cursor, limit=limit)
+    return page.object_list, page.next_cursor
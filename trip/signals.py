@@ -0,0 +1,6 @@
+# Sinais próprios do app
+from django.dispatch import Signal
+
+# Enviado depois de gravações em lote (bulk_create, bulk_update, update)
+# que não disparam post_save/post_delete; sender é o modelo alterado
+bulk_changed = Signal()
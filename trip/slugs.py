@@ -0,0 +1,116 @@
+# Geração de slugs únicos (save individual e inserções em lote)
+import re
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+
+from django.db.models import Q
+from django.utils.text import slugify
+
+DEFAULT_SLUG = 'destino'
+# Espaço reservado para o sufixo "-N"
+SUFFIX_ROOM = 8
+FAMILY_CHUNK_SIZE = 200
+SUFFIX_RE = re.compile(r'^(.+)-(\d+)$')
+
+
+def base_slug(value, max_length=200, fallback=DEFAULT_SLUG):
+    """
+    Slug sem sufixo, já truncado para caber o sufixo numérico
+    """
+    slug = slugify(value or '')[:max_length - SUFFIX_ROOM].strip('-')
+    return slug or fallback
+
+
+def _family_query(field, bases):
+    """
+    A base e base-N. O startswith usa o índice; o regex descarta os vizinhos
+    de prefixo ("paris-france" na família "paris"). Bases do slugify só têm
+    [a-z0-9_-], nada a escapar.
+    """
+    return reduce(or_, (
+        Q(**{field: base})
+        | Q(**{f'{field}__startswith': f'{base}-', f'{field}__regex': f'^{base}-[0-9]+$'})
+        for base in bases
+    ))
+
+
+def _taken_suffixes(bases, slugs):
+    """
+    Para cada base, os sufixos já usados (0 representa a base sem sufixo)
+    """
+    bases = set(bases)
+    taken = defaultdict(set)
+    for slug in slugs:
+        # "abc-1" pode ser a base "abc-1" ou a base "abc" com sufixo 1
+        if slug in bases:
+            taken[slug].add(0)
+        match = SUFFIX_RE.match(slug)
+        if match and match.group(1) in bases:
+            taken[match.group(1)].add(int(match.group(2)))
+    return taken
+
+
+def _next_free(taken, start=0):
+    suffix = start
+    while suffix in taken:
+        suffix += 1
+    taken.add(suffix)
+    return suffix
+
+
+def _with_suffix(base, suffix):
+    return base if suffix == 0 else f'{base}-{suffix}'
+
+
+def allocate_slug(model, value, field='slug', exclude_pk=None):
+    """
+    Primeiro slug livre da família base, base-1, base-2...
+    usando uma única consulta
+    """
+    base = base_slug(value, model._meta.get_field(field).max_length)
+    queryset = model._default_manager.filter(_family_query(field, [base]))
+    if exclude_pk is not None:
+        queryset = queryset.exclude(pk=exclude_pk)
+    taken = _taken_suffixes([base], queryset.values_list(field, flat=True))
+    return _with_suffix(base, _next_free(taken[base]))
+
+
+def allocate_slugs(model, values, field='slug', chunk_size=FAMILY_CHUNK_SIZE, reserved=()):
+    """
+    Slugs únicos para vários valores de uma vez (para bulk_create).
+
+    Retorna a lista na mesma ordem de values; valores repetidos recebem
+    sufixos diferentes entre si. reserved são slugs que ainda não estão no
+    banco mas serão gravados no mesmo lote.
+    """
+    max_length = model._meta.get_field(field).max_length
+    bases = [base_slug(value, max_length) for value in values]
+    unique_bases = list(dict.fromkeys(bases))
+
+    taken = defaultdict(set)
+    for start in range(0, len(unique_bases), chunk_size):
+        chunk = unique_bases[start:start + chunk_size]
+        existing = (
+            model._default_manager
+            .filter(_family_query(field, chunk))
+            .values_list(field, flat=True)
+        )
+        for base, suffixes in _taken_suffixes(chunk, existing).items():
+            taken[base] |= suffixes
+
+    # Bases diferentes podem gerar o mesmo slug ("abc-1" e "abc" + 1)
+    # Abaixo do cursor de cada base todos os sufixos já estão ocupados
+    assigned = set(reserved)
+    cursors = defaultdict(int)
+    slugs = []
+    for base in bases:
+        while True:
+            suffix = _next_free(taken[base], cursors[base])
+            cursors[base] = suffix + 1
+            slug = _with_suffix(base, suffix)
+            if slug not in assigned:
+                break
+        assigned.add(slug)
+        slugs.append(slug)
+    return slugs
@@ -0,0 +1,325 @@
+# Índice espacial em memória (grade de latitude/longitude) para destinos e cidades
+import math
+import threading
+
+import numpy as np
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import City, Destination
+from .signals import bulk_changed
+from .versions import SharedVersion, bump_version
+
+EARTH_RADIUS_KM = 6371.0088
+HALF_CIRCUMFERENCE_KM = math.pi * EARTH_RADIUS_KM
+
+# Células de 1 grau: 180 faixas de latitude x 360 de longitude
+CELL_DEGREES = 1.0
+LAT_CELLS = int(180 / CELL_DEGREES)
+LON_CELLS = int(360 / CELL_DEGREES)
+
+# Raio inicial da busca dos k mais próximos; cresce até achar k pontos
+NEAREST_START_KM = 25.0
+
+
+def haversine_km(lat, lon, lats, lons):
+    """
+    Distância (km) de um ponto até arrays de pontos, tudo em radianos
+    """
+    half_dlat = (lats - lat) * 0.5
+    half_dlon = (lons - lon) * 0.5
+    a = np.sin(half_dlat) ** 2 + math.cos(lat) * np.cos(lats) * np.sin(half_dlon) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def _cells(lat_degrees, lon_degrees):
+    rows = np.clip(((lat_degrees + 90.0) // CELL_DEGREES).astype(np.int64), 0, LAT_CELLS - 1)
+    cols = ((lon_degrees + 180.0) // CELL_DEGREES).astype(np.int64) % LON_CELLS
+    return rows * LON_CELLS + cols
+
+
+class SpatialIndex(SharedVersion):
+    """
+    Pontos ordenados por célula da grade (formato CSR), em arrays float64.
+
+    Uma busca por raio só lê as células que cobrem o círculo e calcula a
+    distância de todos os candidatos de uma vez (haversine vetorizado).
+    Alterações depois da carga ficam numa sobreposição, como no grafo de
+    rotas, até a próxima reconstrução; entre processos, pela versão
+    compartilhada.
+    """
+
+    OVERLAY_REBUILD_RATIO = 0.05
+    OVERLAY_REBUILD_MIN = 1000
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._reset()
+
+    def _reset(self):
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.lats = np.zeros(0)
+        self.lons = np.zeros(0)
+        self.offsets = np.zeros(LAT_CELLS * LON_CELLS + 1, dtype=np.int64)
+        self.data = {}
+        self.overlay = {}
+        self.removed = set()
+
+    def rows(self):
+        """
+        (id, latitude, longitude, dados) de todos os registros com coordenadas
+        """
+        raise NotImplementedError
+
+    def point(self, instance):
+        """
+        (latitude, longitude, dados) de uma instância, ou None sem coordenadas
+        """
+        raise NotImplementedError
+
+    def load(self):
+        with self._lock:
+            self._reset()
+            self.start_load()
+            ids, lats, lons = [], [], []
+            for pk, lat, lon, data in self.rows():
+                ids.append(pk)
+                lats.append(float(lat))
+                lons.append(float(lon))
+                self.data[pk] = data
+            lat_degrees = np.array(lats, dtype=np.float64)
+            lon_degrees = np.array(lons, dtype=np.float64)
+            cells = _cells(lat_degrees, lon_degrees)
+            order = np.argsort(cells, kind='stable')
+            np.cumsum(np.bincount(cells, minlength=LAT_CELLS * LON_CELLS), out=self.offsets[1:])
+            self.ids = np.array(ids, dtype=np.int64)[order]
+            self.lats = np.radians(lat_degrees[order])
+            self.lons = np.radians(lon_degrees[order])
+            self._loaded = True
+
+    def ensure_loaded(self):
+        if not self.is_current():
+            with self._lock:
+                if not self.is_current():
+                    self.load()
+
+    def invalidate(self):
+        with self._lock:
+            bump_version(self.version_name)
+            self._loaded = False
+            self._reset()
+
+    def _maybe_rebuild(self):
+        limit = max(self.OVERLAY_REBUILD_MIN, int(len(self.ids) * self.OVERLAY_REBUILD_RATIO))
+        if len(self.overlay) + len(self.removed) > limit:
+            self._loaded = False
+
+    def upsert(self, instance):
+        """
+        Adiciona, move ou remove (sem coordenadas) um ponto sem reconstruir o índice
+        """
+        with self._lock:
+            if not self.advance():
+                return
+            point = self.point(instance)
+            self.overlay.pop(instance.pk, None)
+            self.removed.add(instance.pk)
+            if point is None:
+                self.data.pop(instance.pk, None)
+            else:
+                lat, lon, data = point
+                self.overlay[instance.pk] = (math.radians(float(lat)), math.radians(float(lon)))
+                self.data[instance.pk] = data
+            self._maybe_rebuild()
+
+    def remove(self, pk):
+        with self._lock:
+            if not self.advance():
+                return
+            self.overlay.pop(pk, None)
+            self.removed.add(pk)
+            self.data.pop(pk, None)
+            self._maybe_rebuild()
+
+    def _candidates(self, lat, lon, radius_km):
+        """
+        Posições dos pontos nas células que cobrem o círculo (lat/lon em graus)
+        """
+        angle = radius_km / EARTH_RADIUS_KM
+        dlat = math.degrees(angle)
+        first_row = max(0, int((lat - dlat + 90.0) // CELL_DEGREES))
+        last_row = min(LAT_CELLS - 1, int((lat + dlat + 90.0) // CELL_DEGREES))
+
+        # Se o círculo alcança um polo, todas as longitudes entram
+        if lat + dlat >= 90.0 or lat - dlat <= -90.0 or angle >= math.pi / 2:
+            return np.arange(self.offsets[first_row * LON_CELLS], self.offsets[(last_row + 1) * LON_CELLS])
+
+        ratio = math.sin(angle) / math.cos(math.radians(lat))
+        dlon = 180.0 if ratio >= 1 else math.degrees(math.asin(ratio))
+        first_col = int((lon - dlon + 180.0) // CELL_DEGREES)
+        last_col = int((lon + dlon + 180.0) // CELL_DEGREES)
+        if last_col - first_col + 1 >= LON_CELLS:
+            spans = [(0, LON_CELLS - 1)]
+        elif first_col < 0:
+            spans = [(first_col % LON_CELLS, LON_CELLS - 1), (0, last_col)]
+        elif last_col >= LON_CELLS:
+            spans = [(first_col, LON_CELLS - 1), (0, last_col % LON_CELLS)]
+        else:
+            spans = [(first_col, last_col)]
+
+        offsets = self.offsets
+        parts = []
+        for row in range(first_row, last_row + 1):
+            base = row * LON_CELLS
+            for start, end in spans:
+                begin, stop = offsets[base + start], offsets[base + end + 1]
+                if stop > begin:
+                    parts.append(np.arange(begin, stop))
+        if not parts:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate(parts)
+
+    def within(self, lat, lon, radius_km, limit=None):
+        """
+        Pontos a até radius_km de (lat, lon), do mais próximo ao mais distante.
+        Retorna [(id, distância em km)].
+        """
+        self.ensure_loaded()
+        lat_rad, lon_rad = math.radians(lat), math.radians(lon)
+        with self._lock:
+            positions = self._candidates(lat, lon, radius_km)
+            ids = self.ids[positions]
+            distances = haversine_km(lat_rad, lon_rad, self.lats[positions], self.lons[positions])
+            mask = distances <= radius_km
+            if self.removed:
+                mask &= ~np.isin(ids, np.fromiter(self.removed, dtype=np.int64, count=len(self.removed)))
+            ids, distances = ids[mask], distances[mask]
+
+            if self.overlay:
+                extra_ids = np.fromiter(self.overlay, dtype=np.int64, count=len(self.overlay))
+                points = np.array(list(self.overlay.values()), dtype=np.float64)
+                extra = haversine_km(lat_rad, lon_rad, points[:, 0], points[:, 1])
+                keep = extra <= radius_km
+                ids = np.concatenate([ids, extra_ids[keep]])
+                distances = np.concatenate([distances, extra[keep]])
+
+            if limit is not None and limit < len(ids):
+                nearest = np.argpartition(distances, limit)[:limit]
+                ids, distances = ids[nearest], distances[nearest]
+            order = np.argsort(distances, kind='stable')
+            return list(zip(ids[order].tolist(), distances[order].tolist()))
+
+    def nearest(self, lat, lon, k=10, max_radius_km=None):
+        """
+        Os k pontos mais próximos, opcionalmente limitados a max_radius_km
+        """
+        limit = min(max_radius_km or HALF_CIRCUMFERENCE_KM, HALF_CIRCUMFERENCE_KM)
+        radius = min(NEAREST_START_KM, limit)
+        while True:
+            found = self.within(lat, lon, radius, limit=k)
+            if len(found) >= k or radius >= limit:
+                return found
+            radius = min(radius * 4, limit)
+
+    def describe(self, matches):
+        """
+        Junta os dados de cada ponto à distância
+        """
+        with self._lock:
+            return [
+                dict(self.data[pk], distance_km=round(distance, 3))
+                for pk, distance in matches if pk in self.data
+            ]
+
+
+class DestinationPoints(SpatialIndex):
+    version_name = 'index:destination_points'
+
+    def rows(self):
+        rows = (
+            Destination.objects.order_by()
+            .filter(latitude__isnull=False, longitude__isnull=False)
+            .values_list('id', 'latitude', 'longitude', 'name', 'slug', 'city', 'country')
+            .iterator(chunk_size=10000)
+        )
+        for pk, lat, lon, name, slug, city, country in rows:
+            yield pk, lat, lon, {'id': pk, 'name': name, 'slug': slug, 'city': city, 'country': country}
+
+    def point(self, instance):
+        if instance.latitude is None or instance.longitude is None:
+            return None
+        return instance.latitude, instance.longitude, {
+            'id': instance.pk, 'name': instance.name, 'slug': instance.slug,
+            'city': instance.city, 'country': instance.country,
+        }
+
+
+class CityPoints(SpatialIndex):
+    version_name = 'index:city_points'
+
+    def rows(self):
+        rows = (
+            City.objects.order_by()
+            .filter(latitude__isnull=False, longitude__isnull=False)
+            .values_list('id', 'latitude', 'longitude', 'name', 'country_id')
+            .iterator(chunk_size=10000)
+        )
+        for pk, lat, lon, name, country_id in rows:
+            yield pk, lat, lon, {'id': pk, 'name': name, 'country_id': country_id}
+
+    def point(self, instance):
+        if instance.latitude is None or instance.longitude is None:
+            return None
+        return instance.latitude, instance.longitude, {
+            'id': instance.pk, 'name': instance.name, 'country_id': instance.country_id,
+        }
+
+
+destination_points = DestinationPoints()
+city_points = CityPoints()
+
+SPATIAL_INDEXES = {
+    'destination': destination_points,
+    'city': city_points,
+}
+
+
+@receiver(post_save, sender=Destination)
+def update_destination_point(sender, instance, **kwargs):
+    """
+    Mantém o índice espacial atualizado quando um destino é salvo (depois
+    do commit)
+    """
+    transaction.on_commit(lambda: destination_points.upsert(instance))
+
+
+@receiver(post_delete, sender=Destination)
+def remove_destination_point(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: destination_points.remove(pk))
+
+
+@receiver(post_save, sender=City)
+def update_city_point(sender, instance, **kwargs):
+    transaction.on_commit(lambda: city_points.upsert(instance))
+
+
+@receiver(post_delete, sender=City)
+def remove_city_point(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: city_points.remove(pk))
+
+
+@receiver(bulk_changed, sender=Destination)
+def reload_destination_points(sender, **kwargs):
+    """
+    Gravações em lote não disparam post_save: recarregar o índice inteiro
+    """
+    transaction.on_commit(destination_points.invalidate)
+
+
+@receiver(bulk_changed, sender=City)
+def reload_city_points(sender, **kwargs):
+    transaction.on_commit(city_points.invalidate)
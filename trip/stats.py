@@ -0,0 +1,190 @@
+# Estatísticas materializadas por usuário (dashboard)
+from collections import Counter
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Itinerary, Trip, TripStats
+
+TRIP_FIELDS = ('user_id', 'start_date', 'end_date')
+ITINERARY_FIELDS = ('user_id', 'budget', 'status')
+
+
+def trip_contribution(values):
+    """
+    Quanto uma viagem soma nas estatísticas do seu usuário
+    """
+    delta = {'trip_count': 1}
+    start_date, end_date = values['start_date'], values['end_date']
+    if start_date and end_date:
+        delta['dated_trip_count'] = 1
+        delta['duration_days_sum'] = (end_date - start_date).days
+    return delta
+
+
+def itinerary_contribution(values):
+    """
+    Quanto um itinerário soma nas estatísticas do seu usuário
+    """
+    delta = {'itinerary_count': 1}
+    if values['budget'] is not None:
+        delta['budget_count'] = 1
+        delta['budget_sum'] = Decimal(values['budget'])
+    status_field = TripStats.STATUS_FIELDS.get(values['status'])
+    if status_field:
+        delta[status_field] = 1
+    return delta
+
+
+def _subtract(new, old):
+    delta = dict(new)
+    for field, value in old.items():
+        delta[field] = delta.get(field, 0) - value
+    return {field: value for field, value in delta.items() if value}
+
+
+def apply_delta(user_id, delta, create_missing=True):
+    """
+    Aplica a diferença com um UPDATE atômico (F-expressions).
+    Se o usuário ainda não tem linha, recalcula do zero.
+    """
+    if not delta:
+        return
+    updated = TripStats.objects.filter(user_id=user_id).update(
+        **{field: F(field) + value for field, value in delta.items()}
+    )
+    if updated or not create_missing:
+        return
+    try:
+        with transaction.atomic():
+            rebuild_user_stats(user_id)
+    except IntegrityError:
+        # Outra requisição criou a linha antes; basta aplicar a diferença
+        apply_delta(user_id, delta, create_missing=False)
+
+
+def rebuild_user_stats(user_id):
+    """
+    Recalcula as estatísticas de um usuário a partir das tabelas
+    """
+    totals = Counter()
+    trips = Trip.objects.filter(user_id=user_id).order_by().values_list('start_date', 'end_date')
+    for start_date, end_date in trips.iterator(chunk_size=2000):
+        totals.update(trip_contribution({'start_date': start_date, 'end_date': end_date}))
+
+    itineraries = Itinerary.objects.filter(user_id=user_id).order_by()
+    budget = itineraries.aggregate(count=Count('id'), budget_count=Count('budget'), budget_sum=Sum('budget'))
+    totals['itinerary_count'] = budget['count']
+    totals['budget_count'] = budget['budget_count']
+    totals['budget_sum'] = budget['budget_sum'] or Decimal('0')
+    for row in itineraries.values('status').annotate(total=Count('id')):
+        status_field = TripStats.STATUS_FIELDS.get(row['status'])
+        if status_field:
+            totals[status_field] = row['total']
+
+    defaults = {field.attname: totals.get(field.attname, 0)
+                for field in TripStats._meta.concrete_fields
+                if field.attname not in ('user_id', 'updated_at')}
+    stats, _created = TripStats.objects.update_or_create(user_id=user_id, defaults=defaults)
+    return stats
+
+
+def get_user_stats(user):
+    """
+    Linha de estatísticas do usuário (uma única consulta)
+    """
+    stats = TripStats.objects.filter(user=user).first()
+    if stats is None:
+        stats = rebuild_user_stats(user.pk)
+    return stats
+
+
+def _remember_old_values(instance, fields):
+    # Sem valores carregados (ex.: instância montada à mão) busca o estado anterior
+    if instance.pk is None or instance.loaded_values(*fields) is not None:
+        return
+    old = type(instance).objects.filter(pk=instance.pk).values(*fields).first()
+    instance._loaded_values = {**getattr(instance, '_loaded_values', {}), **(old or {})}
+    if old is None:
+        instance._stats_missing = True
+
+
+def _clean(model, values):
+    """
+    Valores como o banco os devolve: o ORM aceita datas e decimais em texto
+    (ex.: Trip.objects.create(start_date='2024-01-01'))
+    """
+    if values is None:
+        return None
+    return {name: model._meta.get_field(name).to_python(value) for name, value in values.items()}
+
+
+def _values(instance, fields):
+    return _clean(type(instance), {name: getattr(instance, name) for name in fields})
+
+
+def _on_save(instance, created, fields, contribution):
+    new = _values(instance, fields)
+    missing = instance.__dict__.pop('_stats_missing', False)
+    old = None if created or missing else _clean(type(instance), instance.loaded_values(*fields))
+    if old is None:
+        apply_delta(new['user_id'], contribution(new))
+    elif old['user_id'] == new['user_id']:
+        apply_delta(new['user_id'], _subtract(contribution(new), contribution(old)))
+    else:
+        apply_delta(old['user_id'], _subtract({}, contribution(old)), create_missing=False)
+        apply_delta(new['user_id'], contribution(new))
+
+
+def _on_delete(instance, fields, contribution):
+    old = _clean(type(instance), instance.loaded_values(*fields)) or _values(instance, fields)
+    apply_delta(old['user_id'], _subtract({}, contribution(old)), create_missing=False)
+
+
+@receiver(pre_save, sender=Trip)
+def trip_stats_pre_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _remember_old_values(instance, TRIP_FIELDS)
+
+
+@receiver(post_save, sender=Trip)
+def trip_stats_post_save(sender, instance, created, raw=False, **kwargs):
+    """
+    Atualiza as estatísticas do usuário quando uma viagem é salva
+    """
+    if not raw:
+        _on_save(instance, created, TRIP_FIELDS, trip_contribution)
+
+
+@receiver(post_delete, sender=Trip)
+def trip_stats_post_delete(sender, instance, **kwargs):
+    """
+    Atualiza as estatísticas do usuário quando uma viagem é removida
+    """
+    _on_delete(instance, TRIP_FIELDS, trip_contribution)
+
+
+@receiver(pre_save, sender=Itinerary)
+def itinerary_stats_pre_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _remember_old_values(instance, ITINERARY_FIELDS)
+
+
+@receiver(post_save, sender=Itinerary)
+def itinerary_stats_post_save(sender, instance, created, raw=False, **kwargs):
+    """
+    Atualiza as estatísticas do usuário quando um itinerário é salvo
+    """
+    if not raw:
+        _on_save(instance, created, ITINERARY_FIELDS, itinerary_contribution)
+
+
+@receiver(post_delete, sender=Itinerary)
+def itinerary_stats_post_delete(sender, instance, **kwargs):
+    """
+    Atualiza as estatísticas do usuário quando um itinerário é removido
+    """
+    _on_delete(instance, ITINERARY_FIELDS, itinerary_contribution)
@@ -0,0 +1,314 @@
+# Índice de intervalos em memória das estadias dos destinos (chegada -> partida)
+import bisect
+import heapq
+import threading
+from collections import defaultdict, namedtuple
+
+import numpy as np
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Destination, Trip
+from .search import normalize
+from .signals import bulk_changed
+from .versions import SharedVersion, bump_version
+
+# Datas como dias ordinais (date.toordinal); intervalos fechados [start, end]
+Stay = namedtuple('Stay', 'id trip_id user_id city start end')
+
+
+def stay_span(arrival, departure):
+    """
+    (início, fim) em dias ordinais; uma data só vale pelas duas, nenhuma -> None
+    """
+    if arrival is None and departure is None:
+        return None
+    start = (arrival or departure).toordinal()
+    end = (departure or arrival).toordinal()
+    return min(start, end), max(start, end)
+
+
+def shares_night(stay, start, end):
+    """
+    Se as estadias passam ao menos uma noite juntas. Partir e chegar no
+    mesmo dia (troca de cidade) não é conflito.
+    """
+    return max(stay.start, start) < min(stay.end, end)
+
+
+class IntervalTree:
+    """
+    Árvore de intervalos estática: estadias ordenadas pelo início, com uma
+    árvore de segmentos do maior fim por cima (formato implícito, em listas).
+
+    Uma consulta só considera as estadias que começam até o fim pedido
+    (bisect) e desce apenas pelos ramos em que alguma ainda termina depois
+    do começo pedido: O(log n + k), sem comparar todos os pares.
+    """
+
+    def __init__(self, stays):
+        stays = sorted(stays, key=lambda stay: (stay.start, stay.id))
+        self.stays = stays
+        self.starts = [stay.start for stay in stays]
+        size = 1
+        while size < len(stays):
+            size *= 2
+        tree = np.full(2 * size, np.iinfo(np.int64).min, dtype=np.int64)
+        tree[size:size + len(stays)] = [stay.end for stay in stays]
+        level = size // 2
+        while level:
+            tree[level:2 * level] = np.maximum(tree[2 * level:4 * level:2], tree[2 * level + 1:4 * level:2])
+            level //= 2
+        self.size = size
+        self.max_end = tree.tolist()
+
+    def __len__(self):
+        return len(self.stays)
+
+    def overlapping(self, start, end):
+        """
+        Estadias com início <= end e fim >= start, pela ordem de início
+        """
+        count = bisect.bisect_right(self.starts, end)
+        found = []
+        stack = [(1, 0, self.size)] if count else []
+        while stack:
+            node, left, right = stack.pop()
+            if left >= count or self.max_end[node] < start:
+                continue
+            if node >= self.size:
+                found.append(self.stays[left])
+                continue
+            middle = (left + right) // 2
+            stack.append((2 * node + 1, middle, right))
+            stack.append((2 * node, left, middle))
+        return found
+
+
+class StayIndex(SharedVersion):
+    """
+    Estadias de todos os destinos com data, numa árvore global e em árvores
+    por viagem, por cidade e por viajante (montadas na primeira consulta).
+
+    Alterações depois da carga ficam numa sobreposição, como no índice
+    espacial, até a próxima reconstrução; entre processos, pela versão
+    compartilhada.
+    """
+    version_name = 'index:stays'
+
+    OVERLAY_REBUILD_RATIO = 0.05
+    OVERLAY_REBUILD_MIN = 1000
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._reset()
+
+    def _reset(self):
+        self.stays = {}
+        self.groups = defaultdict(list)
+        self.trees = {}
+        self.overlay = {}
+        self.removed = set()
+        # Viagem -> viajante, para as alterações não consultarem a viagem
+        self.trip_users = {}
+
+    @staticmethod
+    def keys(stay):
+        yield None
+        if stay.trip_id is not None:
+            yield 'trip', stay.trip_id
+        if stay.user_id is not None:
+            yield 'user', stay.user_id
+        if stay.city:
+            yield 'city', stay.city
+
+    @staticmethod
+    def stay(pk, trip_id, user_id, city, arrival, departure):
+        span = stay_span(arrival, departure)
+        if span is None:
+            return None
+        return Stay(pk, trip_id, user_id, normalize(city), *span)
+
+    def load(self):
+        with self._lock:
+            self._reset()
+            self.start_load()
+            self.trip_users = dict(Trip.objects.values_list('id', 'user_id').iterator(chunk_size=10000))
+            rows = (
+                Destination.objects.order_by()
+                .exclude(arrival_date__isnull=True, departure_date__isnull=True)
+                .values_list('id', 'trip_id', 'trip__user_id', 'city', 'arrival_date', 'departure_date')
+                .iterator(chunk_size=10000)
+            )
+            for row in rows:
+                stay = self.stay(*row)
+                self.stays[stay.id] = stay
+                for key in self.keys(stay):
+                    self.groups[key].append(stay)
+            self._loaded = True
+
+    def ensure_loaded(self):
+        if not self.is_current():
+            with self._lock:
+                if not self.is_current():
+                    self.load()
+
+    def invalidate(self):
+        with self._lock:
+            bump_version(self.version_name)
+            self._loaded = False
+            self._reset()
+
+    def _maybe_rebuild(self):
+        limit = max(self.OVERLAY_REBUILD_MIN, int(len(self.stays) * self.OVERLAY_REBUILD_RATIO))
+        if len(self.overlay) + len(self.removed) > limit:
+            self._loaded = False
+
+    def upsert(self, instance):
+        """
+        Adiciona, move ou remove (sem datas) uma estadia sem reconstruir as árvores
+        """
+        with self._lock:
+            if not self.advance():
+                return
+            self.overlay.pop(instance.pk, None)
+            self.removed.add(instance.pk)
+            user_id = self.trip_user(instance.trip_id)
+            stay = self.stay(
+                instance.pk, instance.trip_id, user_id, instance.city,
+                instance.arrival_date, instance.departure_date,
+            )
+            if stay is not None:
+                self.overlay[stay.id] = stay
+            self._maybe_rebuild()
+
+    def trip_user(self, trip_id):
+        if trip_id is None:
+            return None
+        if trip_id not in self.trip_users:
+            # Viagem criada (em outro processo) depois da carga
+            self.trip_users[trip_id] = Trip.objects.filter(pk=trip_id).values_list('user_id', flat=True).first()
+        return self.trip_users[trip_id]
+
+    def set_trip_user(self, trip_id, user_id, created=False):
+        """
+        Registra o viajante de uma viagem. Se ele pode ter mudado (sem o
+        valor anterior aqui para comparar), as estadias da viagem mudam junto:
+        descartar o índice em todos os processos.
+        """
+        with self._lock:
+            previous = self.trip_users.get(trip_id) if self._loaded else None
+            if created or previous == user_id:
+                if self._loaded:
+                    self.trip_users[trip_id] = user_id
+            else:
+                self.invalidate()
+
+    def remove(self, pk):
+        with self._lock:
+            if not self.advance():
+                return
+            self.overlay.pop(pk, None)
+            self.removed.add(pk)
+            self._maybe_rebuild()
+
+    def _tree(self, key):
+        tree = self.trees.get(key)
+        if tree is None:
+            tree = self.trees[key] = IntervalTree(self.groups.get(key, ()))
+        return tree
+
+    def overlapping(self, start, end, trip=None, user=None, city=None):
+        """
+        Estadias que tocam o período [start, end] (datas), pela ordem de
+        chegada; filtradas por viagem, viajante e/ou cidade
+        """
+        self.ensure_loaded()
+        start, end = start.toordinal(), end.toordinal()
+        city = normalize(city) if city else None
+        filters = {'trip_id': trip, 'user_id': user, 'city': city}
+        # A árvore mais seletiva; os outros filtros são aplicados depois
+        if trip is not None:
+            key = 'trip', trip
+        elif city:
+            key = 'city', city
+        elif user is not None:
+            key = 'user', user
+        else:
+            key = None
+
+        def matches(stay):
+            return all(value is None or getattr(stay, field) == value for field, value in filters.items())
+
+        with self._lock:
+            found = [
+                stay for stay in self._tree(key).overlapping(start, end)
+                if stay.id not in self.removed and matches(stay)
+            ]
+            extra = [
+                stay for stay in self.overlay.values()
+                if stay.start <= end and stay.end >= start and matches(stay)
+            ]
+        if extra:
+            found = sorted(found + extra, key=lambda stay: (stay.start, stay.id))
+        return found
+
+    def at(self, day, **filters):
+        """
+        Estadias que incluem o dia `day`
+        """
+        return self.overlapping(day, day, **filters)
+
+    def trip_overlaps(self, trip_id):
+        """
+        Pares (id, id) de estadias da viagem que se sobrepõem, numa varredura
+        pela ordem de chegada com um heap das partidas: O(n log n + k)
+        """
+        self.ensure_loaded()
+        with self._lock:
+            stays = [stay for stay in self._tree(('trip', trip_id)).stays if stay.id not in self.removed]
+            stays += [stay for stay in self.overlay.values() if stay.trip_id == trip_id]
+        stays.sort(key=lambda stay: (stay.start, stay.id))
+        pairs = []
+        active = []
+        for stay in stays:
+            while active and active[0][0] <= stay.start:
+                heapq.heappop(active)
+            pairs.extend((other.id, stay.id) for _end, _id, other in active if shares_night(other, stay.start, stay.end))
+            heapq.heappush(active, (stay.end, stay.id, stay))
+        return pairs
+
+
+stay_index = StayIndex()
+
+
+@receiver(post_save, sender=Destination)
+def update_stay(sender, instance, **kwargs):
+    """
+    Mantém o índice de estadias atualizado quando um destino é salvo (depois
+    do commit)
+    """
+    transaction.on_commit(lambda: stay_index.upsert(instance))
+
+
+@receiver(post_save, sender=Trip)
+def update_trip_user(sender, instance, created, **kwargs):
+    pk, user_id = instance.pk, instance.user_id
+    transaction.on_commit(lambda: stay_index.set_trip_user(pk, user_id, created))
+
+
+@receiver(post_delete, sender=Destination)
+def remove_stay(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: stay_index.remove(pk))
+
+
+@receiver(bulk_changed, sender=Destination)
+@receiver(bulk_changed, sender=Trip)
+def reload_stays(sender, **kwargs):
+    """
+    Gravações em lote não disparam post_save: recarregar o índice inteiro
+    """
+    transaction.on_commit(stay_index.invalidate)
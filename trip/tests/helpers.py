@@ -0,0 +1,47 @@
+# Dados mínimos para os testes
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth.models import User
+
+from ..models import Activity, City, Country, Destination, Itinerary, ItineraryActivity, Trip
+
+
+def make_user(username='viajante', **extra):
+    return User.objects.create_user(username, password='senha', **extra)
+
+
+def make_city(name='Lisboa', country=None, **extra):
+    if country is None:
+        country = Country.objects.create(name='Portugal', code='PT', currency='EUR', language='Português')
+    return City.objects.create(name=name, country=country, **extra)
+
+
+def make_trip(user, name='Férias', **extra):
+    return Trip.objects.create(user=user, name=name, **extra)
+
+
+def make_destination(name='Lisboa', **extra):
+    return Destination.objects.create(name=name, **extra)
+
+
+def make_activity(city, destination, name='Museu', price='10.00', duration_hours='2.00', **extra):
+    return Activity.objects.create(
+        name=name, description='', category='museum', city=city, destination=destination,
+        price=None if price is None else Decimal(price),
+        duration_hours=None if duration_hours is None else Decimal(duration_hours),
+        **extra,
+    )
+
+
+def make_itinerary(user, title='Roteiro', cities=(), **extra):
+    extra.setdefault('start_date', date(2025, 5, 1))
+    extra.setdefault('end_date', date(2025, 5, 3))
+    itinerary = Itinerary.objects.create(user=user, title=title, **extra)
+    if cities:
+        itinerary.cities.set(cities)
+    return itinerary
+
+
+def schedule(itinerary, activity, day_number=1, **extra):
+    return ItineraryActivity.objects.create(itinerary=itinerary, activity=activity, day_number=day_number, **extra)
@@ -0,0 +1,60 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Country, Destination
+from .helpers import make_destination, make_trip, make_user
+
+
+class ChangelistTests(TestCase):
+    def setUp(self):
+        self.user = make_user('admin', is_staff=True, is_superuser=True)
+        self.client.force_login(self.user)
+        Country.objects.create(name='Portugal', code='PT', currency='EUR', language='Português')
+        self.created = 0
+
+    def add_rows(self, count):
+        for _ in range(count):
+            self.created += 1
+            trip = make_trip(self.user, f'Viagem {self.created}')
+            for number in range(self.created % 3):
+                make_destination(
+                    f'Destino {self.created}-{number}', slug=f'destino-{self.created}-{number}',
+                    trip=trip, country='Portugal',
+                )
+
+    def queries(self, url, params=None):
+        cache.clear()
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return len(captured), response
+
+    def assertConstantQueries(self, url, params=None):
+        self.add_rows(3)
+        few, _response = self.queries(url, params)
+        self.add_rows(30)
+        many, response = self.queries(url, params)
+        self.assertEqual(few, many)
+        return response
+
+    def test_trip_changelist(self):
+        response = self.assertConstantQueries(reverse('admin:trip_trip_changelist'))
+        rows = {trip.name: trip.destinations_total for trip in response.context['cl'].result_list}
+        self.assertEqual(len(rows), 33)
+        self.assertEqual((rows['Viagem 1'], rows['Viagem 2'], rows['Viagem 3']), (1, 2, 0))
+
+    def test_destination_changelist_with_filter(self):
+        response = self.assertConstantQueries(reverse('admin:trip_destination_changelist'), {'country': 'Portugal'})
+        self.assertEqual(response.context['cl'].result_count, Destination.objects.count())
+
+    def test_count_is_cached(self):
+        self.add_rows(5)
+        url = reverse('admin:trip_trip_changelist')
+        first, _response = self.queries(url)
+        with CaptureQueriesContext(connection) as captured:
+            self.client.get(url)
+        self.assertEqual(len(captured), first - 1)
+        self.assertFalse(any('COUNT(*)' in query['sql'] for query in captured))
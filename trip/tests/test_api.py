@@ -0,0 +1,79 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Country
+from .helpers import make_city, make_destination, make_trip, make_user
+
+
+class DestinationApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for number in range(5):
+            make_destination(
+                f'Destino {number}', slug=f'destino-{number}', city='Porto', country='Portugal',
+                description='texto longo',
+            )
+
+    def test_sparse_fields(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse('trip:api_destination_list'), {'fields': 'id,name'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.json()['results'][0]), {'id', 'name'})
+        select = next(query['sql'] for query in captured if '"trip_destination"' in query['sql'])
+        self.assertNotIn('description', select)
+        self.assertNotIn('"city"', select)
+
+    def test_invalid_fields_and_sort(self):
+        url = reverse('trip:api_destination_list')
+        self.assertEqual(self.client.get(url, {'fields': 'id,senha'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'sort': 'description'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'cursor': 'lixo'}).status_code, 400)
+
+    def test_cursor_walks_every_row_once(self):
+        names = []
+        url = reverse('trip:api_destination_list') + '?sort=-name&limit=2&fields=name'
+        while url:
+            data = self.client.get(url).json()
+            names += [row['name'] for row in data['results']]
+            url = data['next']
+        self.assertEqual(names, [f'Destino {number}' for number in reversed(range(5))])
+
+    def test_detail(self):
+        response = self.client.get(reverse('trip:api_destination_detail', args=[1_000_000]))
+        self.assertEqual(response.status_code, 404)
+
+
+class TripApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = make_user()
+        self.trip = make_trip(self.user, 'Minha')
+        make_trip(make_user('outro'), 'Alheia')
+
+    def test_requires_login(self):
+        self.assertEqual(self.client.get(reverse('trip:api_trip_list')).status_code, 401)
+
+    def test_only_own_trips(self):
+        self.client.force_login(self.user)
+        data = self.client.get(reverse('trip:api_trip_list'), {'fields': 'name'}).json()
+        self.assertEqual(data['results'], [{'name': 'Minha'}])
+        other = self.client.get(reverse('trip:api_trip_detail', args=[self.trip.pk + 1]))
+        self.assertEqual(other.status_code, 404)
+
+
+class CityApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        portugal = make_city('Lisboa').country
+        make_city('Porto', portugal)
+        make_city('Madri', Country.objects.create(name='Espanha', code='ES', currency='EUR', language='Espanhol'))
+
+    def test_country_in_one_query(self):
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(reverse('trip:api_city_list'), {'country': 'pt', 'sort': 'name'})
+        rows = response.json()['results']
+        self.assertEqual([(row['name'], row['country']) for row in rows], [('Lisboa', 'Portugal'), ('Porto', 'Portugal')])
+        self.assertEqual(sum('"trip_city"' in query['sql'] for query in captured), 1)
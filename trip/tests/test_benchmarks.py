@@ -0,0 +1,49 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from ..benchmarks.datasets import SCALES, seed_dataset
+from ..benchmarks.runner import compare, percentile, run_suite
+from ..models import Destination, Transportation
+
+
+def report(scale='small', **views):
+    return {'meta': {'scale': scale}, 'views': views}
+
+
+def view(p90=10.0, queries=3, status=(200,)):
+    return {'p90_ms': p90, 'queries': queries, 'status': list(status)}
+
+
+class RunnerTests(TestCase):
+    def test_percentile(self):
+        values = list(range(1, 11))
+        self.assertEqual(percentile(values, 0.5), 5)
+        self.assertEqual(percentile(values, 0.9), 9)
+        self.assertEqual(percentile(values, 0.99), 10)
+        self.assertIsNone(percentile([], 0.5))
+
+    def test_compare(self):
+        baseline = report(home=view(), detail=view(), list=view())
+        current = report(home=view(p90=12.0), detail=view(queries=4), list=view(p90=13.0, status=(500,)))
+        problems = compare(current, baseline)
+        self.assertEqual(len(problems), 3)
+        self.assertTrue(problems[0].startswith('detail: 4 consultas'))
+        self.assertTrue(problems[1].startswith('list: status [500]'))
+        self.assertTrue(problems[2].startswith('list: p90'))
+        self.assertEqual(compare(report('medium'), baseline), ['escala diferente do baseline (medium x small)'])
+
+    def test_suite_on_seeded_dataset(self):
+        dataset = seed_dataset('small', seed=3, samples=5)
+        self.assertEqual(Destination.objects.count(), SCALES['small']['destinations'])
+        self.assertEqual(Transportation.objects.count(), SCALES['small']['transportation'])
+        self.assertEqual(len(dataset.destination_ids), 5)
+
+        cache.clear()
+        document = run_suite(dataset, names=['home', 'destination_detail'], iterations=4, warmup=1)
+        self.assertEqual(document['meta']['scale'], 'small')
+        self.assertEqual(set(document['views']), {'home', 'destination_detail'})
+        for result in document['views'].values():
+            self.assertEqual(result['status'], [200])
+            self.assertLessEqual(result['p50_ms'], result['p90_ms'])
+            self.assertIsInstance(result['queries'], int)
+        self.assertEqual(compare(document, document), [])
@@ -0,0 +1,57 @@
+from datetime import date
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from .. import charts
+from .helpers import make_trip, make_user
+
+
+class DurationChartTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = make_user()
+        self.trip = make_trip(self.user, 'Ida', start_date=date(2025, 1, 1), end_date=date(2025, 1, 5))
+        make_trip(self.user, 'Volta', start_date=date(2025, 2, 1), end_date=date(2025, 2, 3))
+        patcher = mock.patch.object(charts._executor, 'submit')
+        self.submit = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(charts._pending.clear)
+
+    def render(self):
+        """
+        Executa a renderização agendada no lugar do worker
+        """
+        key, user_id = self.submit.call_args.args[1:]
+        cache.set(key, charts.render_duration_chart(user_id))
+        charts._pending.discard(key)
+
+    def test_miss_schedules_once(self):
+        self.assertEqual(charts.get_duration_chart(self.user), (None, True))
+        self.assertEqual(charts.get_duration_chart(self.user), (None, True))
+        self.assertEqual(self.submit.call_count, 1)
+
+    def test_cached_until_a_trip_changes(self):
+        charts.get_duration_chart(self.user)
+        self.render()
+        chart, pending = charts.get_duration_chart(self.user)
+        self.assertTrue(chart.startswith('data:image/png;base64,'))
+        self.assertFalse(pending)
+
+        self.trip.end_date = date(2025, 1, 9)
+        self.trip.save()
+        self.assertEqual(charts.get_duration_chart(self.user), (None, True))
+        self.assertEqual(self.submit.call_count, 2)
+
+    def test_key_changes_on_delete(self):
+        make_trip(self.user, 'Extra')
+        charts.get_duration_chart(self.user)
+        self.render()
+        self.trip.delete()
+        self.assertEqual(charts.get_duration_chart(self.user), (None, True))
+
+    def test_needs_two_trips(self):
+        self.trip.delete()
+        self.assertEqual(charts.get_duration_chart(self.user), (None, False))
+        self.submit.assert_not_called()
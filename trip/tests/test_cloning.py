@@ -0,0 +1,88 @@
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection
+from django.test import TestCase
+
+from ..cloning import clone_destinations, clone_itineraries
+from ..models import Destination, Itinerary, ItineraryActivity, ItineraryDay
+from .helpers import (
+    make_activity, make_city, make_destination, make_itinerary, make_trip, make_user, schedule,
+)
+
+
+def without_returned_ids():
+    # Como no MySQL: o bulk_create não devolve os ids gerados
+    return mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False)
+
+
+class CloneDestinationsTests(TestCase):
+    def setUp(self):
+        self.trip = make_trip(make_user())
+        self.original = make_destination('Porto', city='Porto', country='Portugal')
+        image = default_storage.save('destinations/porto.jpg', ContentFile(b'imagem'))
+        rendition = default_storage.save(f'destinations/renditions/{self.original.pk}/card.jpg', ContentFile(b'card'))
+        Destination.objects.filter(pk=self.original.pk).update(image=image, renditions={'card': rendition})
+        self.original.refresh_from_db()
+
+    def check_copies(self, copies):
+        self.assertEqual(len(copies), 2)
+        for copy in copies:
+            self.assertIsNotNone(copy.pk)
+            stored = Destination.objects.get(pk=copy.pk)
+            self.assertEqual(stored.name, 'Cópia de Porto')
+            self.assertEqual(stored.trip_id, self.trip.pk)
+            self.assertTrue(stored.image.name)
+            self.assertIn(f'/renditions/{copy.pk}/', stored.renditions['card'])
+            self.assertTrue(default_storage.exists(stored.renditions['card']))
+        self.assertNotEqual(copies[0].slug, copies[1].slug)
+
+    def test_clone(self):
+        self.check_copies(clone_destinations([self.original, self.original], trip=self.trip))
+
+    def test_clone_without_returned_ids(self):
+        with without_returned_ids():
+            self.check_copies(clone_destinations([self.original, self.original], trip=self.trip))
+
+
+class CloneItinerariesTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.other = make_user('outro')
+        lisboa = make_city('Lisboa')
+        porto = make_city('Porto', country=lisboa.country)
+        destination = make_destination()
+        museum = make_activity(lisboa, destination, 'Museu', price='12.50', duration_hours='2.00')
+        tour = make_activity(porto, destination, 'Passeio', price='30.00', duration_hours='3.50')
+        self.itinerary = make_itinerary(self.user, 'Portugal', cities=[lisboa, porto], status='published', is_public=True)
+        schedule(self.itinerary, museum, 1)
+        schedule(self.itinerary, tour, 2)
+        self.itinerary.refresh_from_db()
+
+    def check_copies(self, copies):
+        self.assertEqual(len(copies), 2)
+        self.assertEqual(len({copy.pk for copy in copies}), 2)
+        for copy in copies:
+            stored = Itinerary.objects.get(pk=copy.pk)
+            self.assertEqual(stored.title, 'Cópia de Portugal')
+            self.assertEqual(stored.user, self.other)
+            self.assertEqual((stored.status, stored.is_public), ('draft', False))
+            self.assertEqual(set(stored.cities.all()), set(self.itinerary.cities.all()))
+            self.assertEqual(
+                sorted(ItineraryActivity.objects.filter(itinerary=stored).values_list('activity_id', 'day_number')),
+                sorted(ItineraryActivity.objects.filter(itinerary=self.itinerary).values_list('activity_id', 'day_number')),
+            )
+            self.assertEqual(
+                (stored.activity_count, stored.activity_cost, stored.activity_hours),
+                (self.itinerary.activity_count, self.itinerary.activity_cost, self.itinerary.activity_hours),
+            )
+            self.assertEqual(ItineraryDay.objects.filter(itinerary=stored).count(), 2)
+        self.assertEqual(self.other.trip_stats.itinerary_count, 2)
+
+    def test_clone(self):
+        self.check_copies(clone_itineraries([self.itinerary, self.itinerary], user=self.other))
+
+    def test_clone_without_returned_ids(self):
+        with without_returned_ids():
+            self.check_copies(clone_itineraries([self.itinerary, self.itinerary], user=self.other))
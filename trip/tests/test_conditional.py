@@ -0,0 +1,69 @@
+import os
+import tempfile
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..data_import.csv_import import DestinationImporter
+from ..models import Destination
+from .helpers import make_destination
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.destination = make_destination('Porto', slug='porto', city='Porto', country='Portugal')
+
+    def get(self, url, etag=None):
+        headers = {'If-None-Match': etag} if etag else {}
+        return self.client.get(url, headers=headers)
+
+    def assertRevalidates(self, url, change):
+        """
+        304 com o ETag atual; depois de `change`, 200 com um ETag novo
+        """
+        first = self.get(url)
+        self.assertEqual(first.status_code, 200)
+        etag = first.headers['ETag']
+        self.assertEqual(self.get(url, etag).status_code, 304)
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+        second = self.get(url, etag)
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(second.headers['ETag'], etag)
+        self.assertEqual(self.get(url, second.headers['ETag']).status_code, 304)
+
+    def import_rename(self, name):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, encoding='utf-8') as handle:
+            handle.write(f'name,slug,city,country\n{name},porto,Porto,Portugal\n')
+        self.addCleanup(os.remove, handle.name)
+        DestinationImporter(handle.name).run()
+
+    def test_detail_after_save(self):
+        def change():
+            self.destination.name = 'Porto antigo'
+            self.destination.save()
+        self.assertRevalidates(reverse('trip:api_destination_detail', args=[self.destination.pk]), change)
+
+    def test_detail_after_import(self):
+        # bulk_update no importador também precisa mudar o updated_at
+        url = reverse('trip:api_destination_detail', args=[self.destination.pk])
+        self.assertRevalidates(url, lambda: self.import_rename('Porto importado'))
+        self.assertEqual(Destination.objects.get(pk=self.destination.pk).name, 'Porto importado')
+
+    def test_list_after_create(self):
+        self.assertRevalidates(reverse('trip:api_destination_list'), lambda: make_destination('Braga'))
+
+    def test_list_after_delete(self):
+        self.assertRevalidates(reverse('trip:api_destination_list'), self.destination.delete)
+
+    def test_list_after_import(self):
+        self.assertRevalidates(reverse('trip:api_destination_list'), lambda: self.import_rename('Porto importado'))
+
+    def test_list_ignores_rollback(self):
+        url = reverse('trip:api_destination_list')
+        etag = self.get(url).headers['ETag']
+        with self.captureOnCommitCallbacks(execute=False):
+            make_destination('Braga')
+        self.assertEqual(self.get(url, etag).status_code, 304)
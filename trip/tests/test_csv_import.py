@@ -0,0 +1,80 @@
+import os
+import tempfile
+from datetime import date
+
+from django.test import TestCase
+
+from ..data_import.csv_import import DestinationImporter
+from ..models import Destination
+from .helpers import make_destination, make_trip, make_user
+
+HEADER = 'name,slug,city,arrival_date\n'
+ROWS = [
+    'Lisboa,lisboa,Lisboa,2025-05-01\n',
+    ',sem-nome,Porto,2025-05-02\n',
+    'Porto,,Porto,02/05/2025\n',
+    'Faro,faro,Faro,amanhã\n',
+    'Braga,,Braga,\n',
+]
+
+
+class DestinationImportTests(TestCase):
+    def setUp(self):
+        self.lisboa = make_destination('Lisboa antiga', slug='lisboa', city='')
+        handle, self.path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'w', encoding='utf-8') as output:
+            output.write(HEADER + ''.join(ROWS))
+        self.addCleanup(os.remove, self.path)
+
+    def end_of(self, index):
+        # Offset em bytes do fim da linha ROWS[index]
+        return len((HEADER + ''.join(ROWS[:index + 1])).encode())
+
+    def test_upsert_and_error_offsets(self):
+        result = DestinationImporter(self.path, batch_size=2).run()
+        self.assertEqual((result.rows, result.created, result.updated, result.skipped), (5, 2, 1, 2))
+        self.assertEqual(result.errors, [
+            f"offset {self.end_of(1)}: coluna 'name' obrigatória",
+            f"offset {self.end_of(3)}: data inválida: 'amanhã'",
+        ])
+        self.assertEqual(result.offset, self.end_of(4))
+        self.lisboa.refresh_from_db()
+        self.assertEqual((self.lisboa.name, self.lisboa.city), ('Lisboa', 'Lisboa'))
+        self.assertEqual(Destination.objects.get(name='Porto').arrival_date, date(2025, 5, 2))
+        slugs = set(Destination.objects.values_list('slug', flat=True))
+        self.assertEqual(len(slugs), 3)
+        self.assertTrue(all(slugs))
+
+        # De novo: o destino com slug é atualizado, os sem slug são criados outra vez
+        again = DestinationImporter(self.path, batch_size=2).run()
+        self.assertEqual((again.created, again.updated), (2, 1))
+        self.assertEqual(Destination.objects.filter(slug='lisboa').count(), 1)
+
+    def test_without_update(self):
+        result = DestinationImporter(self.path, update=False).run()
+        self.assertEqual((result.created, result.updated, result.skipped), (2, 0, 3))
+        self.lisboa.refresh_from_db()
+        self.assertEqual(self.lisboa.name, 'Lisboa antiga')
+
+    def test_resume_from_offset(self):
+        result = DestinationImporter(self.path).run(start_offset=self.end_of(2))
+        self.assertEqual((result.rows, result.created), (2, 1))
+        self.assertEqual(result.errors, [f"offset {self.end_of(3)}: data inválida: 'amanhã'"])
+        self.assertTrue(Destination.objects.filter(name='Braga').exists())
+        self.assertFalse(Destination.objects.filter(name='Porto').exists())
+
+    def test_unknown_trip_is_a_row_error(self):
+        trip = make_trip(make_user())
+        rows = ['name,trip\n', f'Lisboa,{trip.pk}\n', f'Porto,{trip.pk + 100}\n', 'Faro,abc\n', 'Braga,\n']
+        with open(self.path, 'w', encoding='utf-8') as output:
+            output.write(''.join(rows))
+        result = DestinationImporter(self.path, batch_size=10).run()
+        self.assertEqual((result.rows, result.created, result.skipped), (4, 2, 2))
+        self.assertEqual(result.errors, [
+            f"offset {len(''.join(rows[:4]).encode())}: viagem inválida: 'abc'",
+            f"offset {len(''.join(rows[:3]).encode())}: viagem desconhecida: {trip.pk + 100}",
+        ])
+        self.assertEqual(
+            dict(Destination.objects.filter(name__in=['Lisboa', 'Braga']).values_list('name', 'trip_id')),
+            {'Lisboa': trip.pk, 'Braga': None},
+        )
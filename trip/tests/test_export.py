@@ -0,0 +1,78 @@
+import csv
+import io
+import json
+from datetime import date
+
+from django.test import TestCase
+from django.urls import reverse
+
+from .. import export
+from .helpers import make_activity, make_city, make_destination, make_itinerary, make_user, schedule
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        make_destination('Lisboa', slug='lisboa', city='Lisboa', arrival_date=date(2025, 5, 1))
+        # Vírgula e aspas no nome, data nula
+        make_destination('Porto, "Invicta"', slug='porto', city='Porto')
+        self.user = make_user()
+        city = make_city()
+        activity = make_activity(city, make_destination('Museus', slug='museus'), 'Museu', price=None)
+        schedule(make_itinerary(self.user), activity, 2)
+        schedule(make_itinerary(make_user('outro')), activity, 1)
+
+    def download(self, name, fmt, fields=None):
+        params = {'format': fmt}
+        if fields:
+            params['fields'] = fields
+        response = self.client.get(reverse('trip:api_export', args=[name]), params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def both(self, name, fields=None):
+        rows = list(csv.DictReader(io.StringIO(self.download(name, 'csv', fields))))
+        lines = [json.loads(line) for line in self.download(name, 'ndjson', fields).splitlines()]
+        return rows, lines
+
+    def assertAligned(self, rows, lines):
+        self.assertEqual(len(rows), len(lines))
+        for row, line in zip(rows, lines):
+            self.assertEqual(list(row), list(line))
+            self.assertEqual(row, {key: '' if value is None else str(value) for key, value in line.items()})
+
+    def test_columns_follow_fields(self):
+        rows, lines = self.both('destinations', 'city,arrival_date,name,id')
+        self.assertEqual(list(lines[0]), ['city', 'arrival_date', 'name', 'id'])
+        self.assertAligned(rows, lines)
+        self.assertIn('Porto, "Invicta"', [row['name'] for row in rows])
+
+    def test_default_columns_across_chunks(self):
+        for number in range(5):
+            make_destination(f'Extra {number}', slug=f'extra-{number}')
+        # Lotes de 2 linhas, como o comando export_data
+        rows = list(csv.DictReader(io.StringIO(
+            b''.join(export.export_parts('destinations', 'csv', chunk_size=2)).decode()
+        )))
+        lines = [
+            json.loads(line)
+            for line in b''.join(export.export_parts('destinations', 'ndjson', chunk_size=2)).splitlines()
+        ]
+        self.assertEqual(list(lines[0]), list(export.DestinationExportSerializer.default_fields))
+        self.assertEqual([line['id'] for line in lines], sorted(line['id'] for line in lines))
+        self.assertEqual(len(lines), 8)
+        self.assertAligned(rows, lines)
+        self.assertEqual(lines, [json.loads(line) for line in self.download('destinations', 'ndjson').splitlines()])
+
+    def test_owner_rows_only(self):
+        self.assertEqual(
+            self.client.get(reverse('trip:api_export', args=['itinerary-activities'])).status_code, 401,
+        )
+        self.client.force_login(self.user)
+        rows, lines = self.both('itinerary-activities')
+        self.assertEqual([line['day_number'] for line in lines], [2])
+        self.assertIsNone(lines[0]['price'])
+        self.assertAligned(rows, lines)
+
+    def test_invalid_format(self):
+        response = self.client.get(reverse('trip:api_export', args=['destinations']), {'format': 'xml'})
+        self.assertEqual(response.status_code, 400)
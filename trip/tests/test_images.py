@@ -0,0 +1,62 @@
+import io
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from ..images import build_renditions
+from ..models import Destination
+from .helpers import make_destination
+
+
+def upload(name, color):
+    buffer = io.BytesIO()
+    Image.new('RGB', (1000, 700), color).save(buffer, 'JPEG')
+    return default_storage.save(f'destinations/{name}.jpg', ContentFile(buffer.getvalue()))
+
+
+class RenditionTests(TestCase):
+    def test_older_job_does_not_overwrite_newer_upload(self):
+        destination = make_destination('Porto', slug='porto')
+        old_image, new_image = upload('antiga', 'red'), upload('nova', 'blue')
+        Destination.objects.filter(pk=destination.pk).update(image=new_image)
+
+        current = build_renditions(destination.pk, new_image)
+        # O job da imagem anterior termina depois
+        stale = build_renditions(destination.pk, old_image)
+
+        destination.refresh_from_db()
+        self.assertEqual(destination.renditions, current)
+        self.assertTrue(set(current.values()).isdisjoint(stale.values()))
+        for path in current.values():
+            self.assertTrue(default_storage.exists(path))
+            self.assertTrue(path.startswith(f'destinations/renditions/{destination.pk}/'))
+        # Azul, da imagem nova
+        with default_storage.open(current['card']) as handle:
+            self.assertGreater(Image.open(handle).convert('RGB').getpixel((0, 0))[2], 200)
+        # As versões do job atrasado não ficam órfãs no disco
+        for path in stale.values():
+            self.assertFalse(default_storage.exists(path))
+
+    @override_settings(TRIP_MEDIA_DELETE_ASYNC=False)
+    def test_replacing_the_image_removes_old_renditions(self):
+        destination = make_destination('Porto', slug='porto')
+        old_image = upload('antiga', 'red')
+        Destination.objects.filter(pk=destination.pk).update(image=old_image)
+        old = build_renditions(destination.pk, old_image)
+        destination = Destination.objects.get(pk=destination.pk)
+        self.assertEqual(destination.renditions, old)
+
+        buffer = io.BytesIO()
+        Image.new('RGB', (1000, 700), 'blue').save(buffer, 'JPEG')
+        destination.image = ContentFile(buffer.getvalue(), name='nova.jpg')
+        with self.captureOnCommitCallbacks(execute=True):
+            destination.save()
+
+        destination.refresh_from_db()
+        self.assertTrue(destination.renditions)
+        for path in destination.renditions.values():
+            self.assertTrue(default_storage.exists(path))
+        for path in [old_image, *old.values()]:
+            self.assertFalse(default_storage.exists(path), path)
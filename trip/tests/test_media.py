@@ -0,0 +1,99 @@
+import os
+import time
+from io import StringIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+
+from .. import media
+from ..media import queue_file_deletion
+from ..models import Destination
+from .helpers import make_destination
+
+
+def stored(name, age=7200):
+    """
+    Arquivo gravado no storage com a data de modificação no passado
+    """
+    name = default_storage.save(name, ContentFile(b'x' * 10))
+    past = time.time() - age
+    os.utime(default_storage.path(name), (past, past))
+    return name
+
+
+class QueueFileDeletionTests(TestCase):
+    def test_deleted_after_commit(self):
+        name = stored('destinations/velha.jpg')
+        with self.captureOnCommitCallbacks(execute=True):
+            queue_file_deletion([name, '', 'destinations/inexistente.jpg'])
+            self.assertTrue(default_storage.exists(name))
+        self.assertFalse(default_storage.exists(name))
+
+    def test_kept_on_rollback(self):
+        name = stored('destinations/velha.jpg')
+        self.addCleanup(default_storage.delete, name)
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    queue_file_deletion([name])
+                    raise ValueError
+            except ValueError:
+                pass
+        self.assertEqual(callbacks, [])
+        self.assertTrue(default_storage.exists(name))
+
+    @override_settings(TRIP_MEDIA_DELETE_ASYNC=True)
+    def test_deleted_in_the_background(self):
+        name = stored('destinations/velha.jpg')
+        with self.captureOnCommitCallbacks(execute=True):
+            queue_file_deletion([name])
+        # Um único worker: a próxima tarefa só roda depois da remoção
+        media._executor.submit(lambda: None).result()
+        self.assertFalse(default_storage.exists(name))
+
+
+class CollectOrphanMediaTests(TestCase):
+    def setUp(self):
+        self.kept = Destination.objects.get(pk=make_destination('Porto', slug='porto').pk)
+        gone = make_destination('Faro', slug='faro')
+        self.image = stored('destinations/porto.jpg')
+        self.card = stored(f'destinations/renditions/{self.kept.pk}/abc123/card.jpg')
+        Destination.objects.filter(pk=self.kept.pk).update(image=self.image, renditions={'card': self.card})
+        self.orphans = [
+            stored('destinations/solta.jpg'),
+            # Versão de um upload anterior do mesmo destino
+            stored(f'destinations/renditions/{self.kept.pk}/old999/card.jpg'),
+            # Destino apagado e pasta fora do padrão
+            stored(f'destinations/renditions/{gone.pk}/def456/card.jpg'),
+            stored('destinations/renditions/tmp/card.jpg'),
+        ]
+        gone.delete()
+        # Upload em andamento: mais novo que --min-age
+        self.fresh = stored('destinations/nova.jpg', age=0)
+        for name in [self.image, self.card, self.fresh, *self.orphans]:
+            self.addCleanup(lambda name=name: default_storage.exists(name) and default_storage.delete(name))
+
+    def collect(self, *args):
+        output = StringIO()
+        call_command('collect_orphan_media', '--batch-size', '2', *args, stdout=output)
+        return output.getvalue()
+
+    def existing(self):
+        return {
+            name for name in [self.image, self.card, self.fresh, *self.orphans]
+            if os.path.exists(os.path.join(settings.MEDIA_ROOT, name))
+        }
+
+    def test_dry_run(self):
+        output = self.collect('--dry-run')
+        self.assertIn('Seriam removidos 4 órfão(s)', output)
+        self.assertEqual(len(self.existing()), 7)
+
+    def test_removes_orphans_across_batches(self):
+        output = self.collect()
+        self.assertIn('6 arquivo(s) verificado(s). Removidos 4 órfão(s)', output)
+        self.assertEqual(self.existing(), {self.image, self.card, self.fresh})
@@ -0,0 +1,41 @@
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase
+
+from ..context_processors import MENU_VERSION, load_destinations_menu
+from ..versions import get_version
+from .helpers import make_destination
+
+
+def names(menu):
+    return [row['name'] for group in menu for row in group['list']]
+
+
+class DestinationsMenuTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        make_destination('Lisboa', slug='lisboa', country='Portugal')
+
+    def test_cached_until_commit(self):
+        self.assertEqual(names(load_destinations_menu()), ['Lisboa'])
+        version = get_version(MENU_VERSION)
+        with self.captureOnCommitCallbacks(execute=True):
+            make_destination('Porto', slug='porto', country='Portugal')
+            # Antes do commit a versão não muda: quem ler agora não guarda o
+            # menu antigo sob a versão nova
+            self.assertEqual(get_version(MENU_VERSION), version)
+            with self.assertNumQueries(0):
+                self.assertEqual(names(load_destinations_menu()), ['Lisboa'])
+        self.assertEqual(get_version(MENU_VERSION), version + 1)
+        self.assertEqual(names(load_destinations_menu()), ['Lisboa', 'Porto'])
+
+    def test_rollback_keeps_the_version(self):
+        version = get_version(MENU_VERSION)
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    make_destination('Porto', slug='porto')
+                    raise ValueError
+            except ValueError:
+                pass
+        self.assertEqual(get_version(MENU_VERSION), version)
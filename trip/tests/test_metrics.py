@@ -0,0 +1,88 @@
+from django.test import SimpleTestCase, TestCase, modify_settings, override_settings
+from django.urls import reverse
+
+from .. import metrics
+from ..metrics import RequestMetrics, RollingHistogram, registry, sql_signature
+from .helpers import make_user
+
+
+class SqlSignatureTests(SimpleTestCase):
+    def test_values_are_removed(self):
+        self.assertEqual(
+            sql_signature('SELECT "a"."id" FROM "a" WHERE "a"."id" IN (%s, %s,%s)  AND "a"."x" = %s'),
+            'SELECT "a"."id" FROM "a" WHERE "a"."id" IN (?) AND "a"."x" = ?',
+        )
+        self.assertEqual(
+            sql_signature("SELECT * FROM t WHERE name = 'O''Brien' AND n > 10.5 LIMIT 21"),
+            'SELECT * FROM t WHERE name = ? AND n > ? LIMIT ?',
+        )
+        # Listas de tamanhos diferentes têm a mesma assinatura
+        self.assertEqual(sql_signature('x IN (%s, %s)'), sql_signature('x IN (%s, %s, %s)'))
+
+
+class RollingHistogramTests(SimpleTestCase):
+    def test_window_slides(self):
+        histogram = RollingHistogram((0.1, 1.0), window=180, slot=60)
+        histogram.observe(0.05, now=0)
+        histogram.observe(0.5, now=70)
+        histogram.observe(5.0, now=130)
+        histogram.observe(0.5, now=130)
+        self.assertEqual(histogram.snapshot(now=170), ([1, 3, 4], 4, 6.05))
+        # A fatia do instante 0 saiu da janela
+        self.assertEqual(histogram.snapshot(now=190), ([0, 2, 3], 3, 6.0))
+        # E é reaproveitada, zerada, pela fatia nova
+        histogram.observe(0.01, now=200)
+        self.assertEqual(histogram.snapshot(now=200), ([1, 3, 4], 4, 6.01))
+        self.assertEqual(histogram.snapshot(now=1000), ([0, 0, 0], 0, 0.0))
+
+
+class MetricsViewTests(TestCase):
+    def setUp(self):
+        registry.reset()
+        self.addCleanup(registry.reset)
+        self.url = reverse('trip:metrics')
+
+    def test_staff_only_without_token(self):
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.client.force_login(make_user())
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.client.force_login(make_user('admin', is_staff=True))
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('# TYPE trip_requests_total counter', response.content.decode())
+
+    @override_settings(TRIP_METRICS_TOKEN='segredo')
+    def test_token(self):
+        self.client.force_login(make_user('admin', is_staff=True))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.assertEqual(self.client.get(self.url, HTTP_AUTHORIZATION='Bearer outro').status_code, 403)
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url, HTTP_AUTHORIZATION='Bearer segredo').status_code, 200)
+
+    def test_nplusone_signatures(self):
+        request = RequestMetrics()
+        # O SQL chega com os marcadores %s: a mesma consulta repetida conta junto
+        request.signatures['SELECT "a"."x" FROM "a" WHERE "a"."id" = %s'] += metrics.DUPLICATE_THRESHOLD
+        request.signatures['SELECT 1'] += 1
+        self.assertEqual(list(request.duplicates()), ['SELECT "a"."x" FROM "a" WHERE "a"."id" = %s'])
+        registry.record('trip:home', request, 0.2, now=0)
+        text = registry.render_prometheus(now=0)
+        self.assertIn('trip_requests_total{view="trip:home"} 1', text)
+        self.assertIn('sql="SELECT ... FROM \\"a\\" WHERE \\"a\\".\\"id\\" = ?"} 1', text)
+        self.assertIn('trip_request_duration_seconds_bucket{view="trip:home",le="0.25"} 1', text)
+
+
+@modify_settings(MIDDLEWARE={'prepend': 'trip.middleware.RequestMetricsMiddleware'})
+class RequestMetricsMiddlewareTests(TestCase):
+    def setUp(self):
+        registry.reset()
+        self.addCleanup(registry.reset)
+
+    def test_records_by_url_name(self):
+        self.client.get(reverse('trip:api_destination_list'))
+        self.client.get(reverse('trip:api_destination_list'))
+        entry = registry.views['trip:api_destination_list']
+        self.assertEqual(entry.requests, 2)
+        _cumulative, count, queries = entry.sql_queries.snapshot()
+        self.assertEqual(count, 2)
+        self.assertGreater(queries, 0)
@@ -0,0 +1,78 @@
+from datetime import date, datetime, timedelta, timezone
+from decimal import Decimal
+
+from django.test import TestCase
+
+from ..models import Destination
+from ..pagination import InvalidCursor, _KeysetSeek, decode_cursor, encode_cursor, keyset_paginate
+from .helpers import make_destination
+
+
+class KeysetNullsTests(TestCase):
+    def setUp(self):
+        for number in range(7):
+            # Datas repetidas e nulos intercalados
+            arrival = None if number % 3 == 0 else date(2025, 5, 1) + timedelta(days=number // 2)
+            make_destination(f'Destino {number}', slug=f'destino-{number}', arrival_date=arrival)
+
+    def expected(self, descending):
+        rows = list(Destination.objects.values_list('arrival_date', 'id'))
+        # SQLite (como o MySQL): nulos no início da ordem crescente
+        rows.sort(key=lambda row: (row[0] is not None, row[0] or date.min, row[1]), reverse=descending)
+        return [pk for _arrival, pk in rows]
+
+    def walk(self, ordering):
+        queryset = Destination.objects.all()
+        pages = [keyset_paginate(queryset, ordering, limit=2, nullable=True)]
+        while pages[-1].has_next:
+            pages.append(keyset_paginate(queryset, ordering, after=pages[-1].next_cursor, limit=2, nullable=True))
+        back = [pages[-1]]
+        while back[-1].has_previous:
+            back.append(keyset_paginate(queryset, ordering, before=back[-1].previous_cursor, limit=2, nullable=True))
+        forward = [row.pk for page in pages for row in page]
+        backward = [row.pk for page in reversed(back) for row in page]
+        return forward, backward
+
+    def test_ascending(self):
+        self.assertEqual(self.walk('arrival_date'), (self.expected(False),) * 2)
+
+    def test_descending(self):
+        self.assertEqual(self.walk('-arrival_date'), (self.expected(True),) * 2)
+
+    def test_order_by_uses_the_index(self):
+        # Sem "IS NULL" no ORDER BY, que impediria o uso do índice (arrival_date, id)
+        for ordering in ('arrival_date', '-arrival_date'):
+            seek = _KeysetSeek(Destination.objects.all(), ordering, None, None, 2, True)
+            self.assertNotIn('NULL', str(seek.queryset.query).rsplit('ORDER BY', 1)[1])
+
+
+class KeysetCursorTests(TestCase):
+    def setUp(self):
+        for number in range(7):
+            # Nomes repetidos: o id desempata
+            make_destination(f'Destino {number % 3}', slug=f'destino-{number}')
+
+    def walk(self, ordering):
+        queryset = Destination.objects.all()
+        page = keyset_paginate(queryset, ordering, limit=3)
+        found = list(page)
+        while page.has_next:
+            page = keyset_paginate(queryset, ordering, after=page.next_cursor, limit=3)
+            found += page
+        return [(row.name, row.pk) for row in found]
+
+    def test_ties_are_neither_repeated_nor_skipped(self):
+        rows = sorted(Destination.objects.values_list('name', 'id'))
+        self.assertEqual(self.walk('name'), rows)
+        self.assertEqual(self.walk('-name'), rows[::-1])
+
+    def test_cursor_round_trip(self):
+        moment = datetime(2025, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+        self.assertEqual(decode_cursor(encode_cursor([moment, 7])), [moment.isoformat(), 7])
+        self.assertEqual(decode_cursor(encode_cursor([Decimal('10.50'), 7])), ['10.50', 7])
+        self.assertEqual(decode_cursor(encode_cursor([None, 7])), [None, 7])
+
+    def test_invalid_cursor(self):
+        for token in ('%%%', encode_cursor([1, 2, 3]), 'e30'):
+            with self.assertRaises(InvalidCursor):
+                keyset_paginate(Destination.objects.all(), 'name', after=token)
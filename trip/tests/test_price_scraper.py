@@ -0,0 +1,134 @@
+import json
+import threading
+import time
+from urllib.parse import unquote
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.test import SimpleTestCase, TestCase
+
+from ..data_import.price_scraper import FetchError, JsonPriceFetcher, PriceRefresher, parse_price
+from ..models import Transportation
+from .helpers import make_city
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Fornecedor de preços falso; o caminho escolhe a resposta
+    """
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def send(self, status, body, chunks=None):
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        if chunks is None:
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        else:
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for chunk in chunks:
+                self.wfile.write(chunk)
+
+    def do_GET(self):
+        name = unquote(self.path.strip('/'))
+        if name == 'São Paulo':
+            self.send(200, b'{"price": 77}')
+        elif name == 'ok':
+            self.send(200, b'{"price": 123.456}')
+        elif name == 'chunked':
+            self.send(200, b'', chunks=[b'7\r\n{"price\r\n', b'a;ext=1\r\n": "49.9"}\r\n', b'0\r\n\r\n'])
+        elif name == 'missing':
+            self.send(404, b'{}')
+        elif name == 'error':
+            self.send(500, b'{}')
+        elif name == 'slow':
+            time.sleep(1)
+            try:
+                self.send(200, b'{"price": 1}')
+            except OSError:
+                pass
+        elif name == 'bad':
+            self.send(200, b'<html>')
+        elif name == 'nan':
+            self.send(200, b'{"price": NaN}')
+        elif name == 'badchunk':
+            self.send(200, b'', chunks=[b'zz\r\n{}\r\n0\r\n\r\n'])
+            self.close_connection = True
+
+
+class ParsePriceTests(SimpleTestCase):
+    def test_valid(self):
+        self.assertEqual(parse_price('10.006'), Decimal('10.01'))
+        self.assertEqual(parse_price(7), Decimal('7.00'))
+        self.assertIsNone(parse_price(None))
+
+    def test_rejected(self):
+        for value in ('NaN', float('nan'), 'Infinity', float('-inf'), 'sNaN', '1e400', '-1', 'abc', '1000000'):
+            with self.subTest(value=value), self.assertRaises(FetchError):
+                parse_price(value)
+
+
+class PriceRefresherTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        cls.server.daemon_threads = True
+        thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        thread.start()
+        cls.addClassCleanup(thread.join)
+        cls.addClassCleanup(cls.server.server_close)
+        cls.addClassCleanup(cls.server.shutdown)
+
+    def setUp(self):
+        lisboa = make_city('Lisboa')
+        porto = make_city('Porto', country=lisboa.country)
+        self.routes = {
+            name: Transportation.objects.create(
+                origin=lisboa, destination=porto, transport_type='TRAIN', company=name,
+                duration_hours=Decimal('3.00'), price_min=Decimal('10.00'),
+            )
+            for name in ('ok', 'chunked', 'missing', 'error', 'slow', 'bad', 'nan', 'badchunk')
+        }
+
+    def test_refresh(self):
+        port = self.server.server_address[1]
+        fetcher = JsonPriceFetcher(f'http://127.0.0.1:{port}/{{company}}')
+        result = PriceRefresher(fetcher, rate=0, timeout=0.5, batch_size=3).run()
+
+        prices = dict(Transportation.objects.values_list('company', 'price_min'))
+        self.assertEqual(prices['ok'], Decimal('123.46'))
+        self.assertEqual(prices['chunked'], Decimal('49.90'))
+        self.assertEqual(prices['missing'], Decimal('10.00'))
+        self.assertEqual((result.checked, result.changed, result.unchanged), (8, 2, 0))
+        # error, slow (timeout), bad, nan, badchunk
+        self.assertEqual(result.failed, 5)
+        failed = {error.split(':', 1)[0] for error in result.errors}
+        self.assertEqual(failed, {f"rota {self.routes[name].pk}" for name in ('error', 'slow', 'bad', 'nan', 'badchunk')})
+
+    def test_route_values_are_quoted(self):
+        fetcher = JsonPriceFetcher('http://127.0.0.1/prices?from={origin__name}&to={destination__name}')
+        self.assertEqual(
+            fetcher.url_for({'origin__name': 'São Paulo', 'destination__name': 'Łódź & Co'}),
+            'http://127.0.0.1/prices?from=S%C3%A3o%20Paulo&to=%C5%81%C3%B3d%C5%BA%20%26%20Co',
+        )
+        port = self.server.server_address[1]
+        self.routes['ok'].company = 'São Paulo'
+        self.routes['ok'].save()
+        Transportation.objects.exclude(pk=self.routes['ok'].pk).delete()
+        PriceRefresher(JsonPriceFetcher(f'http://127.0.0.1:{port}/{{company}}'), rate=0).run()
+        self.assertEqual(Transportation.objects.get().price_min, Decimal('77.00'))
+
+    def test_unencodable_url_fails_only_its_route(self):
+        port = self.server.server_address[1]
+        Transportation.objects.filter(pk=self.routes['ok'].pk).update(booking_url=f'http://127.0.0.1:{port}/ok')
+        Transportation.objects.filter(pk=self.routes['error'].pk).update(booking_url=f'http://127.0.0.1:{port}/Łódź')
+        result = PriceRefresher(JsonPriceFetcher(), rate=0, timeout=0.5).run()
+        self.assertEqual((result.changed, result.failed), (1, 1))
+        self.assertTrue(result.errors[0].startswith(f"rota {self.routes['error'].pk}:"))
+        self.assertEqual(Transportation.objects.get(pk=self.routes['ok'].pk).price_min, Decimal('123.46'))
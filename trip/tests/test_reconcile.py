@@ -0,0 +1,60 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..data_import.reconcile import UNSPECIFIED_DESTINATION, fix_destinations, populate_destinations
+from ..models import Destination, Trip
+from .helpers import make_destination, make_trip, make_user
+
+
+class ReconcileTests(TestCase):
+    def setUp(self):
+        user = make_user()
+        for name in ('Férias em Paris', 'Paris de novo', 'Paris', 'Lisboa 2024', 'Sem destino'):
+            make_trip(user, name)
+        self.lisboa = make_destination('Lisboa', slug='lisboa', trip=Trip.objects.get(name='Lisboa 2024'))
+
+    def test_populate_dry_run(self):
+        result = populate_destinations(dry_run=True)
+        self.assertEqual((result.created, result.existing, result.skipped), (1, 1, 1))
+        self.assertEqual(result.created_names, ['Paris'])
+        self.assertEqual(Destination.objects.count(), 1)
+
+    def test_populate(self):
+        result = populate_destinations(batch_size=1)
+        self.assertEqual((result.created, result.existing, result.skipped), (1, 1, 1))
+        paris = Destination.objects.get(name='Paris')
+        self.assertEqual((paris.slug, paris.description), ('paris', 'Destino com 3 viagens'))
+        # De novo: nada a criar
+        self.assertEqual(populate_destinations().created, 0)
+
+    def test_fix_dry_run(self):
+        result = fix_destinations(batch_size=2, dry_run=True)
+        self.assertEqual((result.created, result.skipped), (4, 1))
+        self.assertEqual(Destination.objects.count(), 1)
+
+    def test_fix(self):
+        result = fix_destinations(batch_size=2)
+        self.assertEqual((result.created, result.skipped), (4, 1))
+        self.assertFalse(Trip.objects.filter(destinations__isnull=True).exists())
+        self.assertEqual(
+            sorted(Destination.objects.exclude(pk=self.lisboa.pk).values_list('trip__name', 'name', 'slug')),
+            [
+                ('Férias em Paris', 'Paris', 'paris'),
+                ('Paris', 'Paris', 'paris-2'),
+                ('Paris de novo', 'Paris', 'paris-1'),
+                ('Sem destino', UNSPECIFIED_DESTINATION, 'destino-nao-especificado'),
+            ],
+        )
+        self.assertEqual(fix_destinations().created, 0)
+
+    def test_commands(self):
+        output = StringIO()
+        call_command('populate_destinations', '--dry-run', stdout=output)
+        self.assertIn('1 destinos seriam criados', output.getvalue())
+        self.assertEqual(Destination.objects.count(), 1)
+        call_command('fix_destinations', stdout=StringIO())
+        output = StringIO()
+        call_command('fix_destinations', stdout=output)
+        self.assertIn('Todas as viagens já têm destino!', output.getvalue())
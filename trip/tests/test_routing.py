@@ -0,0 +1,104 @@
+import random
+from decimal import Decimal
+
+from django.test import TestCase
+
+from ..models import Country, Transportation
+from ..routing import route_graph
+from .helpers import make_city
+
+
+def brute_force(legs, origin, destination, max_legs):
+    """
+    Pares (preço, duração) não dominados entre todos os caminhos com até
+    max_legs trechos
+    """
+    found = set()
+    stack = [(origin, 0, 0, 0)]
+    while stack:
+        node, price, duration, count = stack.pop()
+        if node == destination and count:
+            found.add((price, duration))
+            continue
+        if count == max_legs:
+            continue
+        for leg in legs:
+            if leg.origin_id == node:
+                stack.append((leg.destination_id, price + leg.price_min, duration + leg.duration_hours, count + 1))
+    return {
+        (price, duration) for price, duration in found
+        if not any(p <= price and d <= duration and (p, d) != (price, duration) for p, d in found)
+    }
+
+
+class RouteGraphTests(TestCase):
+    def setUp(self):
+        country = Country.objects.create(name='Portugal', code='PT', currency='EUR', language='Português')
+        self.cities = [make_city(f'Cidade {number}', country=country).pk for number in range(7)]
+        rng = random.Random(3)
+        modes = [code for code, _label in Transportation.TRANSPORT_TYPES]
+        self.legs = [
+            Transportation.objects.create(
+                origin_id=origin, destination_id=destination, transport_type=rng.choice(modes),
+                price_min=Decimal(rng.randrange(10, 200)), duration_hours=Decimal(rng.randrange(1, 30)),
+            )
+            for origin, destination in (rng.sample(self.cities, 2) for _leg in range(30))
+        ]
+        route_graph.invalidate()
+        self.addCleanup(route_graph.invalidate)
+
+    def check_route(self, route, origin, destination, max_legs):
+        legs = route['legs']
+        self.assertTrue(1 <= len(legs) <= max_legs)
+        self.assertEqual(legs[0]['origin_id'], origin)
+        self.assertEqual(legs[-1]['destination_id'], destination)
+        for leg, following in zip(legs, legs[1:]):
+            self.assertEqual(leg['destination_id'], following['origin_id'])
+        self.assertEqual(route['price'], sum(leg['price'] for leg in legs))
+
+    def test_pareto_matches_brute_force(self):
+        for max_legs in (1, 2, 4):
+            for origin in self.cities:
+                for destination in self.cities:
+                    if origin == destination:
+                        continue
+                    routes = route_graph.find_routes(origin, destination, max_legs=max_legs)
+                    for route in routes:
+                        self.check_route(route, origin, destination, max_legs)
+                    self.assertEqual(
+                        {(Decimal(str(r['price'])), Decimal(str(r['duration_hours']))) for r in routes},
+                        brute_force(self.legs, origin, destination, max_legs),
+                        (origin, destination, max_legs),
+                    )
+
+    def test_single_criteria(self):
+        found = 0
+        for origin in self.cities:
+            for destination in self.cities:
+                routes = route_graph.find_routes(origin, destination) if origin != destination else []
+                if not routes:
+                    continue
+                found += 1
+                [cheapest] = route_graph.find_routes(origin, destination, criteria='price')
+                [fastest] = route_graph.find_routes(origin, destination, criteria='duration')
+                self.assertEqual(cheapest['price'], min(route['price'] for route in routes))
+                self.assertEqual(fastest['duration_hours'], min(route['duration_hours'] for route in routes))
+        self.assertTrue(found)
+
+    def test_fewest_legs_respects_max_legs(self):
+        for origin in self.cities:
+            for destination in self.cities:
+                if origin == destination:
+                    continue
+                for max_legs in (1, 2, 3):
+                    routes = route_graph.find_routes(origin, destination, criteria='legs', max_legs=max_legs)
+                    pareto = route_graph.find_routes(origin, destination, max_legs=max_legs)
+                    # Existe rota com até max_legs trechos se e só se a busca em largura acha uma
+                    self.assertEqual(bool(routes), bool(pareto))
+                    for route in routes:
+                        self.check_route(route, origin, destination, max_legs)
+                        self.assertLessEqual(len(route['legs']), min(len(r['legs']) for r in pareto))
+
+    def test_invalid_criteria(self):
+        with self.assertRaises(ValueError):
+            route_graph.find_routes(self.cities[0], self.cities[1], criteria='cheapest')
@@ -0,0 +1,94 @@
+from datetime import time
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from ..models import Itinerary, ItineraryActivity
+from ..scheduler import plan_itinerary, schedule_itinerary
+from ..totals import rebuild_itinerary_totals
+from .helpers import make_activity, make_city, make_destination, make_itinerary, make_user, schedule
+
+
+class SchedulerTests(TestCase):
+    def setUp(self):
+        lisboa = make_city('Lisboa', latitude=38.72, longitude=-9.14)
+        porto = make_city('Porto', country=lisboa.country, latitude=41.15, longitude=-8.61)
+        destination = make_destination()
+
+        def activity(city, name, rating, hours, price='10.00', **extra):
+            return make_activity(city, destination, name, price=price, duration_hours=hours, rating=rating, **extra)
+
+        self.castle = activity(lisboa, 'Castelo', '5.0', '4.00')
+        self.cruise = activity(lisboa, 'Cruzeiro', '4.5', '9.00')  # maior que o dia
+        self.museum = activity(lisboa, 'Museu', '4.0', '3.00', price='5.00')
+        self.tram = activity(lisboa, 'Elétrico', '3.0', '3.00')
+        activity(lisboa, 'Fechado', '5.0', '1.00', is_active=False)
+        self.cellar = activity(porto, 'Caves', '4.0', '2.00', price=None)
+        self.itinerary = make_itinerary(make_user(), cities=[lisboa, porto])
+
+    def days(self, plan):
+        return [
+            [(entry.activity.name, entry.start_time, entry.end_time) for entry in day.entries]
+            for day in plan.days
+        ]
+
+    def test_fills_days_by_rating_within_capacity(self):
+        plan = plan_itinerary(self.itinerary, days=2)
+        self.assertEqual(self.days(plan), [
+            [('Castelo', time(9, 0), time(13, 0)), ('Museu', time(13, 30), time(16, 30))],
+            [('Caves', time(9, 0), time(11, 0))],
+        ])
+        # O cruzeiro não cabe em nenhum dia; o elétrico não cabe no que sobrou
+        self.assertEqual(plan.unscheduled, [self.cruise, self.tram])
+        self.assertEqual(plan.total_cost, Decimal('15.00'))
+
+    def test_budget(self):
+        plan = plan_itinerary(self.itinerary, days=2, budget=Decimal('12.00'))
+        self.assertEqual([entry.activity for entry in plan.entries], [self.castle, self.cellar])
+        self.assertIn(self.museum, plan.unscheduled)
+
+    def test_more_hours_fit_more_activities(self):
+        plan = plan_itinerary(self.itinerary, days=2, hours_per_day=12, day_start=time(8, 0), gap_minutes=0)
+        # Guloso pela avaliação: depois do castelo o cruzeiro (9h) já não cabe
+        self.assertEqual([entry.activity.name for entry in plan.days[0].entries], ['Castelo', 'Museu', 'Elétrico'])
+        self.assertEqual(plan.days[0].entries[-1].end_time, time(18, 0))
+        self.assertEqual(plan.unscheduled, [self.cruise])
+
+    def test_invalid_options(self):
+        for options in ({'days': 0}, {'days': 2, 'hours_per_day': 16, 'day_start': time(9, 0)}):
+            with self.subTest(options=options), self.assertRaises(ValueError):
+                plan_itinerary(self.itinerary, **options)
+        self.itinerary.end_date = None
+        with self.assertRaises(ValueError):
+            plan_itinerary(self.itinerary)
+
+    def test_schedule_replaces_entries_and_keeps_totals(self):
+        schedule(self.itinerary, self.tram, 3)
+        loaded = Itinerary.objects.get(pk=self.itinerary.pk)
+        schedule_itinerary(self.itinerary, days=2)
+        self.assertEqual(
+            sorted(ItineraryActivity.objects.filter(itinerary=self.itinerary).values_list('activity__name', 'day_number')),
+            [('Castelo', 1), ('Caves', 2), ('Museu', 1)],
+        )
+        self.assertFalse(rebuild_itinerary_totals(self.itinerary.pk))
+        # Salvar uma instância lida antes não desfaz os totais
+        loaded.title = 'Portugal'
+        loaded.save()
+        self.assertEqual(
+            Itinerary.objects.values_list('activity_count', 'activity_cost').get(pk=self.itinerary.pk),
+            (3, Decimal('15.00')),
+        )
+
+    def test_command(self):
+        output = StringIO()
+        call_command('schedule_itinerary', self.itinerary.pk, '--days', '2', '--dry-run', stdout=output)
+        self.assertIn('09:00-13:00  Castelo', output.getvalue())
+        self.assertFalse(ItineraryActivity.objects.exists())
+        call_command('schedule_itinerary', self.itinerary.pk, '--days', '2', stdout=StringIO())
+        self.assertEqual(ItineraryActivity.objects.count(), 3)
+        with self.assertRaises(CommandError):
+            call_command('schedule_itinerary', self.itinerary.pk, '--start', '25h', stdout=StringIO())
+        with self.assertRaises(CommandError):
+            call_command('schedule_itinerary', 0, stdout=StringIO())
@@ -0,0 +1,91 @@
+from unittest import mock
+
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import City, Country, Destination
+from ..search import adestination_filter, city_index, destination_filter, destination_index
+from ..versions import bump_version
+from .helpers import make_city, make_destination
+
+
+class DestinationSearchTests(TestCase):
+    def setUp(self):
+        make_destination('Lisboa', slug='lisboa', city='Lisboa', country='Portugal')
+        make_destination('São Paulo', slug='sao-paulo', city='São Paulo', country='Brasil')
+        Destination.objects.bulk_create(
+            Destination(name=f'Praia {number}', slug=f'praia-{number}', city='Búzios', country='Brasil')
+            for number in range(1200)
+        )
+        destination_index.invalidate()
+        self.addCleanup(destination_index.invalidate)
+
+    def names(self, query):
+        condition, _total = destination_filter(query)
+        return set(Destination.objects.filter(condition).values_list('name', flat=True))
+
+    def test_accents_and_substrings(self):
+        self.assertEqual(self.names('sao paulo'), {'São Paulo'})
+        # No meio da palavra, como o icontains de antes
+        self.assertEqual(self.names('boa'), {'Lisboa'})
+        self.assertEqual(self.names('aul'), {'São Paulo'})
+
+    def test_returns_every_match(self):
+        condition, total = destination_filter('buzios')
+        self.assertEqual(total, 1200)
+        self.assertEqual(Destination.objects.filter(condition).count(), 1200)
+        self.assertEqual(len(destination_index.search_ids('praia')), 1200)
+
+    def test_database_fallback_above_cap(self):
+        with mock.patch('trip.search.MAX_MATCHED_IDS', 100):
+            condition, total = destination_filter('Búzios')
+        self.assertIsNone(total)
+        self.assertEqual(Destination.objects.filter(condition).count(), 1200)
+
+    def test_list_reports_real_total(self):
+        response = self.client.get(reverse('trip:destination_list'), {'search': 'praia'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['db'].count, 1200)
+        self.assertEqual(len(response.context['db']), 10)
+
+    async def test_async_search_does_not_reload_in_the_event_loop(self):
+        await destination_index.aensure_loaded()
+
+        async def loaded_then_changed():
+            # Outro processo grava logo depois da conferência da versão
+            bump_version(destination_index.version_name)
+
+        with mock.patch.object(destination_index, 'aensure_loaded', loaded_then_changed):
+            _condition, total = await adestination_filter('lisboa')
+        self.assertEqual(total, 1)
+
+
+class CitySearchTests(TestCase):
+    def setUp(self):
+        self.lisboa = make_city('Lisboa')
+        city_index.invalidate()
+        self.addCleanup(city_index.invalidate)
+
+    def test_saving_a_city_does_not_query_the_country(self):
+        city_index.ensure_loaded()
+        city = City.objects.get(pk=self.lisboa.pk)
+        city.name = 'Lisboa Antiga'
+        with self.captureOnCommitCallbacks() as callbacks:
+            city.save()
+        with self.assertNumQueries(0):
+            for callback in callbacks:
+                callback()
+            [result] = city_index.search('antiga')
+        self.assertEqual(result['country'], 'Portugal')
+
+    def test_city_of_a_country_the_index_has_not_seen(self):
+        city_index.ensure_loaded()
+        # Sem sinais: o índice não conhece o país
+        [country] = Country.objects.bulk_create([Country(name='Espanha', code='ES', currency='EUR', language='Espanhol')])
+        with self.captureOnCommitCallbacks() as callbacks:
+            madrid = City.objects.create(name='Madrid', country=country)
+        with self.assertNumQueries(0):
+            for callback in callbacks:
+                callback()
+            [result] = city_index.search('madrid')
+        self.assertEqual((result['id'], result['country']), (madrid.pk, 'Espanha'))
@@ -0,0 +1,59 @@
+from unittest import mock
+
+from django.db import IntegrityError
+from django.test import TestCase
+
+from .. import slugs
+from ..models import SLUG_SAVE_ATTEMPTS, Destination
+from ..slugs import allocate_slug, allocate_slugs
+from .helpers import make_destination
+
+
+class AllocateSlugTests(TestCase):
+    def test_next_free_suffix(self):
+        self.assertEqual(allocate_slug(Destination, 'Porto'), 'porto')
+        for slug in ('porto', 'porto-1', 'porto-3', 'porto-france', 'porto-2a'):
+            make_destination('Porto', slug=slug)
+        self.assertEqual(allocate_slug(Destination, 'Porto'), 'porto-2')
+
+    def test_family_query_skips_prefix_neighbours(self):
+        for slug in ('paris', 'paris-france', 'paris-1', 'paris-texas-2'):
+            make_destination('Paris', slug=slug)
+        family = Destination.objects.filter(slugs._family_query('slug', ['paris']))
+        self.assertEqual(sorted(family.values_list('slug', flat=True)), ['paris', 'paris-1'])
+
+    def test_exclude_pk_keeps_own_slug(self):
+        porto = make_destination('Porto', slug='porto')
+        self.assertEqual(allocate_slug(Destination, 'Porto', exclude_pk=porto.pk), 'porto')
+
+    def test_batch(self):
+        make_destination('Porto', slug='porto')
+        make_destination('Porto 1', slug='porto-1')
+        self.assertEqual(
+            allocate_slugs(Destination, ['Porto', 'Porto', 'Lisboa', 'Porto 1', ''], reserved={'lisboa'}),
+            ['porto-2', 'porto-3', 'lisboa-1', 'porto-1-1', 'destino'],
+        )
+
+    def test_bases_that_look_like_suffixes(self):
+        # "abc" + 1 e a base "abc-1" não podem gerar o mesmo slug
+        self.assertEqual(allocate_slugs(Destination, ['abc', 'abc', 'abc-1']), ['abc', 'abc-1', 'abc-1-1'])
+
+
+class GeneratedSlugSaveTests(TestCase):
+    def test_retries_when_a_concurrent_save_takes_the_slug(self):
+        make_destination('Porto', slug='porto')
+        real = slugs.allocate_slug
+        # A primeira alocação não viu o "porto" gravado por outra requisição
+        with mock.patch.object(slugs, 'allocate_slug', side_effect=['porto', real(Destination, 'Porto')]) as allocate:
+            destination = make_destination('Porto')
+        self.assertEqual(allocate.call_count, 2)
+        self.assertEqual(destination.slug, 'porto-1')
+        self.assertEqual(Destination.objects.filter(slug__startswith='porto').count(), 2)
+
+    def test_gives_up_after_the_last_attempt(self):
+        make_destination('Porto', slug='porto')
+        with mock.patch.object(slugs, 'allocate_slug', return_value='porto') as allocate:
+            with self.assertRaises(IntegrityError):
+                make_destination('Porto')
+        self.assertEqual(allocate.call_count, SLUG_SAVE_ATTEMPTS)
+        self.assertEqual(Destination.objects.count(), 1)
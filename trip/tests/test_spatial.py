@@ -0,0 +1,105 @@
+import math
+import random
+from types import SimpleNamespace
+
+import numpy as np
+from django.test import SimpleTestCase
+
+from ..spatial import SpatialIndex, haversine_km
+
+
+class ListPoints(SpatialIndex):
+    """
+    Índice sobre uma lista em memória, sem banco
+    """
+    version_name = 'index:test_points'
+
+    def __init__(self, points):
+        super().__init__()
+        self.points = points
+
+    def rows(self):
+        for pk, lat, lon in self.points:
+            yield pk, lat, lon, {'id': pk}
+
+    def point(self, instance):
+        if instance.lat is None:
+            return None
+        return instance.lat, instance.lon, {'id': instance.pk}
+
+
+class SpatialIndexTests(SimpleTestCase):
+    def setUp(self):
+        rng = random.Random(11)
+        points = [(pk, rng.uniform(-90, 90), rng.uniform(-180, 180)) for pk in range(400)]
+        # Aglomerados na linha de data e nos polos
+        for pk in range(400, 600):
+            points.append((pk, rng.uniform(-60, 60), rng.choice((-1, 1)) * rng.uniform(178.5, 180)))
+        for pk in range(600, 700):
+            points.append((pk, rng.choice((-1, 1)) * rng.uniform(87, 90), rng.uniform(-180, 180)))
+        self.points = {pk: (lat, lon) for pk, lat, lon in points}
+        self.index = ListPoints(points)
+        self.index.invalidate()
+
+    def brute_force(self, lat, lon, radius_km):
+        ids = np.array(list(self.points))
+        coords = np.radians(np.array(list(self.points.values())))
+        distances = haversine_km(math.radians(lat), math.radians(lon), coords[:, 0], coords[:, 1])
+        return sorted(int(pk) for pk in ids[distances <= radius_km])
+
+    def assertWithin(self, lat, lon, radius_km):
+        found = self.index.within(lat, lon, radius_km)
+        self.assertEqual(
+            sorted(pk for pk, _distance in found), self.brute_force(lat, lon, radius_km), (lat, lon, radius_km),
+        )
+        distances = [distance for _pk, distance in found]
+        self.assertEqual(distances, sorted(distances))
+
+    def test_antimeridian(self):
+        for lat in (-50, 0, 35.5):
+            for lon in (-179.9, -179.2, 179.3, 180.0):
+                for radius in (50, 150, 400):
+                    self.assertWithin(lat, lon, radius)
+
+    def test_poles(self):
+        for lat in (-90, -89.5, -88, 88, 89.9, 90):
+            for lon in (-170, 0, 45):
+                for radius in (30, 120, 600):
+                    self.assertWithin(lat, lon, radius)
+
+    def test_random_queries(self):
+        rng = random.Random(5)
+        for _query in range(60):
+            self.assertWithin(rng.uniform(-90, 90), rng.uniform(-180, 180), rng.choice((10, 300, 2500, 12000)))
+
+    def test_nearest_grows_the_radius(self):
+        # Longe de tudo: o raio inicial de 25 km não acha ninguém
+        self.points = {pk: point for pk, point in self.points.items() if abs(point[0]) < 60 or pk >= 600}
+        index = ListPoints([(pk, lat, lon) for pk, (lat, lon) in self.points.items()])
+        index.invalidate()
+        for lat, lon in ((0, 0), (70, 179.9), (-75, -179.9)):
+            coords = np.radians(np.array(list(self.points.values())))
+            distances = haversine_km(math.radians(lat), math.radians(lon), coords[:, 0], coords[:, 1])
+            expected = [list(self.points)[position] for position in np.argsort(distances)[:5]]
+            self.assertEqual([pk for pk, _distance in index.nearest(lat, lon, k=5)], expected)
+        self.assertEqual(index.nearest(0, 0, k=5, max_radius_km=1), [])
+
+    def test_overlay_and_removed(self):
+        self.index.ensure_loaded()
+        moved = next(pk for pk, (lat, _lon) in self.points.items() if abs(lat) < 60)
+        # Movido para junto da linha de data, um novo ponto e um removido
+        self.index.upsert(SimpleNamespace(pk=moved, lat=10.0, lon=179.95))
+        self.index.upsert(SimpleNamespace(pk=1000, lat=10.0, lon=-179.95))
+        self.index.upsert(SimpleNamespace(pk=1, lat=None, lon=None))
+        self.index.remove(2)
+        self.points[moved] = (10.0, 179.95)
+        self.points[1000] = (10.0, -179.95)
+        del self.points[1], self.points[2]
+        self.assertTrue(self.index.is_current())
+        for lat, lon in ((10.0, 180.0), (10.0, -179.0)):
+            self.assertWithin(lat, lon, 100)
+        # Onde estavam os pontos removidos (pk == posição na lista)
+        for pk in (1, 2):
+            _pk, old_lat, old_lon = self.index.points[pk]
+            self.assertWithin(old_lat, old_lon, 50)
+        self.assertEqual(self.index.describe([(1000, 1.0), (2, 1.0)]), [{'id': 1000, 'distance_km': 1.0}])
@@ -0,0 +1,100 @@
+from datetime import date
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models import Itinerary, Trip, TripStats
+from ..stats import get_user_stats, rebuild_user_stats
+from .helpers import make_itinerary, make_trip, make_user
+
+COUNTERS = (
+    'trip_count', 'dated_trip_count', 'duration_days_sum', 'itinerary_count', 'budget_count',
+    'budget_sum', 'draft_count', 'published_count', 'completed_count', 'cancelled_count',
+)
+
+
+class TripStatsTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.other = make_user('outro')
+
+    def stats(self, user):
+        return TripStats.objects.filter(user=user).values(*COUNTERS).first()
+
+    def assertNoDrift(self):
+        # Os deltas aplicados pelos sinais batem com o recálculo completo
+        for user in (self.user, self.other):
+            # Sem linha ainda: tudo zero
+            current = self.stats(user) or dict.fromkeys(COUNTERS, 0)
+            rebuild_user_stats(user.pk)
+            self.assertEqual(current, self.stats(user), user.username)
+
+    def test_dates_given_as_text(self):
+        trip = Trip.objects.create(user=self.user, start_date='2024-01-01', end_date='2024-01-05')
+        self.assertEqual(self.stats(self.user)['duration_days_sum'], 4)
+        trip.end_date = '2024-01-10'
+        trip.save()
+        self.assertEqual(self.stats(self.user)['duration_days_sum'], 9)
+        trip.delete()
+        self.assertEqual(self.stats(self.user)['duration_days_sum'], 0)
+        self.assertNoDrift()
+
+    def test_deltas_match_rebuild(self):
+        trip = make_trip(self.user, start_date=date(2025, 5, 1), end_date=date(2025, 5, 8))
+        make_trip(self.user)
+        itinerary = make_itinerary(self.user, budget=Decimal('500.00'), status='published')
+        make_itinerary(self.user, budget='120.50')
+        stats = self.stats(self.user)
+        self.assertEqual(
+            (stats['trip_count'], stats['dated_trip_count'], stats['duration_days_sum']), (2, 1, 7),
+        )
+        self.assertEqual(
+            (stats['itinerary_count'], stats['budget_count'], stats['budget_sum']), (2, 2, Decimal('620.50')),
+        )
+        self.assertEqual((stats['draft_count'], stats['published_count']), (1, 1))
+
+        # Mudar de dono, de status e de datas
+        trip.user = self.other
+        trip.save()
+        itinerary.status = 'completed'
+        itinerary.budget = None
+        itinerary.save()
+        Itinerary.objects.get(pk=itinerary.pk).delete()
+        self.assertEqual(self.stats(self.other)['duration_days_sum'], 7)
+        self.assertEqual(self.stats(self.user)['budget_sum'], Decimal('120.50'))
+        self.assertNoDrift()
+
+    def test_instance_without_loaded_values(self):
+        trip = make_trip(self.user, start_date=date(2025, 5, 1), end_date=date(2025, 5, 3))
+        # Montada à mão: o estado anterior vem do banco
+        Trip(pk=trip.pk, user=self.user, name=trip.name, start_date=date(2025, 5, 1), end_date=date(2025, 5, 6)).save()
+        self.assertEqual(self.stats(self.user)['duration_days_sum'], 5)
+        self.assertNoDrift()
+
+    def test_missing_row_is_rebuilt(self):
+        make_trip(self.user)
+        TripStats.objects.all().delete()
+        self.assertEqual(get_user_stats(self.user).trip_count, 1)
+        TripStats.objects.all().delete()
+        make_trip(self.user)
+        self.assertEqual(self.stats(self.user)['trip_count'], 2)
+
+    def test_rebuild_command(self):
+        make_trip(self.user)
+        TripStats.objects.filter(user=self.user).update(trip_count=99)
+        call_command('rebuild_trip_stats', stdout=StringIO())
+        self.assertEqual(self.stats(self.user)['trip_count'], 1)
+
+    def test_refresh_from_db_updates_previous_values(self):
+        trip = make_trip(self.user, start_date=date(2025, 5, 1), end_date=date(2025, 5, 3))
+        Trip.objects.filter(pk=trip.pk).update(user=self.other)
+        rebuild_user_stats(self.user.pk)
+        rebuild_user_stats(self.other.pk)
+        trip.refresh_from_db()
+        trip.end_date = date(2025, 5, 4)
+        trip.save()
+        self.assertEqual(self.stats(self.other)['duration_days_sum'], 3)
+        self.assertEqual(self.stats(self.user)['trip_count'], 0)
+        self.assertNoDrift()
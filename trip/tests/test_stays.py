@@ -0,0 +1,82 @@
+import random
+from datetime import date
+
+from django.test import TestCase
+
+from ..forms import DestinationForm
+from ..stays import IntervalTree, Stay, stay_index
+from .helpers import make_destination, make_trip, make_user
+
+
+class DestinationOverlapTests(TestCase):
+    def setUp(self):
+        self.trip = make_trip(make_user())
+        self.lisboa = make_destination(
+            'Lisboa', slug='lisboa', trip=self.trip,
+            arrival_date=date(2025, 5, 1), departure_date=date(2025, 5, 4),
+        )
+
+    def form(self, arrival, departure, instance=None):
+        data = {
+            'name': 'Porto', 'slug': 'porto', 'trip': self.trip.pk,
+            'arrival_date': arrival, 'departure_date': departure,
+        }
+        return DestinationForm(data=data, instance=instance)
+
+    def test_shared_night(self):
+        form = self.form('2025-05-03', '2025-05-06')
+        self.assertFalse(form.is_valid())
+        self.assertIn('Lisboa', str(form.non_field_errors()))
+
+    def test_same_day_change_of_city(self):
+        self.assertTrue(self.form('2025-05-04', '2025-05-06').is_valid())
+
+    def test_editing_itself(self):
+        form = self.form('2025-05-02', '2025-05-05', instance=self.lisboa)
+        self.assertTrue(form.is_valid(), form.errors)
+
+    def test_sees_writes_the_index_missed(self):
+        # Gravado por outro processo: o índice deste não foi atualizado
+        stay_index.invalidate()
+        self.addCleanup(stay_index.invalidate)
+        stay_index.ensure_loaded()
+        type(self.lisboa).objects.filter(pk=self.lisboa.pk).update(departure_date=date(2025, 5, 10))
+        self.assertFalse(self.form('2025-05-08', '2025-05-09').is_valid())
+
+
+class StayIndexTests(TestCase):
+    def setUp(self):
+        self.user = make_user()
+        self.trip = make_trip(self.user)
+        stay_index.invalidate()
+        self.addCleanup(stay_index.invalidate)
+
+    def test_upsert_without_queries(self):
+        stay_index.ensure_loaded()
+        destination = make_destination(
+            'Porto', slug='porto', trip_id=self.trip.pk,
+            arrival_date=date(2025, 5, 1), departure_date=date(2025, 5, 3),
+        )
+        with self.assertNumQueries(0):
+            stay_index.upsert(destination)
+        [stay] = stay_index.overlapping(date(2025, 5, 2), date(2025, 5, 2), user=self.user.pk)
+        self.assertEqual((stay.id, stay.trip_id), (destination.pk, self.trip.pk))
+
+
+class IntervalTreeTests(TestCase):
+    def test_matches_brute_force(self):
+        rng = random.Random(7)
+        for size in (0, 1, 2, 5, 33, 200):
+            stays = []
+            for pk in range(size):
+                start = rng.randrange(100)
+                stays.append(Stay(pk, None, None, '', start, start + rng.randrange(10)))
+            tree = IntervalTree(stays)
+            for _query in range(50):
+                start = rng.randrange(-5, 110)
+                end = start + rng.randrange(8)
+                expected = sorted(
+                    (stay for stay in stays if stay.start <= end and stay.end >= start),
+                    key=lambda stay: (stay.start, stay.id),
+                )
+                self.assertEqual(tree.overlapping(start, end), expected)
@@ -0,0 +1,71 @@
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from ..data_import.synthetic import BUILDERS, generate, make_plan
+from ..models import Activity, City, Destination, Itinerary, ItineraryActivity, Trip
+from ..totals import rebuild_itinerary_totals
+from .helpers import make_trip, make_user
+
+COUNTS = {
+    'countries': 3, 'cities': 7, 'users': 4, 'trips': 12, 'destinations': 15,
+    'transportation': 9, 'activities': 20, 'itineraries': 6, 'itinerary_activities': 4,
+}
+
+
+def fields(rows):
+    return [
+        {name: value for name, value in vars(row).items() if not name.startswith('_')}
+        for row in rows
+    ]
+
+
+class SyntheticDataTests(TestCase):
+    def test_counts_and_references(self):
+        make_trip(make_user('existente'), 'Existente')
+        result = generate(COUNTS, seed=1, batch_size=4)
+
+        self.assertEqual(result.rows['trip.Trip'], 12)
+        self.assertEqual(Trip.objects.count(), 13)
+        self.assertEqual(User.objects.count(), 5)
+        self.assertEqual(City.objects.count(), 7)
+        self.assertEqual(Activity.objects.count(), 20)
+        # Ids reservados depois dos existentes
+        self.assertEqual(result.ranges['trips'][0], Trip.objects.order_by('pk').first().pk + 1)
+
+        # Atividades programadas só nas cidades do próprio itinerário
+        entries = ItineraryActivity.objects.values_list('itinerary_id', 'activity__city_id')
+        self.assertTrue(entries)
+        cities = {}
+        for itinerary in Itinerary.objects.prefetch_related('cities'):
+            cities[itinerary.pk] = {city.pk for city in itinerary.cities.all()}
+        for itinerary_id, city_id in entries:
+            self.assertIn(city_id, cities[itinerary_id])
+
+        # Totais reconstruídos em lote
+        for itinerary_id in cities:
+            self.assertFalse(rebuild_itinerary_totals(itinerary_id))
+
+    def test_same_seed_same_rows(self):
+        first, second = make_plan(COUNTS, 7), make_plan(COUNTS, 7)
+        other = make_plan(COUNTS, 8)
+        for table in ('trips', 'destinations', 'itinerary_details'):
+            rows = BUILDERS[table](first, 0, 0, first.count(table))
+            again = BUILDERS[table](second, 0, 0, second.count(table))
+            changed = BUILDERS[table](other, 0, 0, other.count(table))
+            for model in rows:
+                self.assertEqual(fields(rows[model]), fields(again[model]), table)
+            self.assertNotEqual(
+                [fields(rows[model]) for model in rows], [fields(changed[model]) for model in changed], table,
+            )
+
+    def test_command(self):
+        out = StringIO()
+        counts = [f'--count={table}={count}' for table, count in COUNTS.items()]
+        call_command('generate_fixture_data', *counts, '--workers=2', stdout=out)
+        self.assertIn('SQLite', out.getvalue())
+        self.assertEqual(Itinerary.objects.count(), 6)
+        with self.assertRaises(CommandError):
+            call_command('generate_fixture_data', '--count=viagens=3', stdout=StringIO())
@@ -0,0 +1,89 @@
+from decimal import Decimal
+
+from django.test import TestCase
+
+from ..models import Activity, Itinerary, ItineraryActivity, ItineraryDay
+from ..totals import deferred_totals, rebuild_itinerary_totals
+from .helpers import make_activity, make_city, make_destination, make_itinerary, make_user, schedule
+
+
+class TotalsTests(TestCase):
+    def setUp(self):
+        city = make_city()
+        destination = make_destination()
+        self.museum = make_activity(city, destination, 'Museu', price='12.50', duration_hours='2.00')
+        self.tour = make_activity(city, destination, 'Passeio', price='30.00', duration_hours='3.50')
+        self.free = make_activity(city, destination, 'Praça', price=None, duration_hours=None)
+        user = make_user()
+        self.first = make_itinerary(user, 'Primeiro')
+        self.second = make_itinerary(user, 'Segundo')
+
+    def totals(self, itinerary):
+        itinerary = Itinerary.objects.get(pk=itinerary.pk)
+        days = dict(ItineraryDay.objects.filter(itinerary=itinerary).values_list('day_number', 'cost'))
+        return itinerary.activity_count, itinerary.activity_cost, itinerary.activity_hours, days
+
+    def assertNoDrift(self):
+        # Os deltas incrementais batem com o recálculo completo
+        for itinerary in (self.first, self.second):
+            self.assertFalse(rebuild_itinerary_totals(itinerary.pk), itinerary.title)
+
+    def test_deltas_match_rebuild(self):
+        entry = schedule(self.first, self.museum, 1)
+        schedule(self.first, self.tour, 1)
+        schedule(self.first, self.free, 2)
+        schedule(self.second, self.museum, 3)
+        self.assertEqual(
+            self.totals(self.first),
+            (3, Decimal('42.50'), Decimal('5.50'), {1: Decimal('42.50'), 2: Decimal('0.00')}),
+        )
+        # Mover de dia e de itinerário
+        entry.day_number = 2
+        entry.save()
+        entry.itinerary = self.second
+        entry.save()
+        self.assertNoDrift()
+        # Mudar o preço das atividades
+        self.museum.price = Decimal('20.00')
+        self.museum.save()
+        self.assertEqual(self.totals(self.second)[:3], (2, Decimal('40.00'), Decimal('4.00')))
+        ItineraryActivity.objects.get(itinerary=self.first, activity=self.tour).delete()
+        self.assertNoDrift()
+        self.assertEqual(self.totals(self.first), (1, Decimal('0.00'), Decimal('0.00'), {2: Decimal('0.00')}))
+
+    def test_activity_not_loaded_from_database(self):
+        schedule(self.first, self.museum, 1)
+        schedule(self.second, self.museum, 1)
+        # Instância montada à mão e outra com os campos adiados: sem valores carregados
+        Activity(
+            pk=self.museum.pk, name='Museu', description='', category='museum',
+            city_id=self.museum.city_id, destination_id=self.museum.destination_id,
+            price=Decimal('15.00'), duration_hours=Decimal('2.00'),
+        ).save()
+        self.assertEqual(self.totals(self.first)[1], Decimal('15.00'))
+        deferred = Activity.objects.defer('price', 'duration_hours').get(pk=self.museum.pk)
+        deferred.price = Decimal('18.00')
+        deferred.save()
+        self.assertEqual(self.totals(self.second)[1], Decimal('18.00'))
+        self.assertNoDrift()
+
+    def test_deferred_activity_change(self):
+        schedule(self.first, self.tour, 1)
+        with deferred_totals() as pending:
+            self.tour.duration_hours = Decimal('5.00')
+            self.tour.save()
+            self.assertEqual(pending, {self.first.pk})
+            # Ainda não aplicado
+            self.assertEqual(self.totals(self.first)[2], Decimal('3.50'))
+        self.assertEqual(self.totals(self.first)[2], Decimal('5.00'))
+        self.assertNoDrift()
+
+    def test_save_after_scheduling_keeps_totals(self):
+        itinerary = Itinerary.objects.get(pk=self.first.pk)
+        schedule(self.first, self.museum, 1)
+        # Instância lida antes da programação, com os totais antigos
+        itinerary.title = 'Renomeado'
+        itinerary.save()
+        self.assertEqual(self.totals(self.first)[:2], (1, Decimal('12.50')))
+        self.assertEqual(Itinerary.objects.get(pk=self.first.pk).title, 'Renomeado')
+        self.assertNoDrift()
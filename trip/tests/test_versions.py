@@ -0,0 +1,59 @@
+from datetime import date
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from ..models import Destination
+from ..search import DestinationIndex, destination_index
+from ..signals import bulk_changed
+from ..stays import StayIndex, stay_index
+from .helpers import make_destination, make_trip, make_user
+
+
+class SharedVersionTests(TestCase):
+    """
+    Um segundo índice faz o papel de outro processo: mesmo cache, cópia própria
+    """
+
+    def setUp(self):
+        cache.clear()
+        for index in (destination_index, stay_index):
+            index.invalidate()
+            self.addCleanup(index.invalidate)
+
+    def test_other_process_reloads_after_commit(self):
+        other = DestinationIndex()
+        self.assertEqual(other.search_ids('porto'), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            destination = make_destination('Porto', slug='porto')
+        self.assertEqual(other.search_ids('porto'), [destination.pk])
+
+    def test_writer_applies_its_own_change(self):
+        destination_index.ensure_loaded()
+        version = destination_index._version
+        with self.captureOnCommitCallbacks(execute=True):
+            destination = make_destination('Porto', slug='porto')
+        self.assertEqual(destination_index._version, version + 1)
+        with self.assertNumQueries(0):
+            self.assertEqual(destination_index.search_ids('porto'), [destination.pk])
+
+    def test_rollback_does_not_reach_the_index(self):
+        destination_index.ensure_loaded()
+        with self.captureOnCommitCallbacks(execute=False):
+            make_destination('Porto', slug='porto')
+        with self.assertNumQueries(0):
+            self.assertEqual(destination_index.search_ids('porto'), [])
+
+    def test_bulk_change_reaches_other_process(self):
+        trip = make_trip(make_user())
+        destination = make_destination(
+            'Porto', slug='porto', trip=trip, arrival_date=date(2025, 5, 1), departure_date=date(2025, 5, 3),
+        )
+        other = StayIndex()
+        self.assertEqual([stay.id for stay in other.at(date(2025, 5, 2))], [destination.pk])
+        Destination.objects.filter(pk=destination.pk).update(
+            arrival_date=date(2025, 6, 1), departure_date=date(2025, 6, 3),
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            bulk_changed.send(sender=Destination)
+        self.assertEqual(other.at(date(2025, 5, 2)), [])
@@ -0,0 +1,52 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Transportation
+from .helpers import make_city, make_destination, make_trip, make_user
+
+
+class PageTests(TestCase):
+    """
+    As páginas medidas em trip/benchmarks respondem 200
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = make_user()
+        make_trip(self.user)
+        self.porto = make_destination('Porto', slug='porto', city='Porto', country='Portugal')
+
+    def test_city_detail(self):
+        porto = make_city('Porto', description='Cidade do vinho')
+        lisboa = make_city('Lisboa', country=porto.country)
+        Transportation.objects.create(
+            origin=lisboa, destination=porto, transport_type='TRAIN',
+            duration_hours=Decimal('3.00'), price_min=Decimal('25.00'),
+        )
+        response = self.client.get(reverse('trip:city_detail', args=['porto']))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['city'], porto)
+        self.assertContains(response, 'Cidade do vinho')
+        self.assertContains(response, 'De Lisboa')
+
+    def test_city_detail_without_city(self):
+        response = self.client.get(reverse('trip:city_detail', args=['porto']))
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context['city'])
+        self.assertContains(response, reverse('trip:destination_form', args=['porto']))
+
+    def test_dashboard(self):
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(reverse('trip:dashboard')).status_code, 200)
+
+    def test_other_pages(self):
+        for url in (
+            reverse('trip:home'),
+            reverse('trip:destination_list'),
+            reverse('trip:destination_detail', args=[self.porto.pk]),
+        ):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 200)
@@ -0,0 +1,269 @@
+# Totais de custo e duração dos itinerários, mantidos a cada alteração
+import threading
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, DecimalField, Exists, F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Activity, Itinerary, ItineraryActivity, ItineraryDay
+
+ENTRY_FIELDS = ('itinerary_id', 'activity_id', 'day_number')
+ACTIVITY_FIELDS = ('price', 'duration_hours')
+
+ZERO = Decimal('0')
+
+_deferred = threading.local()
+
+
+def contribution(price, duration_hours, sign=1):
+    """
+    Quanto uma atividade programada soma nos totais
+    """
+    return {
+        'activity_count': sign,
+        'cost': sign * (price or ZERO),
+        'hours': sign * (duration_hours or ZERO),
+    }
+
+
+def apply_delta(itinerary_id, day_number, delta):
+    """
+    Aplica a diferença no itinerário e no dia com UPDATEs atômicos (F-expressions)
+    """
+    if not any(delta.values()):
+        return
+    Itinerary.objects.filter(pk=itinerary_id).update(
+        activity_count=F('activity_count') + delta['activity_count'],
+        activity_cost=F('activity_cost') + delta['cost'],
+        activity_hours=F('activity_hours') + delta['hours'],
+    )
+    days = ItineraryDay.objects.filter(itinerary_id=itinerary_id, day_number=day_number)
+    updated = days.update(**{field: F(field) + value for field, value in delta.items()})
+    if updated:
+        if delta['activity_count'] < 0:
+            days.filter(activity_count__lte=0).delete()
+        return
+    # Dia sem linha: só cria ao incluir (numa remoção em cascata o
+    # itinerário pode estar sendo apagado)
+    if delta['activity_count'] <= 0:
+        return
+    try:
+        with transaction.atomic():
+            ItineraryDay.objects.create(itinerary_id=itinerary_id, day_number=day_number, **delta)
+    except IntegrityError:
+        days.update(**{field: F(field) + value for field, value in delta.items()})
+
+
+def rebuild_itinerary_totals(itinerary_id):
+    """
+    Recalcula os totais de um itinerário a partir das atividades programadas.
+    Retorna True se os valores gravados estavam diferentes.
+    """
+    decimal = DecimalField(max_digits=12, decimal_places=2)
+    rows = (
+        ItineraryActivity.objects.filter(itinerary_id=itinerary_id).order_by()
+        .values('day_number')
+        .annotate(
+            activity_count=Count('id'),
+            cost=Coalesce(Sum('activity__price'), Value(ZERO), output_field=decimal),
+            hours=Coalesce(Sum('activity__duration_hours'), Value(ZERO), output_field=decimal),
+        )
+    )
+    days = {row['day_number']: row for row in rows}
+    totals = {
+        'activity_count': sum(row['activity_count'] for row in days.values()),
+        'activity_cost': sum((row['cost'] for row in days.values()), ZERO),
+        'activity_hours': sum((row['hours'] for row in days.values()), ZERO),
+    }
+
+    current = Itinerary.objects.filter(pk=itinerary_id).values(*totals).first()
+    if current is None:
+        return False
+    current_days = {
+        row['day_number']: row
+        for row in ItineraryDay.objects.filter(itinerary_id=itinerary_id)
+        .values('day_number', 'activity_count', 'cost', 'hours')
+    }
+    if current == totals and current_days == days:
+        return False
+
+    Itinerary.objects.filter(pk=itinerary_id).update(**totals)
+    ItineraryDay.objects.filter(itinerary_id=itinerary_id).delete()
+    ItineraryDay.objects.bulk_create([
+        ItineraryDay(itinerary_id=itinerary_id, **row) for row in days.values()
+    ])
+    return True
+
+
+def rebuild_totals_in_bulk(itineraries, batch_size=2000):
+    """
+    Recalcula os totais de muitos itinerários de uma vez (cargas em lote):
+    os dias saem de um GROUP BY e os itinerários de um único UPDATE
+    """
+    decimal = DecimalField(max_digits=12, decimal_places=2)
+    itinerary_ids = itineraries.order_by().values('pk')
+    ItineraryDay.objects.filter(itinerary_id__in=itinerary_ids).delete()
+    rows = (
+        ItineraryActivity.objects.filter(itinerary_id__in=itinerary_ids).order_by()
+        .values('itinerary_id', 'day_number')
+        .annotate(
+            activity_count=Count('id'),
+            cost=Coalesce(Sum('activity__price'), Value(ZERO), output_field=decimal),
+            hours=Coalesce(Sum('activity__duration_hours'), Value(ZERO), output_field=decimal),
+        )
+    )
+    days = []
+    for row in rows.iterator(chunk_size=batch_size):
+        days.append(ItineraryDay(**row))
+        if len(days) >= batch_size:
+            ItineraryDay.objects.bulk_create(days)
+            days = []
+    ItineraryDay.objects.bulk_create(days)
+
+    def day_sum(field, output_field):
+        return Coalesce(Subquery(
+            ItineraryDay.objects.filter(itinerary_id=OuterRef('pk')).order_by()
+            .values('itinerary_id').annotate(total=Sum(field)).values('total')
+        ), Value(0), output_field=output_field)
+
+    itineraries.update(
+        activity_count=day_sum('activity_count', IntegerField()),
+        activity_cost=day_sum('cost', decimal),
+        activity_hours=day_sum('hours', decimal),
+    )
+
+
+@contextmanager
+def deferred_totals():
+    """
+    Suspende as atualizações linha a linha dos itinerários alterados dentro
+    do bloco e recalcula cada um uma vez no fim (gravações em lote)
+    """
+    pending = getattr(_deferred, 'itineraries', None)
+    if pending is not None:
+        yield pending
+        return
+    pending = _deferred.itineraries = set()
+    try:
+        yield pending
+    finally:
+        _deferred.itineraries = None
+    for itinerary_id in sorted(pending):
+        rebuild_itinerary_totals(itinerary_id)
+
+
+def _pending():
+    """
+    Itinerários a recalcular no fim de deferred_totals(), ou None fora dele
+    """
+    return getattr(_deferred, 'itineraries', None)
+
+
+def _deferring(*itinerary_ids):
+    pending = _pending()
+    if pending is None:
+        return False
+    pending.update(itinerary_ids)
+    return True
+
+
+def _activity_values(instance):
+    # A atividade já carregada evita uma consulta
+    if ItineraryActivity.activity.is_cached(instance):
+        return instance.activity.price, instance.activity.duration_hours
+    row = Activity.objects.filter(pk=instance.activity_id).values_list(*ACTIVITY_FIELDS).first()
+    return row or (None, None)
+
+
+@receiver(pre_save, sender=ItineraryActivity)
+def entry_totals_pre_save(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None or instance.loaded_values(*ENTRY_FIELDS) is not None:
+        return
+    old = ItineraryActivity.objects.filter(pk=instance.pk).values(*ENTRY_FIELDS).first()
+    instance._loaded_values = {**getattr(instance, '_loaded_values', {}), **(old or {})}
+
+
+@receiver(post_save, sender=ItineraryActivity)
+def entry_totals_post_save(sender, instance, created, raw=False, **kwargs):
+    """
+    Atualiza os totais do itinerário quando uma atividade é programada ou movida
+    """
+    if raw:
+        return
+    old = None if created else instance.loaded_values(*ENTRY_FIELDS)
+    if old == {name: getattr(instance, name) for name in ENTRY_FIELDS}:
+        return
+    itinerary_ids = {instance.itinerary_id} | ({old['itinerary_id']} if old else set())
+    if _deferring(*itinerary_ids):
+        return
+    if old:
+        if old['activity_id'] == instance.activity_id:
+            price, duration = _activity_values(instance)
+        else:
+            price, duration = (
+                Activity.objects.filter(pk=old['activity_id']).values_list(*ACTIVITY_FIELDS).first() or (None, None)
+            )
+        apply_delta(old['itinerary_id'], old['day_number'], contribution(price, duration, sign=-1))
+    price, duration = _activity_values(instance)
+    apply_delta(instance.itinerary_id, instance.day_number, contribution(price, duration))
+
+
+@receiver(post_delete, sender=ItineraryActivity)
+def entry_totals_post_delete(sender, instance, **kwargs):
+    """
+    Atualiza os totais do itinerário quando uma atividade programada é removida
+    """
+    old = instance.loaded_values(*ENTRY_FIELDS) or {name: getattr(instance, name) for name in ENTRY_FIELDS}
+    if _deferring(old['itinerary_id']):
+        return
+    price, duration = (
+        Activity.objects.filter(pk=old['activity_id']).values_list(*ACTIVITY_FIELDS).first() or (None, None)
+    )
+    apply_delta(old['itinerary_id'], old['day_number'], contribution(price, duration, sign=-1))
+
+
+@receiver(pre_save, sender=Activity)
+def activity_totals_pre_save(sender, instance, raw=False, **kwargs):
+    # Instância que não veio do banco (ou com os campos adiados): ler os
+    # valores antigos antes que o save os sobrescreva
+    if raw or instance.pk is None or instance.loaded_values(*ACTIVITY_FIELDS) is not None:
+        return
+    old = Activity.objects.filter(pk=instance.pk).values(*ACTIVITY_FIELDS).first()
+    instance._loaded_values = {**getattr(instance, '_loaded_values', {}), **(old or {})}
+
+
+@receiver(post_save, sender=Activity)
+def activity_totals_post_save(sender, instance, created, raw=False, **kwargs):
+    """
+    Mudança de preço ou duração: ajusta todos os itinerários que têm a
+    atividade com dois UPDATEs, sem percorrer as linhas
+    """
+    old = None if created or raw else instance.loaded_values(*ACTIVITY_FIELDS)
+    if old is None:
+        return
+    delta_cost = (instance.price or ZERO) - (old['price'] or ZERO)
+    delta_hours = (instance.duration_hours or ZERO) - (old['duration_hours'] or ZERO)
+    if not (delta_cost or delta_hours):
+        return
+
+    entries = ItineraryActivity.objects.filter(activity_id=instance.pk).order_by()
+    pending = _pending()
+    if pending is not None:
+        # A lista de itinerários só é consultada quando o recálculo está adiado
+        pending.update(entries.values_list('itinerary_id', flat=True).distinct())
+        return
+    # Cada dia tem a atividade no máximo uma vez (unique_together)
+    ItineraryDay.objects.filter(
+        Exists(entries.filter(itinerary_id=OuterRef('itinerary_id'), day_number=OuterRef('day_number')))
+    ).update(cost=F('cost') + delta_cost, hours=F('hours') + delta_hours)
+    occurrences = Subquery(
+        entries.filter(itinerary_id=OuterRef('pk')).values('itinerary_id').annotate(total=Count('id')).values('total')
+    )
+    Itinerary.objects.filter(Exists(entries.filter(itinerary_id=OuterRef('pk')))).update(
+        activity_cost=F('activity_cost') + occurrences * delta_cost,
+        activity_hours=F('activity_hours') + occurrences * delta_hours,
+    )
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import api, export, metrics, views
 
 app_name = 'trip'
 
@@ -15,14 +15,36 @@ urlpatterns = [
     path('destination/create_update/', views.destination_create_update, name='destination_create_update'),
     path('destination/<slug:slug>/edit/', views.destination_form, name='destination_form'),
     path('destinations/delete/<int:destination_id>/', views.destination_delete, name='destination_delete'),
-    path('destination/<slug:slug>/', views.city_detail, name='city_detail'),
+    path('destination/<slug:city_slug>/', views.city_detail, name='city_detail'),
     # Logout
     path('logout/', views.logout_view, name='logout'),
     # Página do transporte da aplicação
     path('trips/transportation/', views.transportation, name='transportation'),
+    path('trips/transportation/routes/', views.transportation_routes, name='transportation_routes'),
 
     path('itinerary/<slug:city_slug>/form/', views.itinerary_form, name='itinerary_form'),
 
+    # API JSON (somente leitura)
+    path('api/destinations/', api.destination_list, name='api_destination_list'),
+    path('api/destinations/search/', api.destination_search, name='api_destination_search'),
+    path('api/destinations/<int:pk>/', api.destination_detail, name='api_destination_detail'),
+    path('api/trips/', api.trip_list, name='api_trip_list'),
+    path('api/trips/<int:pk>/', api.trip_detail, name='api_trip_detail'),
+    path('api/cities/', api.city_list, name='api_city_list'),
+    # API para autocompletar cidades
+    path('api/cities/autocomplete/', api.city_autocomplete, name='city_autocomplete'),
+    path('api/cities/<int:pk>/', api.city_detail, name='api_city_detail'),
+    path('api/transportation/', api.transportation_list, name='api_transportation_list'),
+    path('api/transportation/<int:pk>/', api.transportation_detail, name='api_transportation_detail'),
+    path('api/nearby/', api.nearby, name='api_nearby'),
+    # Calendário de estadias (quem está em cada cidade em um período)
+    path('api/calendar/', api.stay_calendar, name='api_stay_calendar'),
+    # Exportação completa em streaming (CSV ou NDJSON)
+    path('api/export/<slug:name>/', export.export_view, name='api_export'),
+
+    # Métricas por requisição (formato Prometheus); exige o RequestMetricsMiddleware
+    path('metrics/', metrics.metrics_view, name='metrics'),
+
 ]    
     
 """
@@ -67,8 +89,6 @@ urlpatterns = [
     # Perfil do usuário
     path('profile/', views.user_profile, name='user_profile'),
 
-    # API para autocompletar cidades
-    path('api/cities/autocomplete/', views.city_autocomplete, name='city_autocomplete'),
     path('city/<int:city_id>/transport/', views.city_transport, name='city_transport'),
    
    
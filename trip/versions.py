@@ -0,0 +1,81 @@
+# Versões compartilhadas (no cache) dos dados, para todos os processos
+import time
+
+from django.core.cache import cache
+
+VERSION_KEY = 'trip:version:{}'
+
+
+def get_version(name):
+    """
+    Versão atual de `name`; muda a cada bump_version, em qualquer processo
+    que use o mesmo cache
+    """
+    key = VERSION_KEY.format(name)
+    version = cache.get(key)
+    if version is None:
+        # Começar de um valor novo para não reaproveitar versões antigas
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+async def aget_version(name):
+    key = VERSION_KEY.format(name)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), None)
+        version = await cache.aget(key)
+    return version
+
+
+def bump_version(name):
+    """
+    Avança a versão (incremento atômico no cache) e retorna o valor novo
+    """
+    key = VERSION_KEY.format(name)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = time.time_ns()
+        cache.set(key, version, None)
+        return version
+
+
+class SharedVersion:
+    """
+    Versão compartilhada de um índice em memória (ver trip/versions.py).
+
+    Cada processo monta o próprio índice; toda gravação avança a versão no
+    cache, depois do commit. O processo que gravou, se estava em dia, aplica
+    a alteração na hora; os demais veem a versão nova na próxima leitura e
+    recarregam do banco. A classe define version_name, _lock e _loaded.
+    """
+    version_name = None
+    _version = None
+
+    def is_current(self):
+        return self._loaded and self._version == get_version(self.version_name)
+
+    async def ais_current(self):
+        return self._loaded and self._version == await aget_version(self.version_name)
+
+    def start_load(self):
+        """
+        Versão lida antes da carga: o que for gravado durante ela já deixa
+        o índice desatualizado
+        """
+        self._version = get_version(self.version_name)
+
+    def advance(self):
+        """
+        Registra uma alteração; True se este índice estava em dia e pode
+        aplicá-la, senão ele é descartado e recarregado na próxima leitura
+        """
+        with self._lock:
+            version = bump_version(self.version_name)
+            if self._loaded and self._version == version - 1:
+                self._version = version
+                return True
+            self._loaded = False
+            return False
@@ -1,31 +1,84 @@
 # views.py
-from django.shortcuts import render, get_object_or_404, redirect
+from django.shortcuts import render, get_object_or_404, aget_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import logout
 import pandas as pd
 import matplotlib.pyplot as plt
 import io
 import base64
-from django.http import JsonResponse
+from django.http import Http404, HttpResponse, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.contrib import messages
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.exceptions import ValidationError
 from django.core.paginator import Paginator
 from django.db.models import Q
 
 from django.views.generic import ListView
 from django.views.generic.edit import CreateView, UpdateView, DeleteView
 from django.urls import reverse_lazy
-from .models import Destination, Trip, Transportation
+from .models import City, Destination, Trip, Transportation
 from .forms import DestinationForm, ItineraryForm
+from .charts import get_duration_chart
+from .conditional import arow_stamp, aversioned, conditional
+from .context_processors import MENU_VERSION, aprepare_context
+from .pagination import InvalidCursor, aapproximate_count, akeyset_paginate
+from .search import adestination_filter
+from .serializers import DestinationSerializer, dumps
+from .stats import get_user_stats
+from .versions import aget_version
 
-def home(request):
-    trips = Trip.objects.prefetch_related('destination_trips').all()
+# home, destination_list, destination_detail e city_detail são assíncronas:
+# as consultas usam o ORM assíncrono e tudo que o template precisa é
+# carregado antes do render (ver context_processors.aprepare_context), então
+# sob ASGI nenhuma thread fica presa esperando o banco. Sob WSGI continuam
+# funcionando (o Django as executa num event loop por requisição).
+
+# ETag das páginas e do JSON de destino: o updated_at da linha (pela chave)
+# ou a versão compartilhada da listagem decide se o cliente já tem a versão
+# atual (304 sem consultar a página nem renderizar)
+
+async def _page_parts(request):
+    """
+    Partes do ETag comuns às páginas: usuário logado e versão do menu
+    """
+    user = await request.auser()
+    return user.pk, await aget_version(MENU_VERSION)
+
+
+def _has_pending_messages(request):
+    # Mensagens aparecem na próxima página renderizada: não responder 304
+    return bool(request.COOKIES.get(CookieStorage.cookie_name))
+
+
+async def _destination_list_stamp(request):
+    if _has_pending_messages(request):
+        return None
+    # O select de viagens lista todas: a versão delas também conta
+    versions = (await aversioned('destination'), await aversioned('trip'))
+    return (*versions, *await _page_parts(request)), None
 
-    context = {
-        'trips': trips,
-    }  # Adicione esta linha
-    return render(request, 'trip/base.html', context)
+
+async def _destination_stamp(request, destination_id):
+    row = await arow_stamp(Destination.objects.filter(id=destination_id))
+    return row and (row, row[0])
+
+
+async def _city_page_stamp(request, city_slug):
+    if _has_pending_messages(request):
+        return None
+    row = await arow_stamp(Destination.objects.filter(slug=city_slug))
+    # Também mostra a cidade e as ligações de transporte dela
+    versions = (await aversioned('city'), await aversioned('transportation'))
+    return row and ((row, *versions, *await _page_parts(request)), None)
+
+
+async def home(request):
+    # base.html não lista viagens: carregar todas só custava memória (e o
+    # prefetch 'destination_trips' nem existe; o related_name é 'destinations')
+    await aprepare_context(request)
+    return render(request, 'trip/base.html')
 
 def logout_view(request):
     logout(request)
@@ -34,81 +87,79 @@ def logout_view(request):
 @login_required
 def dashboard(request):
     trips = Trip.objects.filter(user=request.user).order_by('-start_date')
-    if trips.exists():
-        df = pd.DataFrame(list(trips.values('id', 'start_date', 'end_date', 'budget', 'status')))
-        df['start_date'] = pd.to_datetime(df['start_date'], errors='coerce')
-        df['end_date'] = pd.to_datetime(df['end_date'], errors='coerce')
-        df['duration'] = (df['end_date'] - df['start_date']).dt.days
-        avg_duration = df['duration'].mean()
-        avg_budget = df['budget'].mean() if not df['budget'].isna().all() else 0
-        status_counts = df['status'].value_counts().to_dict()
-
-        if len(df) > 1:
-            plt.figure(figsize=(8, 4))
-            df['duration'].plot(kind='bar')
-            plt.title('Duração de Viagens')
-            plt.tight_layout()
-            buffer = io.BytesIO()
-            plt.savefig(buffer, format='png')
-            buffer.seek(0)
-            img_str = base64.b64encode(buffer.read()).decode('utf-8')
-            plt.close()
-            duration_chart = f"data:image/png;base64,{img_str}"
-        else:
-            duration_chart = None
-    else:
-        avg_duration = 0
-        avg_budget = 0
-        status_counts = {}
-        duration_chart = None
+    stats = get_user_stats(request.user)
+
+    # O gráfico é gerado em segundo plano; enquanto isso mostramos um aviso
+    duration_chart, duration_chart_pending = get_duration_chart(request.user)
 
     return render(request, 'trip/dashboard.html', {
         'trips': trips,
-        'avg_duration': avg_duration,
-        'avg_budget': avg_budget,
-        'status_counts': status_counts,
+        'stats': stats,
+        'avg_duration': stats.avg_duration,
+        'avg_budget': stats.avg_budget,
+        'status_counts': stats.status_counts,
         'duration_chart': duration_chart,
+        'duration_chart_pending': duration_chart_pending,
     })
 
 # views.py - Função destination_list corrigida
 
-def destination_list(request):
-    from .models import Trip, Destination  # Certifique-se de importar os modelos
-    
+# Colunas ordenáveis na lista de destinos (coluna -> aceita nulos).
+# Cada uma tem um índice (coluna, id) em Destination.Meta.indexes.
+DESTINATION_SORT_COLUMNS = {
+    'name': False,
+    'created_at': False,
+    'arrival_date': True,
+}
+DESTINATIONS_PER_PAGE = 10
+
+
+@conditional(_destination_list_stamp, last_modified=False)
+async def destination_list(request):
     search = request.GET.get('search', '')
     order_by = request.GET.get('order_by', 'name')
-    direction = request.GET.get('direction', 'asc')
+    if order_by not in DESTINATION_SORT_COLUMNS:
+        order_by = 'name'
+    direction = 'desc' if request.GET.get('direction') == 'desc' else 'asc'
     
     # Query base
-    destinations = Destination.objects.all()
+    destinations = Destination.objects.select_related('trip')
     
-    # Filtro de busca
+    # Filtro de busca (índice sem acentos, ver search.py)
     if search:
-        destinations = destinations.filter(name__icontains=search)
-    
-    # Ordenação
-    if direction == 'desc':
-        order_by = f'-{order_by}'
-    
-    destinations = destinations.order_by(order_by)
+        condition, total = await adestination_filter(search)
+        destinations = destinations.filter(condition)
+    else:
+        total = None
     
-    # Paginação
-    from django.core.paginator import Paginator
-    paginator = Paginator(destinations, 10)  # 10 itens por página
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # Paginação por chave: cada página continua a partir da última linha
+    # da anterior, sem OFFSET e sem COUNT(*) por requisição
+    ordering = f'-{order_by}' if direction == 'desc' else order_by
+    nullable = DESTINATION_SORT_COLUMNS[order_by]
+    try:
+        page_obj = await akeyset_paginate(
+            destinations, ordering,
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+            limit=DESTINATIONS_PER_PAGE,
+            nullable=nullable,
+        )
+    except (InvalidCursor, ValueError, ValidationError):
+        page_obj = await akeyset_paginate(destinations, ordering, limit=DESTINATIONS_PER_PAGE, nullable=nullable)
+    page_obj.count = total if total is not None else await aapproximate_count(destinations)
     
     # Buscar todas as viagens para o select
-    trips = Trip.objects.all().order_by('name')
+    trips = [trip async for trip in Trip.objects.all().order_by('name')]
     
     context = {
         'db': page_obj,
         'trips': trips,  # Adicionar as viagens no contexto
         'search': search,
-        'order_by': request.GET.get('order_by', 'name'),
+        'order_by': order_by,
         'direction': direction,
     }
     
+    await aprepare_context(request)
     return render(request, 'trip/destination_list.html', context)
 
 from django.views.decorators.http import require_http_methods
@@ -169,28 +220,23 @@ def destination_create_update(request):
     return render(request, 'trip/destination_list.html', context)
 
 
-def destination_detail(request, destination_id):
+@conditional(_destination_stamp)
+async def destination_detail(request, destination_id):
     """
     View para retornar dados do destino em JSON (para AJAX)
     """
-    destination = get_object_or_404(Destination, id=destination_id)
-    
-    data = {
-        'id': destination.id,
-        'name': destination.name,
-        'city': destination.city,
-        'country': destination.country,
-        'slug': destination.slug,
-        'arrival_date': destination.arrival_date.strftime('%Y-%m-%d') if destination.arrival_date else '',
-        'departure_date': destination.departure_date.strftime('%Y-%m-%d') if destination.departure_date else '',
-        'longitude': float(destination.longitude) if destination.longitude else '',
-        'latitude': float(destination.latitude) if destination.latitude else '',
-        'trip_id': destination.trip.id if destination.trip else '',
-        'image': destination.image.url if destination.image else '',
-        'description': destination.description,
-    }
-    print(f"Dados da atualização {data}")
-    return JsonResponse(data)
+    fields = [
+        'id', 'name', 'city', 'country', 'slug', 'arrival_date', 'departure_date',
+        'longitude', 'latitude', 'trip_id', 'image', 'description',
+    ]
+    serializer = DestinationSerializer(fields)
+    row = await serializer.values(Destination.objects.filter(id=destination_id)).afirst()
+    if row is None:
+        raise Http404("Destino não encontrado")
+
+    # O formulário espera string vazia nos campos sem valor
+    data = {name: '' if value is None else value for name, value in serializer.to_representation(row).items()}
+    return HttpResponse(dumps(data), content_type='application/json')
 
 @require_http_methods(["POST"])
 def destination_delete(request, destination_id):
@@ -313,12 +359,57 @@ def transportation(request):
     
     return render(request, 'trip/transportation.html', context_data)
 
-def city_detail(request, city_slug):
+@conditional(_city_page_stamp, last_modified=False)
+async def city_detail(request, city_slug):
     """
     Detalhes de uma cidade específica
     """
-    destination = get_object_or_404(Destination, slug=city_slug)
+    destination = await aget_object_or_404(Destination, slug=city_slug)
+    # A página mostra a cidade do destino (pelo nome), quando cadastrada
+    city = None
+    if destination.city:
+        city = await City.objects.select_related('country').filter(name__iexact=destination.city).afirst()
+    arrivals = departures = []
+    if city is not None:
+        arrivals = [leg async for leg in city.arrival.select_related('origin').order_by('price_min', 'id')[:3]]
+        departures = [leg async for leg in city.departures.select_related('destination').order_by('price_min', 'id')[:3]]
     context = {
         'destination': destination,
+        'city': city,
+        'place': city.name if city else destination.city or destination.name,
+        'arrivals': arrivals,
+        'departures': departures,
     }
+    await aprepare_context(request)
     return render(request, 'trip/city_detail.html', context)
+
+def transportation_routes(request):
+    """
+    Rotas entre duas cidades em JSON (mais barata, mais rápida ou menos trechos)
+    """
+    from .routing import route_graph, CRITERIA, DEFAULT_MAX_LEGS
+
+    try:
+        origin_id = int(request.GET['origin'])
+        destination_id = int(request.GET['destination'])
+        max_legs = min(int(request.GET.get('max_legs', DEFAULT_MAX_LEGS)), 8)
+    except (KeyError, ValueError):
+        return JsonResponse({'error': 'Informe origin e destination (ids de cidade).'}, status=400)
+
+    criteria = request.GET.get('criteria', 'pareto')
+    if criteria not in CRITERIA:
+        return JsonResponse({'error': f'Critério inválido. Use um de: {", ".join(CRITERIA)}.'}, status=400)
+
+    transport_types = request.GET.getlist('type') or None
+    routes = route_graph.find_routes(
+        origin_id, destination_id,
+        criteria=criteria,
+        max_legs=max_legs,
+        transport_types=transport_types,
+    )
+    return JsonResponse({
+        'origin': origin_id,
+        'destination': destination_id,
+        'criteria': criteria,
+        'routes': routes,
+    })